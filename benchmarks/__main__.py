@@ -0,0 +1,89 @@
+"""
+Run the benchmark suite offline and save the results as JSON.
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --compare results.json --threshold 0.1
+
+With `--compare` the results are compared with the saved ones,
+the exit code is 1 if any case became slower than the threshold.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import timeit
+
+from benchmarks.suite import get_cases
+
+
+def run_case(case, repeat: int) -> dict:
+    timer = timeit.Timer(case)
+    number, _ = timer.autorange()
+    timings = [
+        timing / number
+        for timing in timer.repeat(repeat=repeat, number=number)
+    ]
+    return {
+        "min": min(timings),
+        "mean": statistics.mean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def run(pattern: str = "", repeat: int = 5) -> dict:
+    results = {}
+    for name, make_case in get_cases().items():
+        if pattern not in name:
+            continue
+        results[name] = run_case(make_case(), repeat)
+        print("%-36s %10.2f us" % (name, results[name]["min"] * 1e6))
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["min"] / baseline[name]["min"]
+        print("%-36s x%.2f" % (name, ratio))
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--output", help="save results to the JSON file")
+    parser.add_argument("--compare", help="compare with the JSON file")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--filter", default="", help="run matching cases")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = run(args.filter, args.repeat)
+    report = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("Regressions: %s" % ", ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Benchmark of `build_many` against building the queries in a plain loop.
+
+    python -m benchmarks.bench_build_many
+"""
+import timeit
+
+from elasticsearch_query_builder import ElasticsearchQueryBuilder, fields
+
+
+class Builder(ElasticsearchQueryBuilder):
+    search = fields.MultiMatchElasticField(
+        query_type="best_fields",
+        fields=["title", "description"]
+    )
+    category = fields.TermElasticField(
+        input_type=str,
+        field_name="category"
+    )
+    price_min = fields.RangeElasticField(
+        input_type=float,
+        lookup_expr="gte",
+        field_name="price"
+    )
+    tags = fields.TermsElasticField(
+        field_name="tags"
+    )
+
+
+class CompiledBuilder(Builder):
+    compiled = True
+
+
+def make_params(count: int):
+    return [
+        {
+            "search": "text %s" % i,
+            "category": "category_%s" % (i % 20),
+            "price_min": str(i % 100),
+            "tags": ["tag_%s" % (i % 7), "tag_%s" % (i % 11)],
+        }
+        for i in range(count)
+    ]
+
+
+def run(count: int = 100000):
+    params_list = make_params(count)
+    results = {}
+    for cls in (Builder, CompiledBuilder):
+        loop = timeit.timeit(
+            lambda: [cls(dict(params)).query for params in params_list],
+            number=1
+        )
+        batch = timeit.timeit(
+            lambda: cls.build_many(params_list),
+            number=1
+        )
+        results[cls.__name__] = {
+            "loop": count / loop,
+            "build_many": count / batch,
+        }
+    return results
+
+
+def main():
+    for name, throughput in run().items():
+        print(
+            "%-16s loop %9.0f q/s, build_many %9.0f q/s (x%.2f)" % (
+                name,
+                throughput["loop"],
+                throughput["build_many"],
+                throughput["build_many"] / throughput["loop"],
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark of the compiled build function against the interpreted one.
+
+    python -m benchmarks.bench_compiled_query
+"""
+import timeit
+
+from elasticsearch_query_builder import ElasticsearchQueryBuilder, fields
+
+
+class InterpretedBuilder(ElasticsearchQueryBuilder):
+    search = fields.MultiMatchElasticField(
+        query_type="best_fields",
+        fields=["title", "description", "authors.name"],
+        operator="and",
+        fuzziness="AUTO"
+    )
+    in_stock = fields.TermElasticField(
+        input_type=bool,
+        field_name="in_stock"
+    )
+    category = fields.TermElasticField(
+        input_type=str,
+        field_name="category"
+    )
+    tags = fields.TermsElasticField(
+        field_name="tags"
+    )
+    price_min = fields.RangeElasticField(
+        input_type=float,
+        lookup_expr="gte",
+        field_name="price"
+    )
+    has_reviews = fields.ExistsElasticField(
+        field_name="reviews"
+    )
+    author = fields.NestedElasticField(
+        path="authors",
+        child=fields.MatchElasticField(
+            input_type=str,
+            field_name="name"
+        )
+    )
+
+    def get_additional_category_queries(self):
+        return [{"term": {"visible": True}}]
+
+
+class CompiledBuilder(InterpretedBuilder):
+    compiled = True
+
+
+PARAMS = {
+    "search": "world",
+    "in_stock": "true",
+    "category": "books",
+    "tags": ["new", "popular"],
+    "price_min": "10.5",
+    "has_reviews": "false",
+    "author": "John Doe",
+}
+
+
+def run(number: int = 20000):
+    assert CompiledBuilder(dict(PARAMS)).query == \
+        InterpretedBuilder(dict(PARAMS)).query
+
+    interpreted = timeit.timeit(
+        lambda: InterpretedBuilder(dict(PARAMS)).query,
+        number=number
+    )
+    compiled = timeit.timeit(
+        lambda: CompiledBuilder(dict(PARAMS)).query,
+        number=number
+    )
+    return {
+        "interpreted": interpreted / number,
+        "compiled": compiled / number,
+    }
+
+
+def main():
+    timings = run()
+    print(
+        "interpreted %6.2f us, compiled %6.2f us (x%.2f)" % (
+            timings["interpreted"] * 1e6,
+            timings["compiled"] * 1e6,
+            timings["interpreted"] / timings["compiled"],
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
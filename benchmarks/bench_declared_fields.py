@@ -0,0 +1,81 @@
+"""
+Benchmark of resolving request params to declared builder fields.
+
+Compares the per-class field registry with the per-request
+``hasattr``/``getattr`` reflection used before it.
+
+    python -m benchmarks.bench_declared_fields
+"""
+import timeit
+
+from elasticsearch_query_builder import ElasticsearchQueryBuilder, fields
+
+
+def make_builder(fields_count: int):
+    namespace = {
+        "field_%s" % i: fields.TermElasticField(
+            input_type=str,
+            field_name="field_%s" % i
+        )
+        for i in range(fields_count)
+    }
+    return type(
+        "Builder%s" % fields_count,
+        (ElasticsearchQueryBuilder,),
+        namespace
+    )
+
+
+def assign_fields_by_reflection(builder, params: dict):
+    found_fields = {}
+    validated_params = {}
+    for field_query_name, field_value in params.items():
+        if not hasattr(builder, field_query_name):
+            continue
+        field = getattr(builder, field_query_name)
+        assert isinstance(field, fields.ElasticField)
+        found_fields[field_query_name] = getattr(builder, field_query_name)
+        validated_params[field_query_name] = field_value
+    return found_fields, validated_params
+
+
+def run(number: int = 2000):
+    results = {}
+    for fields_count in (5, 50, 500):
+        builder_class = make_builder(fields_count)
+        params = {
+            "field_%s" % i: "value"
+            for i in range(fields_count)
+        }
+        params["unknown"] = "value"
+        builder = builder_class()
+
+        registry = timeit.timeit(
+            lambda: builder._assign_fields(params),
+            number=number
+        )
+        reflection = timeit.timeit(
+            lambda: assign_fields_by_reflection(builder, params),
+            number=number
+        )
+        results[fields_count] = {
+            "registry": registry / number,
+            "reflection": reflection / number,
+        }
+    return results
+
+
+def main():
+    for fields_count, timings in run().items():
+        print(
+            "%4d fields: registry %8.2f us, reflection %8.2f us (x%.2f)" % (
+                fields_count,
+                timings["registry"] * 1e6,
+                timings["reflection"] * 1e6,
+                timings["reflection"] / timings["registry"],
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
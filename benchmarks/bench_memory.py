@@ -0,0 +1,84 @@
+"""
+Benchmark of indexing and query throughput of the in-memory engine.
+
+    python -m benchmarks.bench_memory
+"""
+import random
+import time
+import timeit
+
+from elasticsearch_query_builder.memory import MemoryIndex
+
+WORDS = [
+    "quick", "brown", "fox", "lazy", "dog", "bread", "recipe", "garden",
+    "river", "stone", "light", "night", "green", "story", "house", "road",
+]
+
+QUERIES = {
+    "term": {"term": {"category.keyword": "category_7"}},
+    "terms": {"terms": {"year": list(range(1990, 2000))}},
+    "range": {"range": {"price": {"gte": 100, "lt": 200}}},
+    "exists": {"exists": {"field": "discount"}},
+    "ids": {"ids": {"values": [str(i) for i in range(0, 1000, 7)]}},
+    "match": {"match": {"title": "quick brown fox"}},
+    "match_phrase": {"match_phrase": {"title": "lazy dog"}},
+    "nested": {
+        "nested": {
+            "path": "authors",
+            "query": {"match": {"authors.name": "author_3"}},
+        }
+    },
+    "bool": {
+        "bool": {
+            "must": [{"match": {"title": "green garden"}}],
+            "filter": [
+                {"term": {"category.keyword": "category_3"}},
+                {"range": {"price": {"lte": 500}}},
+            ],
+            "must_not": [{"exists": {"field": "discount"}}],
+        }
+    },
+}
+
+
+def make_documents(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(count):
+        document = {
+            "_id": str(i),
+            "title": " ".join(rng.choice(WORDS) for _ in range(6)),
+            "category": "category_%s" % rng.randrange(20),
+            "year": rng.randrange(1950, 2024),
+            "price": rng.randrange(1000),
+            "authors": [
+                {"name": "author_%s" % rng.randrange(50)}
+                for _ in range(rng.randrange(1, 3))
+            ],
+        }
+        if i % 3 == 0:
+            document["discount"] = rng.randrange(50)
+        yield document
+
+
+def run(count: int = 10000, number: int = 20):
+    index = MemoryIndex()
+    started = time.perf_counter()
+    index.add_many(make_documents(count))
+    results = {"index_docs_per_s": count / (time.perf_counter() - started)}
+
+    for name, query in QUERIES.items():
+        body = {"query": query}
+        timing = timeit.timeit(lambda: index.search(body), number=number)
+        results["%s_queries_per_s" % name] = number / timing
+    return results
+
+
+def main():
+    for count in (1000, 10000):
+        print("%s documents" % count)
+        for name, value in run(count).items():
+            print("  %-24s %10.0f" % (name, value))
+
+
+if __name__ == "__main__":
+    main()
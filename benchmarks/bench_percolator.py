@@ -0,0 +1,94 @@
+"""
+Benchmark of percolation of a document stream against stored queries.
+
+    python -m benchmarks.bench_percolator [stored queries ...]
+"""
+import random
+import sys
+import time
+
+from elasticsearch_query_builder import ElasticsearchQueryBuilder, fields
+from elasticsearch_query_builder.percolator import Percolator
+
+
+class SavedSearchBuilder(ElasticsearchQueryBuilder):
+    search = fields.MatchElasticField(input_type=str, field_name="title")
+    category = fields.TermElasticField(
+        input_type=str,
+        field_name="category.keyword"
+    )
+    tags = fields.TermsElasticField(field_name="tags.keyword")
+    price_to = fields.RangeElasticField(
+        input_type=int,
+        lookup_expr="lte",
+        field_name="price"
+    )
+
+    __slots__ = ()
+
+
+WORDS = ["quick", "brown", "fox", "lazy", "dog", "green", "garden", "road"]
+
+
+def make_params(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        params = {"price_to": rng.randrange(1000)}
+        if rng.random() < 0.5:
+            params["category"] = "category_%s" % rng.randrange(10000)
+        else:
+            params["tags"] = [
+                "tag_%s" % rng.randrange(10000) for _ in range(3)
+            ]
+        if rng.random() < 0.3:
+            params["search"] = rng.choice(WORDS)
+        yield params
+
+
+def make_documents(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "_id": str(i),
+            "title": " ".join(rng.choice(WORDS) for _ in range(5)),
+            "category": "category_%s" % rng.randrange(10000),
+            "tags": ["tag_%s" % rng.randrange(10000) for _ in range(5)],
+            "price": rng.randrange(1000),
+        }
+
+
+def run(queries: int, documents: int = 2000, batch_size: int = 1000):
+    percolator = Percolator()
+    started = time.perf_counter()
+    for query_id, query in enumerate(
+        SavedSearchBuilder.build_many(make_params(queries), lazy=True)
+    ):
+        percolator.add(query_id, query)
+    add_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matches = 0
+    for _, query_ids in percolator.percolate_many(
+        make_documents(documents),
+        batch_size=batch_size
+    ):
+        matches += len(query_ids)
+    percolate_time = time.perf_counter() - started
+
+    return {
+        "add_queries_per_s": queries / add_time,
+        "percolate_docs_per_s": documents / percolate_time,
+        "matches_per_doc": matches / documents,
+    }
+
+
+def main(argv=None):
+    sizes = [int(size) for size in (argv or sys.argv[1:])]
+    for queries in sizes or (10000, 100000, 1000000):
+        print("%s stored queries" % queries)
+        for name, value in run(queries).items():
+            print("  %-24s %10.2f" % (name, value))
+
+
+if __name__ == "__main__":
+    main()
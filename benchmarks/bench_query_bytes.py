@@ -0,0 +1,52 @@
+"""
+Benchmark of `query_bytes` against building the query and encoding it
+with the standard library and orjson (if installed).
+
+    python -m benchmarks.bench_query_bytes
+"""
+import json
+import timeit
+
+from benchmarks.bench_compiled_query import InterpretedBuilder, PARAMS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def run(number: int = 20000):
+    assert InterpretedBuilder(dict(PARAMS)).query_bytes() == json.dumps(
+        InterpretedBuilder(dict(PARAMS)).query
+    ).encode("utf-8")
+
+    timings = {
+        "dict_json": timeit.timeit(
+            lambda: json.dumps(
+                InterpretedBuilder(dict(PARAMS)).query
+            ).encode("utf-8"),
+            number=number
+        ),
+        "query_bytes": timeit.timeit(
+            lambda: InterpretedBuilder(dict(PARAMS)).query_bytes(),
+            number=number
+        ),
+    }
+    if orjson is not None:
+        timings["dict_orjson"] = timeit.timeit(
+            lambda: orjson.dumps(InterpretedBuilder(dict(PARAMS)).query),
+            number=number
+        )
+    return {
+        name: timing / number
+        for name, timing in timings.items()
+    }
+
+
+def main():
+    for name, timing in run().items():
+        print("%-12s %6.2f us" % (name, timing * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Memory of the builder and field instances, which declare `__slots__`,
+against the layout with `__dict__` they had before.
+
+Allocated bytes per instance are measured with `tracemalloc`.
+The baseline is a subclass of the same class without `__slots__`,
+which keeps the attributes in `__dict__` as well. Its slots are still
+allocated, so the baseline is larger than the former instances
+by a pointer per attribute.
+
+    python -m benchmarks.bench_slots
+"""
+import tracemalloc
+
+from elasticsearch_query_builder import ElasticsearchQueryBuilder, fields
+
+
+class Builder(ElasticsearchQueryBuilder):
+    __slots__ = ()
+
+    term_field = fields.TermElasticField(
+        field_name="term_field",
+        input_type=int
+    )
+
+
+def get_slots(cls: type) -> list:
+    return [
+        name
+        for klass in cls.__mro__
+        for name in vars(klass).get("__slots__", ())
+    ]
+
+
+def with_dict_layout(cls: type) -> type:
+    """
+    Subclass of the class keeping the attributes in `__dict__`.
+    """
+    slots = get_slots(cls)
+
+    def __init__(self, *args, **kwargs):
+        cls.__init__(self, *args, **kwargs)
+        self.__dict__.update(
+            (name, getattr(self, name))
+            for name in slots
+            if hasattr(self, name)
+        )
+
+    return type("Dict%s" % cls.__name__, (cls,), {"__init__": __init__})
+
+
+def measure(factory, count: int = 2000) -> float:
+    """
+    Allocated bytes per instance.
+    """
+    tracemalloc.start()
+    try:
+        snapshot = tracemalloc.take_snapshot()
+        instances = [factory() for _ in range(count)]
+        allocated = sum(
+            stat.size_diff
+            for stat in tracemalloc.take_snapshot().compare_to(
+                snapshot,
+                "filename"
+            )
+        )
+    finally:
+        tracemalloc.stop()
+    del instances
+    return allocated / count
+
+
+def compare(cls: type, *args, **kwargs) -> dict:
+    dict_cls = with_dict_layout(cls)
+    return {
+        "slots": measure(lambda: cls(*args, **kwargs)),
+        "dict": measure(lambda: dict_cls(*args, **kwargs)),
+    }
+
+
+def run() -> dict:
+    return {
+        "builder": compare(Builder),
+        "builder with params": compare(Builder, {"term_field": "1"}),
+        "term field": compare(
+            fields.TermElasticField,
+            field_name="term_field",
+            input_type=int
+        ),
+        "match field": compare(
+            fields.MatchElasticField,
+            field_name="match_field",
+            input_type=str
+        ),
+    }
+
+
+def main():
+    for name, sizes in run().items():
+        print("%-20s slots %6.0f bytes, dict %6.0f bytes" % (
+            name,
+            sizes["slots"],
+            sizes["dict"],
+        ))
+
+
+if __name__ == "__main__":
+    main()
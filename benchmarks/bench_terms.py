@@ -0,0 +1,74 @@
+"""
+Benchmark of the memory and the throughput of `terms` fields
+with plain lists and with compact arrays of integers.
+
+    python -m benchmarks.bench_terms [sizes ...]
+"""
+import sys
+import timeit
+
+from elasticsearch_query_builder import ElasticsearchQueryBuilder, fields
+
+
+class ListBuilder(ElasticsearchQueryBuilder):
+    ids = fields.TermsElasticField(field_name="ids")
+
+    __slots__ = ()
+
+
+class CompactBuilder(ElasticsearchQueryBuilder):
+    ids = fields.TermsElasticField(field_name="ids", input_type=int)
+
+    __slots__ = ()
+
+
+def retained_bytes(value) -> int:
+    """
+    Size of the normalized value together with its elements.
+    """
+    if isinstance(value, list):
+        return sys.getsizeof(value) + sum(
+            sys.getsizeof(item) for item in value
+        )
+    return sys.getsizeof(value)
+
+
+def run(size: int, number: int = 0):
+    number = number or max(1, 200000 // size)
+    inputs = {
+        # Numeric ids as they come from the query string
+        # and from the parsed JSON body.
+        "str": [str(i * 7919) for i in range(size)],
+        "int": [i * 7919 for i in range(size)],
+    }
+    result = {}
+    for input_name, values in inputs.items():
+        for name, cls in (
+            ("list", ListBuilder),
+            ("compact", CompactBuilder),
+        ):
+            key = "%s_%s_" % (input_name, name)
+            builder = cls({"ids": values})
+            builder._normalize_params()
+            result[key + "bytes"] = retained_bytes(builder._params["ids"])
+            result[key + "query_us"] = timeit.timeit(
+                lambda: cls({"ids": values}).query,
+                number=number
+            ) / number * 1e6
+            result[key + "query_bytes_us"] = timeit.timeit(
+                lambda: cls({"ids": values}).query_bytes(),
+                number=number
+            ) / number * 1e6
+    return result
+
+
+def main(argv=None):
+    sizes = [int(size) for size in (argv or sys.argv[1:])]
+    for size in sizes or (1000, 10000, 100000):
+        print("%s values" % size)
+        for name, value in run(size).items():
+            print("  %-32s %12.1f" % (name, value))
+
+
+if __name__ == "__main__":
+    main()
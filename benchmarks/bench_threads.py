@@ -0,0 +1,87 @@
+"""
+Throughput of building queries from several threads.
+
+Every thread builds queries with the same builder class and checks that
+`exists` clauses are placed under the expected logic operator.
+
+    python -m benchmarks.bench_threads
+"""
+import threading
+import time
+
+from elasticsearch_query_builder import ElasticsearchQueryBuilder, fields
+
+
+class Builder(ElasticsearchQueryBuilder):
+    has_reviews = fields.ExistsElasticField(
+        field_name="reviews"
+    )
+    category = fields.TermElasticField(
+        input_type=str,
+        field_name="category"
+    )
+    author = fields.NestedElasticField(
+        path="authors",
+        child=fields.MatchElasticField(
+            input_type=str,
+            field_name="name"
+        )
+    )
+
+
+EXPECTED = {
+    "true": "must",
+    "false": "must_not",
+}
+
+
+def build(value: str, count: int, errors: list):
+    params = {"has_reviews": value, "category": "books", "author": "John"}
+    for _ in range(count):
+        query = Builder(dict(params)).query
+        clauses = query["query"]["bool"].get(EXPECTED[value], [])
+        if {"exists": {"field": "reviews"}} not in clauses:
+            errors.append(query)
+
+
+def run(count: int = 200000):
+    results = {}
+    for threads_count in (1, 2, 4, 8):
+        errors = []
+        threads = [
+            threading.Thread(
+                target=build,
+                args=(
+                    list(EXPECTED)[i % 2],
+                    count // threads_count,
+                    errors
+                )
+            )
+            for i in range(threads_count)
+        ]
+        started_at = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started_at
+        results[threads_count] = {
+            "throughput": count / elapsed,
+            "errors": len(errors),
+        }
+    return results
+
+
+def main():
+    for threads_count, result in run().items():
+        print(
+            "%d threads: %9.0f q/s, misplaced clauses: %d" % (
+                threads_count,
+                result["throughput"],
+                result["errors"],
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
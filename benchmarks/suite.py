@@ -0,0 +1,420 @@
+"""
+Benchmark cases of the suite.
+
+Every `bench_*` function prepares the data and returns a callable
+which is timed by the runner, see `python -m benchmarks --help`.
+"""
+import json
+from typing import Callable
+
+from elasticsearch_query_builder import ElasticsearchQueryBuilder, fields
+from elasticsearch_query_builder.cache import FragmentCache
+
+
+def make_builder(namespace: dict) -> type:
+    return type("BenchmarkBuilder", (ElasticsearchQueryBuilder,), namespace)
+
+
+def field_case(field, value) -> Callable[[], dict]:
+    cls = make_builder({"field": field})
+
+    def case():
+        return cls({"field": value}).query
+
+    return case
+
+
+def bench_field_term():
+    return field_case(
+        fields.TermElasticField(input_type=int, field_name="term"),
+        "1"
+    )
+
+
+def bench_field_terms():
+    return field_case(
+        fields.TermsElasticField(field_name="terms"),
+        ["1", "2", "3"]
+    )
+
+
+def bench_field_ids():
+    return field_case(
+        fields.IdsElasticField(),
+        ["1", "2", "3"]
+    )
+
+
+def bench_field_exists():
+    return field_case(
+        fields.ExistsElasticField(field_name="exists"),
+        "false"
+    )
+
+
+def bench_field_range():
+    return field_case(
+        fields.RangeElasticField(
+            input_type=float,
+            lookup_expr="gte",
+            field_name="range"
+        ),
+        "10.5"
+    )
+
+
+def bench_field_two_sided_range():
+    return field_case(
+        fields.TwoSidedRangeElasticField(input_type=int, field_name="range"),
+        ["10", "20"]
+    )
+
+
+def bench_builder_range_merge():
+    cls = make_builder({
+        "merge_ranges": True,
+        "price_min": fields.RangeElasticField(
+            input_type=int,
+            lookup_expr="gte",
+            field_name="price"
+        ),
+        "price_max": fields.RangeElasticField(
+            input_type=int,
+            lookup_expr="lte",
+            field_name="price"
+        ),
+    })
+
+    def case():
+        return cls({"price_min": "10", "price_max": "20"}).query
+
+    return case
+
+
+def bench_field_match():
+    return field_case(
+        fields.MatchElasticField(
+            input_type=str,
+            operator="and",
+            fuzziness="AUTO",
+            field_name="match"
+        ),
+        "text"
+    )
+
+
+def bench_field_match_bool_prefix():
+    return field_case(
+        fields.MatchBoolPrefixElasticField(field_name="match_bool_prefix"),
+        "text"
+    )
+
+
+def bench_field_match_phrase():
+    return field_case(
+        fields.MatchPhraseElasticField(field_name="match_phrase"),
+        "text"
+    )
+
+
+def bench_field_match_phrase_prefix():
+    return field_case(
+        fields.MatchPhrasePrefixElasticField(
+            field_name="match_phrase_prefix"
+        ),
+        "text"
+    )
+
+
+def bench_field_multi_match():
+    return field_case(
+        fields.MultiMatchElasticField(
+            query_type="best_fields",
+            fields=["title", "description", "authors.name"],
+            tie_breaker=0.3
+        ),
+        "text"
+    )
+
+
+def bench_field_query_string():
+    return field_case(
+        fields.QueryStringElasticField(fields=["title", "description"]),
+        "text AND other"
+    )
+
+
+def bench_field_nested():
+    return field_case(
+        fields.NestedElasticField(
+            path="authors",
+            child=fields.MatchElasticField(input_type=str, field_name="name")
+        ),
+        "John"
+    )
+
+
+def bench_field_choice():
+    return field_case(
+        fields.ChoiceElasticField(
+            choices=["category_%s" % i for i in range(100)],
+            child=fields.TermElasticField(
+                input_type=str,
+                field_name="category"
+            )
+        ),
+        "category_99"
+    )
+
+
+def bench_field_choice_nested():
+    return field_case(
+        fields.ChoiceElasticField(
+            choices=["category_%s" % i for i in range(100)],
+            child=fields.NestedElasticField(
+                path="categories",
+                child=fields.MatchElasticField(
+                    input_type=str,
+                    field_name="name",
+                    operator="and"
+                )
+            )
+        ),
+        "category_99"
+    )
+
+
+def bench_field_choice_nested_cached():
+    return field_case(
+        fields.ChoiceElasticField(
+            choices=["category_%s" % i for i in range(100)],
+            child=fields.NestedElasticField(
+                path="categories",
+                child=fields.MatchElasticField(
+                    input_type=str,
+                    field_name="name",
+                    operator="and"
+                )
+            ),
+            cache_fragments=True
+        ),
+        "category_99"
+    )
+
+
+def bench_field_choice_dispatched():
+    return field_case(
+        fields.ChoiceElasticField(
+            choices={
+                "new": fields.TermElasticField(
+                    input_type=str,
+                    field_name="status"
+                ),
+                "featured": fields.TermElasticField(
+                    input_type=str,
+                    field_name="tags"
+                ),
+                "in_stock": (
+                    fields.TermElasticField(
+                        input_type=str,
+                        field_name="status"
+                    ),
+                    "available"
+                ),
+            }
+        ),
+        "new"
+    )
+
+
+def bench_field_nested_choice():
+    return field_case(
+        fields.NestedElasticField(
+            path="authors",
+            child=fields.ChoiceElasticField(
+                choices=["1", "2", "3"],
+                child=fields.TermElasticField(
+                    input_type=str,
+                    field_name="role"
+                )
+            )
+        ),
+        "3"
+    )
+
+
+def _many_fields_case(count: int):
+    cls = make_builder({
+        "field_%s" % i: fields.TermElasticField(
+            input_type=str,
+            field_name="field_%s" % i
+        )
+        for i in range(count)
+    })
+    params = {"field_%s" % i: "value" for i in range(count)}
+
+    def case():
+        return cls(dict(params)).query
+
+    return case
+
+
+def bench_builder_fields_10():
+    return _many_fields_case(10)
+
+
+def bench_builder_fields_100():
+    return _many_fields_case(100)
+
+
+def _hooks_builder(optimized: bool):
+    namespace = {
+        "field_%s" % i: fields.TermElasticField(
+            input_type=str,
+            field_name="field_%s" % i
+        )
+        for i in range(5)
+    }
+    namespace.update({
+        "get_additional_field_%s_queries" % i: (
+            lambda self: [{"term": {"tenant": "tenant"}}]
+        )
+        for i in range(5)
+    })
+    namespace["optimized"] = optimized
+    return make_builder(namespace)
+
+
+def bench_builder_hooks():
+    cls = _hooks_builder(optimized=False)
+    params = {"field_%s" % i: "value" for i in range(5)}
+
+    def case():
+        return cls(dict(params)).query
+
+    return case
+
+
+def bench_builder_hooks_optimized():
+    cls = _hooks_builder(optimized=True)
+    params = {"field_%s" % i: "value" for i in range(5)}
+
+    def case():
+        return cls(dict(params)).query
+
+    return case
+
+
+def _hot_fields_builder(cached: bool):
+    def make_cache():
+        return FragmentCache(maxsize=128) if cached else None
+
+    return make_builder({
+        "status": fields.TermElasticField(
+            input_type=str,
+            field_name="status",
+            fragment_cache=make_cache()
+        ),
+        "category": fields.NestedElasticField(
+            path="categories",
+            child=fields.MatchElasticField(
+                input_type=str,
+                operator="and",
+                field_name="name"
+            ),
+            fragment_cache=make_cache()
+        ),
+        "search": fields.MultiMatchElasticField(
+            query_type="best_fields",
+            fields=["title", "description"]
+        ),
+    })
+
+
+def _hot_fields_case(cached: bool):
+    cls = _hot_fields_builder(cached)
+    counter = iter(range(10 ** 9))
+
+    def case():
+        # Whole-query cache would miss on the unique search.
+        return cls({
+            "status": "active",
+            "category": "books",
+            "search": "text %s" % next(counter),
+        }).query
+
+    return case
+
+
+def bench_builder_hot_fields():
+    return _hot_fields_case(cached=False)
+
+
+def bench_builder_hot_fields_cached():
+    return _hot_fields_case(cached=True)
+
+
+def bench_terms_10000():
+    return field_case(
+        fields.TermsElasticField(field_name="terms"),
+        list(range(10000))
+    )
+
+
+def bench_ids_10000():
+    return field_case(
+        fields.IdsElasticField(),
+        [str(i) for i in range(10000)]
+    )
+
+
+def _serialization_builder():
+    return make_builder({
+        "search": fields.MultiMatchElasticField(
+            query_type="best_fields",
+            fields=["title", "description"]
+        ),
+        "category": fields.TermElasticField(
+            input_type=str,
+            field_name="category"
+        ),
+        "tags": fields.TermsElasticField(field_name="tags"),
+        "author": fields.NestedElasticField(
+            path="authors",
+            child=fields.MatchElasticField(input_type=str, field_name="name")
+        ),
+    })
+
+
+_serialization_params = {
+    "search": "text",
+    "category": "books",
+    "tags": ["new", "popular"],
+    "author": "John",
+}
+
+
+def bench_serialization_json_dumps():
+    cls = _serialization_builder()
+
+    def case():
+        return json.dumps(cls(dict(_serialization_params)).query)
+
+    return case
+
+
+def bench_serialization_query_bytes():
+    cls = _serialization_builder()
+
+    def case():
+        return cls(dict(_serialization_params)).query_bytes()
+
+    return case
+
+
+def get_cases() -> dict:
+    return {
+        name[len("bench_"):]: value
+        for name, value in globals().items()
+        if name.startswith("bench_") and callable(value)
+    }
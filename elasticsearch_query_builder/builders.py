@@ -1,15 +1,233 @@
-from typing import Optional, Any, Dict
+import asyncio
+import inspect
+import json
+from abc import ABCMeta
+from itertools import islice
+from time import perf_counter
+from types import MappingProxyType
+from typing import (
+    Optional,
+    Any,
+    Dict,
+    FrozenSet,
+    Mapping,
+    Tuple,
+    Hashable,
+    Iterable,
+    Iterator,
+    Callable,
+    NamedTuple,
+    Union,
+    List
+)
 
-from elasticsearch_query_builder.fields.abstract import AbstractElasticField
+from elasticsearch_query_builder.cache import CacheInfo, QueryCache, freeze
+from elasticsearch_query_builder.compiler import (
+    CompiledQuery,
+    compile_query_builder
+)
+from elasticsearch_query_builder.fields.abstract import (
+    AbstractElasticField,
+    FieldInterface,
+    invalid_input_error
+)
+from elasticsearch_query_builder.observers import QueryBuilderObserver
+from elasticsearch_query_builder.optimizer import optimize_query
 
 
-class BaseQueryBuilder:
+# Class attributes which the built queries depend on, besides
+# the fields and their `get_additional_*_queries` hooks.
+_query_settings = frozenset((
+    "filter_context",
+    "optimized",
+    "merge_ranges",
+    "max_terms_count",
+))
+
+
+class QueryBuilderMeta(ABCMeta):
+    """
+    Metaclass collecting declared fields into a per-class registry.
+
+    The registry is rebuilt when a field is set or deleted on the class
+    or its parents, so fields assigned after the class is created
+    are also taken into account. Generated code and cached queries
+    are dropped when the fields, hooks or settings of the query change.
+    """
+
+    def __init__(cls, name, bases, namespace, **kwargs):
+        super().__init__(name, bases, namespace, **kwargs)
+        type.__setattr__(cls, "_compiled_query", None)
+        cls._collect_declared_fields()
+
+    def __setattr__(cls, name, value):
+        changed = (
+            cls._affects_query(name, value)
+            or cls._affects_query(name, getattr(cls, name, None))
+        )
+        super().__setattr__(name, value)
+        if changed:
+            cls._refresh_declared_fields()
+
+    def __delattr__(cls, name):
+        changed = cls._affects_query(name, cls.__dict__.get(name))
+        super().__delattr__(name)
+        if changed:
+            cls._refresh_declared_fields()
+
+    @staticmethod
+    def _affects_query(name: str, value) -> bool:
+        return (
+            isinstance(value, FieldInterface)
+            or name in _query_settings
+            or name.startswith("get_additional_")
+        )
+
+    def _collect_declared_fields(cls):
+        fields = {}
+        seen = set()
+        for klass in cls.__mro__:
+            for name, value in vars(klass).items():
+                if name in seen:
+                    continue
+                seen.add(name)
+                if isinstance(value, FieldInterface):
+                    fields[name] = value
+
+        type.__setattr__(cls, "_declared_fields", MappingProxyType(fields))
+        # Params of the lookup fields may be resolved by the hooks.
+        type.__setattr__(cls, "_lookup_fields", frozenset(
+            name
+            for name, field in fields.items()
+            if getattr(field, "lookup", None) is not None
+        ))
+
+    def _refresh_declared_fields(cls):
+        type.__setattr__(cls, "_compiled_query", None)
+        query_cache = getattr(cls, "query_cache", None)
+        if query_cache is not None:
+            query_cache.clear()
+
+        cls._collect_declared_fields()
+        for subclass in cls.__subclasses__():
+            subclass._refresh_declared_fields()
+
+
+# Queries which don't affect the scores.
+_filter_query_types = frozenset((
+    "term",
+    "terms",
+    "range",
+    "exists",
+    "ids",
+    "constant_score",
+))
+
+
+def _are_filter_queries(queries) -> bool:
+    if not queries:
+        return True
+    if not isinstance(queries, list):
+        return False
+    return all(
+        isinstance(query, dict)
+        and len(query) == 1
+        and next(iter(query)) in _filter_query_types
+        for query in queries
+    )
+
+
+# Range clauses on the same field are merged where all of them must match.
+_range_merge_operators = frozenset(("must", "filter"))
+_range_lower_bounds = frozenset(("gt", "gte"))
+_range_upper_bounds = frozenset(("lt", "lte"))
+
+
+def _get_range_bounds(bounds: dict) -> set:
+    result = set()
+    for key in bounds:
+        if key in _range_lower_bounds:
+            result.add("lower")
+        elif key in _range_upper_bounds:
+            result.add("upper")
+    return result
+
+
+def _get_range_options(bounds: dict) -> dict:
+    return {
+        key: value
+        for key, value in bounds.items()
+        if key not in _range_lower_bounds and key not in _range_upper_bounds
+    }
+
+
+def _merge_range_query(clauses: list, range_query: dict) -> bool:
+    """
+    Merge the range query into the range clause on the same field
+    with the other bound, the clauses are not mutated.
+    """
+    body = range_query["range"]
+    if len(range_query) != 1 or not isinstance(body, dict) or len(body) != 1:
+        return False
+    (field_name, bounds), = body.items()
+    if not isinstance(bounds, dict):
+        return False
+    bound_names = _get_range_bounds(bounds)
+
+    for position, clause in enumerate(clauses):
+        other_body = clause.get("range") if len(clause) == 1 else None
+        if (
+            not isinstance(other_body, dict)
+            or len(other_body) != 1
+            or not isinstance(other_body.get(field_name), dict)
+        ):
+            continue
+
+        other_bounds = other_body[field_name]
+        if bound_names & _get_range_bounds(other_bounds):
+            continue
+        # Other parameters, e.g. format, must be the same.
+        if _get_range_options(bounds) != _get_range_options(other_bounds):
+            continue
+
+        clauses[position] = {
+            "range": {
+                field_name: {**other_bounds, **bounds},
+            }
+        }
+        return True
+    return False
+
+
+class BatchError(NamedTuple):
+    """
+    Failed item of `build_many` with the `collect` error policy.
+    """
+    index: int
+    params: Optional[dict]
+    error: Exception
+
+
+class BaseQueryBuilder(metaclass=QueryBuilderMeta):
+    __slots__ = (
+        "_fields",
+        "_params",
+        "_normalized",
+        "_query",
+    )
+
+    _declared_fields: Mapping[str, AbstractElasticField]
+    _lookup_fields: FrozenSet[str]
+
+    # Observer of the building stages, see `observers` module.
+    observer: Optional[QueryBuilderObserver] = None
 
     def __init__(self,
                  params: Optional[dict] = None):
         params = self._processing_params(params)
         self._fields, self._params = self._assign_fields(params)
 
+        self._normalized = False
         self._query = None
 
     def _processing_params(self, params: Optional[dict]) -> dict:
@@ -20,16 +238,16 @@ class BaseQueryBuilder:
     def _assign_fields(self, params: dict):
         fields = {}
         validated_params = {}
+        declared_fields = self._declared_fields
 
         for field_query_name, field_value in params.items():
-            if not hasattr(self, field_query_name):
+            field = declared_fields.get(field_query_name)
+            if field is None:
                 # Field not found.
                 continue
-
-            field = getattr(self, field_query_name)
             self._assert_instance_field(field)
 
-            fields[field_query_name] = getattr(self, field_query_name)
+            fields[field_query_name] = field
             validated_params[field_query_name] = field_value
 
         return (
@@ -48,21 +266,196 @@ class BaseQueryBuilder:
                     params[field_query_name],
                     field_query_name
                 )
-            except ValueError:
-                raise ValueError("Invalid input for `%s`" % field_query_name)
+            except ValueError as e:
+                raise invalid_input_error(
+                    field_query_name,
+                    field,
+                    e
+                ) from e
+
+    def _observe_normalize_input(self,
+                                 params: Dict[str, Any],
+                                 fields: Dict[str, Any]):
+        observer = self.observer
+        for field_query_name in params.keys():
+            field = fields[field_query_name]
+            observer.on_start(self, "normalize", field_query_name)
+            started_at = perf_counter()
+            try:
+                params[field_query_name] = field.normalize_input(
+                    params[field_query_name],
+                    field_query_name
+                )
+            except ValueError as e:
+                raise invalid_input_error(
+                    field_query_name,
+                    field,
+                    e
+                ) from e
+            finally:
+                observer.on_end(
+                    self,
+                    "normalize",
+                    field_query_name,
+                    perf_counter() - started_at
+                )
+
+    def _resolve_lookups(self, params: Dict[str, Any]):
+        """
+        Resolve the params of the lookup fields, e.g. `terms` with
+        `lookup`, by `get_<field>_lookup` hooks, before they're normalized.
+        """
+        for field_query_name in self._lookup_fields.intersection(params):
+            func_name = "get_%s_lookup" % field_query_name
+            if hasattr(self, func_name):
+                params[field_query_name] = getattr(self, func_name)(
+                    params[field_query_name]
+                )
+
+    def _normalize_params(self):
+        if not self._normalized:
+            if self._lookup_fields:
+                self._resolve_lookups(self._params)
+            if self.observer is None:
+                self._normalize_input(self._params, self._fields)
+            else:
+                self._observe_normalize_input(self._params, self._fields)
+            self._normalized = True
 
     @property
     def query(self):
         if self._query is None:
-            self._normalize_input(self._params, self._fields)
-            self._query = self._get_query()
+            self._normalize_params()
+            self._query = self._build_query()
         return self._query
 
+    def _build_query(self):
+        return self._get_query()
+
     def _get_query(self):
         raise NotImplementedError
 
+    @classmethod
+    def build_many(cls,
+                   params_iterable: Iterable[Optional[dict]],
+                   errors: str = "raise",
+                   lazy: bool = False,
+                   chunk_size: int = 1000
+                   ) -> Union[List[Any], Iterator[Any]]:
+        """
+        Build queries for many params.
+
+        Params are processed by chunks, the values of every field
+        in a chunk are normalized together.
+
+        :param errors: policy for the items that failed to build:
+            `raise` the error, `skip` the item or `collect` it
+            as `BatchError` in place of the query.
+        :param lazy: return a generator instead of a list.
+        """
+        assert errors in ("raise", "skip", "collect"), \
+            "Unknown errors policy: %s" % errors
+        assert chunk_size > 0, "You must set positive chunk size"
+
+        queries = cls._build_many(iter(params_iterable), errors, chunk_size)
+        if lazy:
+            return queries
+        return list(queries)
+
+    @classmethod
+    def _get_normalizers(cls) -> Dict[str, Callable[[Any, str], Any]]:
+        return {
+            field_query_name: field.normalize_input
+            for field_query_name, field in cls._declared_fields.items()
+        }
+
+    @classmethod
+    def _build_many(cls,
+                    params_iterator: Iterator[Optional[dict]],
+                    errors: str,
+                    chunk_size: int) -> Iterator[Any]:
+        normalizers = cls._get_normalizers()
+        index = 0
+
+        while True:
+            chunk = list(islice(params_iterator, chunk_size))
+            if not chunk:
+                return
+
+            builders = []
+            failures = {}
+            columns = {}
+            for position, params in enumerate(chunk):
+                builder = cls()
+                builder._fields, builder._params = builder._assign_fields(
+                    builder._processing_params(params)
+                )
+                builders.append(builder)
+                for field_query_name in builder._params:
+                    columns.setdefault(field_query_name, []).append(position)
+
+            if cls.observer is not None:
+                # Normalized one by one with the events of the observer.
+                columns = {}
+                for position, builder in enumerate(builders):
+                    try:
+                        builder._normalize_params()
+                    except ValueError as e:
+                        failures[position] = e
+            elif cls._lookup_fields:
+                for position, builder in enumerate(builders):
+                    try:
+                        builder._resolve_lookups(builder._params)
+                    except ValueError as e:
+                        failures[position] = e
+
+            for field_query_name, positions in columns.items():
+                normalize = normalizers[field_query_name]
+                for position in positions:
+                    if position in failures:
+                        continue
+                    params = builders[position]._params
+                    try:
+                        params[field_query_name] = normalize(
+                            params[field_query_name],
+                            field_query_name
+                        )
+                    except ValueError as e:
+                        failures[position] = invalid_input_error(
+                            field_query_name,
+                            cls._declared_fields[field_query_name],
+                            e
+                        )
+
+            for position, builder in enumerate(builders):
+                error = failures.get(position)
+                if error is None:
+                    builder._normalized = True
+                    # Built the same way as `query`, e.g. with the cache.
+                    try:
+                        query = builder.query
+                    except Exception as e:
+                        error = e
+
+                if error is None:
+                    yield query
+                elif errors == "raise":
+                    raise error
+                elif errors == "collect":
+                    yield BatchError(
+                        index=index + position,
+                        params=chunk[position],
+                        error=error
+                    )
+
+            index += len(chunk)
+
 
 class ElasticsearchQueryBuilder(BaseQueryBuilder):
+    __slots__ = (
+        "_additional_queries",
+    )
+
     _possible_logic_operators = (
         "must",
         "filter",
@@ -70,44 +463,419 @@ class ElasticsearchQueryBuilder(BaseQueryBuilder):
         "must_not"
     )
 
+    # Build the query with a function generated for the builder class.
+    # Hooks and logic operators of the fields must not be changed after
+    # the first query is built, otherwise `compile` must be called again.
+    compiled = False
+
+    # Place the `must` clauses of the non-scoring fields, e.g. term
+    # or range, in the filter context, unless the logic operator
+    # of the field is explicit. The query without scoring clauses
+    # is wrapped in `constant_score`.
+    filter_context = False
+
+    # Rewrite the built query with `optimize_query`,
+    # which keeps the matched documents but may change the scores.
+    optimized = False
+
+    # Merge the `range` clauses on the same field with the opposite
+    # bounds into one in `must` and `filter`. Fields are assumed to be
+    # single-valued: the bounds of separate clauses may be matched
+    # by different values of a multi-valued field, e.g. `[1, 100]`
+    # matches `gte: 50` and `lte: 10`, but not both in one clause.
+    merge_ranges = False
+    # Limit of the values of `terms` clauses merged by the optimizer,
+    # `index.max_terms_count` of the index. Limits of the declared
+    # `terms` and `ids` fields are applied as well.
+    max_terms_count: Optional[int] = None
+
+    # Cache of built queries, keyed on the normalized params.
+    query_cache: Optional[QueryCache] = None
+    # Names of the fields whose `get_additional_*_queries` hooks
+    # don't depend on the builder instance.
+    # Their results are not included in the cache key.
+    query_cache_excluded_hooks: Tuple[str, ...] = ()
+
+    def __init__(self,
+                 params: Optional[dict] = None):
+        super().__init__(params)
+        self._additional_queries = None
+
     def _assert_instance_field(self, field: Any):
         assert isinstance(field, AbstractElasticField)
 
+    @classmethod
+    def compile(cls) -> CompiledQuery:
+        """
+        Generate and cache the build functions of the builder class.
+        """
+        compiled_query = compile_query_builder(cls)
+        type.__setattr__(cls, "_compiled_query", compiled_query)
+        return compiled_query
+
+    @classmethod
+    def _get_compiled_query(cls) -> CompiledQuery:
+        compiled_query = cls._compiled_query
+        if compiled_query is None:
+            compiled_query = cls.compile()
+        return compiled_query
+
+    @classmethod
+    def fragment_cache_info(cls) -> Dict[str, CacheInfo]:
+        """
+        Hits and misses of the fragment caches of the declared fields.
+        """
+        result = {}
+        for field_query_name, field in cls._declared_fields.items():
+            fragment_cache = getattr(field, "fragment_cache", None)
+            if fragment_cache is not None:
+                result[field_query_name] = fragment_cache.info()
+        return result
+
+    @classmethod
+    def _get_max_terms_count(cls) -> Optional[int]:
+        limits = [
+            field.max_terms_count
+            for field in cls._declared_fields.values()
+            if getattr(field, "max_terms_count", None) is not None
+        ]
+        if cls.max_terms_count is not None:
+            limits.append(cls.max_terms_count)
+        return min(limits, default=None)
+
+    @property
+    def query(self):
+        if self._query is None and self.query_cache is not None:
+            self._normalize_params()
+
+            key = self._get_query_cache_key()
+            if key is None:
+                self._query = self._build_query()
+            else:
+                query = self.query_cache.get(key)
+                if query is None:
+                    query = self._build_query()
+                    self.query_cache.set(key, query)
+                self._query = query
+        return super().query
+
+    async def aquery(self):
+        """
+        Build the query, awaiting `get_additional_*_queries` hooks.
+
+        Hooks may be coroutine functions, hooks of all the params
+        are awaited concurrently before the query is built.
+        """
+        if self._query is None:
+            await self._resolve_additional_queries()
+        return self.query
+
+    async def _resolve_additional_queries(self):
+        additional_queries = {}
+        awaitables = {}
+        for field_query_name in self._params:
+            queries = self._get_additional_queries_by_field_name(
+                field_query_name
+            )
+            if inspect.isawaitable(queries):
+                awaitables[field_query_name] = queries
+            else:
+                additional_queries[field_query_name] = queries
+
+        if awaitables:
+            results = await asyncio.gather(*awaitables.values())
+            additional_queries.update(zip(awaitables, results))
+
+        self._additional_queries = additional_queries
+
+    def query_bytes(self) -> bytes:
+        """
+        Query encoded to UTF-8 JSON, the same as `json.dumps(self.query)`.
+
+        Fields encode their queries directly, without building them.
+        """
+        if (
+            self._query is not None
+            or self.query_cache is not None
+            or self.optimized
+            # Range clauses are merged by the built query.
+            or self.merge_ranges
+            or self._get_query.__func__
+            is not ElasticsearchQueryBuilder._get_query
+            or self._create_common_query.__func__
+            is not ElasticsearchQueryBuilder._create_common_query
+        ):
+            return json.dumps(self.query).encode("utf-8")
+
+        self._normalize_params()
+        clauses = self._get_clauses(encode=True)
+        if self.observer is None:
+            encoded_query = self._encode_common_query(clauses)
+        else:
+            encoded_query = self._observe_common_query(
+                self._encode_common_query,
+                clauses
+            )
+        return encoded_query.encode("utf-8")
+
+    @classmethod
+    def iter_msearch(cls,
+                     searches: Iterable[Tuple[Any, Optional[dict]]],
+                     max_cached_headers: int = 1024) -> Iterator[bytes]:
+        """
+        Lazily encode the `_msearch` body in NDJSON format.
+
+        Every item of `searches` is a pair of a header (dict, already
+        encoded str/bytes or None) and params of the builder,
+        a chunk with the header line and the query line is yielded for it.
+        Encoded headers are reused while they repeat.
+        """
+        encoded_headers = {}
+        for header, params in searches:
+            if isinstance(header, bytes):
+                encoded_header = header
+            elif isinstance(header, str):
+                encoded_header = header.encode("utf-8")
+            else:
+                key = freeze(header)
+                encoded_header = encoded_headers.get(key)
+                if encoded_header is None:
+                    if len(encoded_headers) >= max_cached_headers:
+                        encoded_headers.clear()
+                    encoded_header = json.dumps(
+                        header if header is not None else {}
+                    ).encode("utf-8")
+                    encoded_headers[key] = encoded_header
+
+            yield b"".join((
+                encoded_header,
+                b"\n",
+                cls(params).query_bytes(),
+                b"\n"
+            ))
+
+    @classmethod
+    def write_msearch(cls,
+                      searches: Iterable[Tuple[Any, Optional[dict]]],
+                      buffer,
+                      max_cached_headers: int = 1024) -> int:
+        """
+        Write the `_msearch` body to the binary buffer.
+
+        Returns the number of written searches.
+        """
+        count = 0
+        for chunk in cls.iter_msearch(searches, max_cached_headers):
+            buffer.write(chunk)
+            count += 1
+        return count
+
+    def _get_query_cache_key(self) -> Optional[Hashable]:
+        key = [type(self)]
+        additional_queries = {}
+
+        for field_query_name, normalized_value in self._params.items():
+            key.append((field_query_name, freeze(normalized_value)))
+            if field_query_name in self.query_cache_excluded_hooks:
+                continue
+
+            additional_queries[field_query_name] = (
+                self._get_additional_queries_by_field_name(field_query_name)
+            )
+            key.append(freeze(additional_queries[field_query_name]))
+
+        # Don't call the hooks again while building the query.
+        if self._additional_queries is None:
+            self._additional_queries = additional_queries
+        else:
+            self._additional_queries.update(additional_queries)
+
+        key = tuple(key)
+        try:
+            hash(key)
+        except TypeError:
+            # Params can't be used as a key.
+            return None
+        return key
+
     def _get_additional_queries_by_field_name(self, field_name: str):
+        if (
+            self._additional_queries is not None
+            and field_name in self._additional_queries
+        ):
+            return self._additional_queries[field_name]
+
         func_name = "get_additional_%s_queries" % field_name
         if hasattr(self, func_name):
             return getattr(self, func_name)()
         return None
 
+    def _build_query(self):
+        query = self._get_query()
+        if not self.optimized:
+            return query
+        max_terms_count = self._get_max_terms_count()
+        if self.observer is None:
+            return optimize_query(query, max_terms_count=max_terms_count)
+
+        self.observer.on_start(self, "optimize", None)
+        started_at = perf_counter()
+        query = optimize_query(query, max_terms_count=max_terms_count)
+        self.observer.on_end(
+            self,
+            "optimize",
+            None,
+            perf_counter() - started_at
+        )
+        return query
+
     def _get_query(self):
-        query = {}
+        if self.observer is None:
+            if self.compiled:
+                return self._get_compiled_query().build(self, self._params)
+            return self._create_common_query(self._get_clauses())
 
+        return self._observe_common_query(
+            self._create_common_query,
+            self._get_clauses()
+        )
+
+    def _get_clauses(self, encode: bool = False) -> dict:
+        """
+        Queries of the fields by the logic operator,
+        encoded to JSON if `encode` is set.
+        """
+        if self.observer is not None:
+            return self._observe_get_clauses(encode)
+
+        add_field_query = (
+            self._add_encoded_query if encode else self._add_field_query
+        )
+        clauses = {}
         for field_query_name, normalized_value in self._params.items():
             field = self._fields[field_query_name]
-
             additional_queries = self._get_additional_queries_by_field_name(
                 field_query_name
             )
-            field_query = field.get_query(
+            logic_operator, field_query = (
+                field.encode_clause if encode else field.get_clause
+            )(
                 normalized_value,
                 field_query_name,
                 additional_queries=additional_queries
             )
-            if not field_query:
-                continue
+            if self.filter_context:
+                logic_operator = self._get_context_logic_operator(
+                    field,
+                    logic_operator,
+                    additional_queries
+                )
+            add_field_query(clauses, logic_operator, field_query)
+        return clauses
 
-            if query.get(field.logic_operator) is None:
-                assert field.logic_operator in self._possible_logic_operators
-                query[field.logic_operator] = []
+    def _observe_get_clauses(self, encode: bool = False) -> dict:
+        observer = self.observer
+        additional_queries = {}
+        for field_query_name in self._params:
+            observer.on_start(self, "hook", field_query_name)
+            started_at = perf_counter()
+            additional_queries[field_query_name] = (
+                self._get_additional_queries_by_field_name(field_query_name)
+            )
+            observer.on_end(
+                self,
+                "hook",
+                field_query_name,
+                perf_counter() - started_at
+            )
 
-            if isinstance(field_query, list):
-                query[field.logic_operator].extend(field_query)
-            elif isinstance(field_query, dict):
-                query[field.logic_operator].append(field_query)
+        add_field_query = (
+            self._add_encoded_query if encode else self._add_field_query
+        )
+        clauses = {}
+        for field_query_name, normalized_value in self._params.items():
+            observer.on_start(self, "build", field_query_name)
+            started_at = perf_counter()
+            field = self._fields[field_query_name]
+            logic_operator, field_query = (
+                field.encode_clause if encode else field.get_clause
+            )(
+                normalized_value,
+                field_query_name,
+                additional_queries=additional_queries[field_query_name]
+            )
+            if self.filter_context:
+                logic_operator = self._get_context_logic_operator(
+                    field,
+                    logic_operator,
+                    additional_queries[field_query_name]
+                )
+            elapsed = perf_counter() - started_at
+            if encode:
+                size = len(field_query)
             else:
-                raise NotImplementedError
+                size = len(json.dumps(field_query)) if field_query else 0
+            observer.on_end(
+                self,
+                "build",
+                field_query_name,
+                elapsed,
+                size=size
+            )
+            add_field_query(clauses, logic_operator, field_query)
+        return clauses
+
+    def _observe_common_query(self, create_common_query, clauses: dict):
+        observer = self.observer
+        observer.on_start(self, "common", None)
+        started_at = perf_counter()
+        query = create_common_query(clauses)
+        observer.on_end(self, "common", None, perf_counter() - started_at)
+        return query
+
+    @staticmethod
+    def _get_context_logic_operator(field: AbstractElasticField,
+                                    logic_operator: str,
+                                    additional_queries) -> str:
+        """
+        Logic operator of the field query in the filter context mode.
+        """
+        if (
+            logic_operator == "must"
+            and field.filterable
+            and _are_filter_queries(additional_queries)
+        ):
+            return "filter"
+        return logic_operator
+
+    @classmethod
+    def _is_constant_score(cls, query: dict) -> bool:
+        return cls.filter_context and not (
+            query.get("must") or query.get("should")
+        )
+
+    def _add_field_query(self, query: dict, logic_operator: str, field_query):
+        if not field_query:
+            return
 
-        return self._create_common_query(query)
+        clauses = query.get(logic_operator)
+        if clauses is None:
+            assert logic_operator in self._possible_logic_operators
+            clauses = query[logic_operator] = []
+
+        if isinstance(field_query, dict):
+            if (
+                self.merge_ranges
+                and "range" in field_query
+                and logic_operator in _range_merge_operators
+                and _merge_range_query(clauses, field_query)
+            ):
+                return
+            clauses.append(field_query)
+        elif isinstance(field_query, list):
+            clauses.extend(field_query)
+        else:
+            raise NotImplementedError
 
     def _create_common_query(self, query):
         """
@@ -115,11 +883,43 @@ class ElasticsearchQueryBuilder(BaseQueryBuilder):
         """
         if not query:
             return {}
-        return {
-            "query": {
-                "bool": {
-                    key: value
-                    for key, value in query.items()
-                }
+        bool_query = {
+            "bool": {
+                key: value
+                for key, value in query.items()
             }
         }
+        if self._is_constant_score(query):
+            return {"query": {"constant_score": {"filter": bool_query}}}
+        return {"query": bool_query}
+
+    def _add_encoded_query(self,
+                           clauses: dict,
+                           logic_operator: str,
+                           encoded_query: str):
+        if not encoded_query:
+            return
+
+        if clauses.get(logic_operator) is None:
+            assert logic_operator in self._possible_logic_operators
+            clauses[logic_operator] = []
+        clauses[logic_operator].append(encoded_query)
+
+    def _encode_common_query(self, clauses: dict) -> str:
+        """
+        Common object query encoded from the encoded clauses.
+        """
+        if not clauses:
+            return "{}"
+        encoded_bool = '{"bool": {%s}}' % ", ".join(
+            "%s: [%s]" % (
+                json.dumps(logic_operator),
+                ", ".join(encoded_queries)
+            )
+            for logic_operator, encoded_queries in clauses.items()
+        )
+        if self._is_constant_score(clauses):
+            encoded_bool = '{"constant_score": {"filter": %s}}' % (
+                encoded_bool
+            )
+        return '{"query": %s}' % encoded_bool
@@ -0,0 +1,231 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+from .compact import compact_key, compact_types
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+_scalar_types = frozenset((str, int, float, bool, type(None)))
+
+
+def freeze(value: Any) -> Hashable:
+    """
+    Convert JSON-like value to a hashable key.
+
+    Scalars are tagged with their type,
+    so that `1`, `1.0` and `True` produce different keys.
+    """
+    value_type = value.__class__
+    if value_type in _scalar_types:
+        return value_type, value
+    elif isinstance(value, dict):
+        return dict, tuple(
+            (key, freeze(item))
+            for key, item in value.items()
+        )
+    elif isinstance(value, (list, tuple)):
+        return list, tuple(freeze(item) for item in value)
+    elif isinstance(value, compact_types):
+        return compact_key(value)
+    return value_type, value
+
+
+def copy_query(value: Any) -> Any:
+    """
+    Copy dicts and lists of the query, scalars are shared.
+    """
+    if isinstance(value, dict):
+        return {key: copy_query(item) for key, item in value.items()}
+    elif isinstance(value, list):
+        return [copy_query(item) for item in value]
+    return value
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError("Shared query fragment can't be changed")
+
+
+class FrozenDict(dict):
+    """
+    Dict of a query fragment shared between the built queries.
+    """
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+class FrozenList(list):
+    """
+    List of a query fragment shared between the built queries.
+    """
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = _read_only
+    clear = sort = reverse = _read_only
+
+    def __reduce__(self):
+        return FrozenList, (list(self),)
+
+
+def freeze_query(value: Any) -> Any:
+    """
+    Read-only copy of the query, which is still a JSON-like value
+    equal to the original one. Use `copy_query` to change it.
+    """
+    if isinstance(value, dict):
+        return FrozenDict(
+            (key, freeze_query(item))
+            for key, item in value.items()
+        )
+    elif isinstance(value, list):
+        return FrozenList(freeze_query(item) for item in value)
+    return value
+
+
+class QueryCache:
+    """
+    Bounded LRU cache of built queries with an optional TTL.
+
+    Queries are copied when stored and when returned,
+    so callers can't change the cached entries.
+    """
+
+    def __init__(self,
+                 maxsize: int = 1024,
+                 ttl: Optional[float] = None,
+                 timer: Callable[[], float] = time.monotonic):
+        assert maxsize > 0, "You must set positive maxsize"
+
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._timer = timer
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            query, expires_at = entry
+            if expires_at is not None and expires_at <= self._timer():
+                del self._entries[key]
+                self._evictions += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+        return copy_query(query)
+
+    def set(self, key: Hashable, query: dict):
+        query = copy_query(query)
+        expires_at = None
+        if self._ttl is not None:
+            expires_at = self._timer() + self._ttl
+
+        with self._lock:
+            self._entries[key] = (query, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._entries),
+                maxsize=self._maxsize
+            )
+
+
+class FragmentCache:
+    """
+    Bounded LRU cache of the field queries.
+
+    Queries are frozen when stored and shared by the built queries,
+    so they can't be changed, use `copy_query` to change them.
+    The cache isn't locked, concurrent threads may build the same query
+    twice or miss a counter increment.
+    One cache may be shared by several fields, their queries are keyed
+    by the field too. Set a separate cache per field to get its hit rate.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        assert maxsize > 0, "You must set positive maxsize"
+
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        entries = self._entries
+        query = entries.get(key)
+        if query is None:
+            self._misses += 1
+            return None
+
+        try:
+            entries.move_to_end(key)
+        except KeyError:
+            # Evicted by another thread.
+            pass
+        self._hits += 1
+        return query
+
+    def set(self, key: Hashable, query) -> Any:
+        """
+        Store the frozen copy of the query and return it.
+        """
+        query = freeze_query(query)
+        entries = self._entries
+        entries[key] = query
+        while len(entries) > self._maxsize:
+            try:
+                entries.popitem(last=False)
+            except KeyError:
+                break
+            self._evictions += 1
+        return query
+
+    def clear(self):
+        self._entries.clear()
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            size=len(self._entries),
+            maxsize=self._maxsize
+        )
@@ -0,0 +1,175 @@
+"""
+Compact storage of the numeric values of `terms` and `ids` fields.
+
+Integers and floats are kept unboxed in `array.array`, or in NumPy arrays
+when NumPy is installed, from the normalization until the query
+is serialized.
+"""
+from array import array
+from collections import abc
+from typing import Any, Callable, Hashable, Optional
+
+from .converters import Converter, get_converter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Type codes of the arrays by the input type.
+_typecodes = {
+    int: "q",
+    float: "d",
+}
+
+if numpy is None:
+    compact_types = (array,)
+else:
+    compact_types = (array, numpy.ndarray)
+
+
+def _check_iterable(value):
+    if not isinstance(value, abc.Iterable) or isinstance(
+        value,
+        (str, bytes, dict)
+    ):
+        raise ValueError
+
+
+def _make_compact_converter(input_type: type,
+                            convert: Converter,
+                            strict: bool) -> Callable[[Any], Any]:
+    """
+    Converter of the iterable of values to the compact array
+    of the input type, every value is converted by `convert`.
+    """
+    typecode = _typecodes[input_type]
+
+    if numpy is not None:
+        dtype = numpy.dtype(typecode)
+
+        def convert_values(value):
+            if isinstance(value, numpy.ndarray) and value.dtype == dtype:
+                return value
+            _check_iterable(value)
+            try:
+                return numpy.fromiter(map(convert, value), dtype=dtype)
+            except (TypeError, OverflowError):
+                raise ValueError
+
+        return convert_values
+
+    def convert_values(value):
+        if isinstance(value, array) and value.typecode == typecode:
+            return value
+        _check_iterable(value)
+        if not strict and isinstance(value, (list, tuple)):
+            # Numbers are converted by the array at once.
+            try:
+                return array(typecode, value)
+            except (TypeError, OverflowError):
+                pass
+        try:
+            return array(typecode, map(convert, value))
+        except (TypeError, OverflowError):
+            raise ValueError
+
+    return convert_values
+
+
+def _make_list_converter(convert: Converter) -> Callable[[Any], list]:
+
+    def convert_values(value):
+        _check_iterable(value)
+        return list(map(convert, value))
+
+    return convert_values
+
+
+def _copy_list(value) -> list:
+    if isinstance(value, abc.Iterable):
+        return list(value)
+    raise ValueError
+
+
+def make_values_converter(input_type: Optional[type],
+                          strict: bool = False) -> Callable[[Any], Any]:
+    """
+    Converter of the iterable of values of the input type,
+    to the compact array for integers and floats, to the list otherwise.
+    Without the input type the values are copied to the list as they are.
+    """
+    if input_type is None:
+        return _copy_list
+
+    convert = get_converter(input_type, strict=strict)
+    if input_type in _typecodes:
+        return _make_compact_converter(input_type, convert, strict)
+    return _make_list_converter(convert)
+
+
+def _sort_key(value):
+    # Values of different types are ordered by the type name.
+    return type(value).__name__, value
+
+
+def _canonical_list(value: list, unique: bool, sort: bool) -> list:
+    try:
+        if unique:
+            # Equal values of different types, e.g. 1 and True, are kept.
+            value = list({
+                (type(item), item): item
+                for item in value
+            }.values())
+        if sort:
+            value = sorted(value, key=_sort_key)
+    except TypeError:
+        # Values are not hashable or not comparable.
+        raise ValueError
+    return value
+
+
+def canonical_values(value, unique: bool = False, sort: bool = False):
+    """
+    Values without duplicates in the order of the first occurrence,
+    sorted if `sort` is set, of the same kind as the given values.
+    """
+    if isinstance(value, array):
+        if unique and sort:
+            return array(value.typecode, sorted(set(value)))
+        elif unique:
+            return array(value.typecode, dict.fromkeys(value))
+        elif sort:
+            return array(value.typecode, sorted(value))
+        return value
+
+    if numpy is not None and isinstance(value, numpy.ndarray):
+        if unique and sort:
+            return numpy.unique(value)
+        elif unique:
+            index = numpy.unique(value, return_index=True)[1]
+            return value[numpy.sort(index)]
+        elif sort:
+            return numpy.sort(value)
+        return value
+
+    return _canonical_list(value, unique, sort)
+
+
+def to_list(value) -> list:
+    """
+    Values of the compact array as a list, other values as they are.
+    """
+    if isinstance(value, compact_types):
+        return value.tolist()
+    return value
+
+
+def compact_key(value) -> Hashable:
+    """
+    Hashable key of the compact array.
+    """
+    if isinstance(value, array):
+        return array, value.typecode, value.tobytes()
+    return type(value), value.dtype.str, value.shape, value.tobytes()
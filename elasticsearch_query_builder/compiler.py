@@ -0,0 +1,144 @@
+"""
+Compilation of builder classes into specialized build functions.
+
+The source of a build function is generated from the declared fields
+of a builder class and executed once. Hooks of the fields, the static
+logic operators and the filter context are resolved at compile time,
+the fragments are built by the fields themselves and added by
+the helpers of the builder, the same as for the interpreted builder.
+"""
+from typing import Any, Callable, NamedTuple
+
+from .fields.abstract import AbstractElasticField, ElasticField
+
+
+class CompiledQuery(NamedTuple):
+    build: Callable[[Any, dict], dict]
+
+
+class _Source:
+    """
+    Generated source with the namespace it is executed in.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.namespace = {}
+
+    def constant(self, value: Any) -> str:
+        if value is None or type(value) in (str, int, bool):
+            return repr(value)
+        name = "_c%d" % len(self.namespace)
+        self.namespace[name] = value
+        return name
+
+    def write(self, indent: int, *lines: str):
+        for line in lines:
+            self.lines.append("    " * indent + line)
+
+
+def _has_static_logic_operator(field: AbstractElasticField) -> bool:
+    """
+    Whether the logic operator of the field doesn't depend on the value
+    and the clause is the query of the field, e.g. without the cache.
+    """
+    field_class = type(field)
+    return (
+        getattr(field, "fragment_cache", None) is None
+        and field_class.get_clause in (
+            AbstractElasticField.get_clause,
+            ElasticField.get_clause,
+        )
+        and field_class.get_logic_operator
+        is AbstractElasticField.get_logic_operator
+    )
+
+
+def _emit_field(source: _Source,
+                builder_class: type,
+                index: int,
+                field_query_name: str,
+                field: AbstractElasticField):
+    has_hook = hasattr(
+        builder_class,
+        "get_additional_%s_queries" % field_query_name
+    )
+
+    source.write(0, "def build_%d(builder, value, query):" % index)
+    if has_hook:
+        source.write(
+            1,
+            "additional_queries = "
+            "builder._get_additional_queries_by_field_name(%r)"
+            % field_query_name,
+        )
+    else:
+        source.write(1, "additional_queries = None")
+
+    if _has_static_logic_operator(field):
+        assert field.logic_operator in builder_class._possible_logic_operators
+        source.write(
+            1,
+            "operator = %r" % field.logic_operator,
+            "fragment = %s(value, %r, additional_queries)" % (
+                source.constant(field.get_query),
+                field_query_name
+            ),
+        )
+    else:
+        source.write(
+            1,
+            "operator, fragment = %s(value, %r, additional_queries)" % (
+                source.constant(field.get_clause),
+                field_query_name
+            ),
+        )
+
+    if builder_class.filter_context:
+        source.write(
+            1,
+            "operator = builder._get_context_logic_operator("
+            "%s, operator, additional_queries)" % source.constant(field),
+        )
+    source.write(
+        1,
+        "builder._add_field_query(query, operator, fragment)",
+        "",
+    )
+
+
+def compile_query_builder(builder_class: type) -> CompiledQuery:
+    """
+    Generate the build function for the builder class.
+
+    `build` returns the same query as the builder constructs
+    from the normalized params.
+    """
+    source = _Source()
+    builders = []
+
+    for index, (field_query_name, field) in enumerate(
+        builder_class._declared_fields.items()
+    ):
+        _emit_field(source, builder_class, index, field_query_name, field)
+        builders.append("%r: build_%d" % (field_query_name, index))
+
+    source.write(
+        0,
+        "builders = {%s}" % ", ".join(builders),
+        "",
+        "def build(builder, params):",
+        "    query = {}",
+        "    for field_query_name, value in params.items():",
+        "        builders[field_query_name](builder, value, query)",
+        "    return builder._create_common_query(query)",
+    )
+
+    namespace = source.namespace
+    code = compile(
+        "\n".join(source.lines),
+        "<compiled %s>" % builder_class.__qualname__,
+        "exec"
+    )
+    exec(code, namespace)
+    return CompiledQuery(build=namespace["build"])
@@ -0,0 +1,303 @@
+"""
+Registry of the converters of the input values to the input types
+of the fields.
+
+Every input type has a lenient converter, which accepts the values
+the type itself can be built from, and a strict one, which accepts
+only the values of the type and their canonical string form.
+Values of the types which are not JSON serializable are converted
+to their JSON representation: decimals, dates, datetimes and UUIDs
+to strings, enum members to their values.
+"""
+import datetime
+import decimal
+import enum
+import math
+import re
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+Converter = Callable[[Any], Any]
+ConverterFactory = Callable[[type], Converter]
+
+
+class InputValueError(ValueError):
+    """
+    Invalid value with the message for the user, e.g. the limit
+    of the values. Messages of other errors, e.g. of `int()`,
+    are replaced by the expected input of the field.
+    """
+
+
+_factories: Dict[type, Tuple[ConverterFactory, ConverterFactory]] = {}
+
+
+def register_converter_factory(input_type: type,
+                               factory: ConverterFactory,
+                               strict_factory: Optional[
+                                   ConverterFactory
+                               ] = None):
+    """
+    Register the factories of the converters for the input type
+    and its subclasses, called with the input type of the field.
+    """
+    _factories[input_type] = (factory, strict_factory or factory)
+
+
+def register_converter(input_type: type,
+                       converter: Converter,
+                       strict_converter: Optional[Converter] = None):
+    """
+    Register the lenient and the strict converters of the input type,
+    the strict one is the same as the lenient one by default.
+
+    Converters raise `ValueError` for the invalid values,
+    `InputValueError` to show its message in the invalid input error.
+    """
+    strict_converter = strict_converter or converter
+    register_converter_factory(
+        input_type,
+        lambda _: converter,
+        lambda _: strict_converter
+    )
+
+
+def get_converter(input_type: type, strict: bool = False) -> Converter:
+    """
+    Converter of the input type or of its closest registered base,
+    the values of the unknown types are invalid.
+    """
+    if not isinstance(input_type, type):
+        return _unsupported
+
+    mro = input_type.__mro__
+    if issubclass(input_type, enum.Enum):
+        # Enums mixed with data types, e.g. IntEnum, are converted as enums.
+        mro = [klass for klass in mro if issubclass(klass, enum.Enum)]
+    for klass in mro:
+        factories = _factories.get(klass)
+        if factories is not None:
+            return factories[strict](input_type)
+    return _unsupported
+
+
+def _unsupported(value):
+    raise ValueError
+
+
+# Built-in types, the lenient converters are the types themselves.
+
+_int_re = re.compile(r"[+-]?\d+")
+_decimal_re = re.compile(r"[+-]?(\d+(\.\d*)?|\.\d+)")
+_date_re = re.compile(r"\d{4}-\d{2}-\d{2}")
+_datetime_re = re.compile(r"\d{4}-\d{2}-\d{2}T")
+
+
+def _strict_str(value) -> str:
+    if type(value) is not str:
+        raise ValueError
+    return value
+
+
+def _strict_int(value) -> int:
+    value_type = type(value)
+    if value_type is int:
+        return value
+    if value_type is str and _int_re.fullmatch(value):
+        return int(value)
+    raise ValueError
+
+
+def _strict_float(value) -> float:
+    value_type = type(value)
+    if value_type is float or value_type is int:
+        value = float(value)
+    elif value_type is str and _decimal_re.fullmatch(value):
+        value = float(value)
+    else:
+        raise ValueError
+    if not math.isfinite(value):
+        raise ValueError
+    return value
+
+
+def _bool(value) -> bool:
+    if isinstance(value, str):
+        return value == "true"
+    elif isinstance(value, bool):
+        return value
+    raise ValueError
+
+
+def _strict_bool(value) -> bool:
+    if value is True or value == "true":
+        return True
+    elif value is False or value == "false":
+        return False
+    raise ValueError
+
+
+register_converter(str, str, _strict_str)
+register_converter(int, int, _strict_int)
+register_converter(float, float, _strict_float)
+register_converter(bool, _bool, _strict_bool)
+
+
+# Decimal numbers are kept as strings, so that they are not rounded.
+
+def _to_decimal_str(value: decimal.Decimal) -> str:
+    if not value.is_finite():
+        raise ValueError
+    return str(value)
+
+
+def _decimal(value) -> str:
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, float):
+        # Shortest repr, not the exact binary value.
+        value = repr(value)
+    elif isinstance(value, str):
+        value = value.strip()
+    elif not isinstance(value, (int, decimal.Decimal)):
+        raise ValueError
+    try:
+        return _to_decimal_str(decimal.Decimal(value))
+    except decimal.InvalidOperation:
+        raise ValueError
+
+
+def _strict_decimal(value) -> str:
+    value_type = type(value)
+    if value_type is decimal.Decimal:
+        return _to_decimal_str(value)
+    elif value_type is int:
+        return str(value)
+    elif value_type is str and _decimal_re.fullmatch(value):
+        return str(decimal.Decimal(value))
+    raise ValueError
+
+
+register_converter(decimal.Decimal, _decimal, _strict_decimal)
+
+
+# Dates and datetimes are ISO 8601 strings.
+
+def _parse_datetime(value: str) -> datetime.datetime:
+    if value.endswith(("Z", "z")):
+        value = value[:-1] + "+00:00"
+    return datetime.datetime.fromisoformat(value)
+
+
+def _date(value) -> str:
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat()
+    elif isinstance(value, datetime.date):
+        return value.isoformat()
+    elif isinstance(value, str):
+        value = value.strip()
+        if _date_re.fullmatch(value):
+            return datetime.date.fromisoformat(value).isoformat()
+        return _parse_datetime(value).date().isoformat()
+    raise ValueError
+
+
+def _strict_date(value) -> str:
+    value_type = type(value)
+    if value_type is datetime.date:
+        return value.isoformat()
+    elif value_type is str and _date_re.fullmatch(value):
+        return datetime.date.fromisoformat(value).isoformat()
+    raise ValueError
+
+
+def _datetime(value) -> str:
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    elif isinstance(value, datetime.date):
+        return datetime.datetime.combine(value, datetime.time()).isoformat()
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        # Unix timestamp.
+        try:
+            return datetime.datetime.fromtimestamp(
+                value,
+                datetime.timezone.utc
+            ).isoformat()
+        except (OverflowError, OSError):
+            raise ValueError
+    elif isinstance(value, str):
+        return _parse_datetime(value.strip()).isoformat()
+    raise ValueError
+
+
+def _strict_datetime(value) -> str:
+    value_type = type(value)
+    if value_type is datetime.datetime:
+        return value.isoformat()
+    elif value_type is str and _datetime_re.match(value):
+        return _parse_datetime(value).isoformat()
+    raise ValueError
+
+
+register_converter(datetime.date, _date, _strict_date)
+register_converter(datetime.datetime, _datetime, _strict_datetime)
+
+
+# UUIDs are lowercase strings with hyphens.
+
+def _uuid(value) -> str:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    elif isinstance(value, str):
+        return str(uuid.UUID(value.strip()))
+    raise ValueError
+
+
+def _strict_uuid(value) -> str:
+    value_type = type(value)
+    if value_type is uuid.UUID:
+        return str(value)
+    elif value_type is str and len(value) == 36:
+        converted = str(uuid.UUID(value))
+        if converted == value.lower():
+            return converted
+    raise ValueError
+
+
+register_converter(uuid.UUID, _uuid, _strict_uuid)
+
+
+# Enum members are converted to their values.
+
+def _enum_factory(input_type: type) -> Converter:
+    by_name = dict(input_type.__members__)
+    by_str_value = {str(member.value): member for member in input_type}
+
+    def convert(value):
+        if isinstance(value, input_type):
+            return value.value
+        try:
+            return input_type(value).value
+        except ValueError:
+            pass
+        member = by_name.get(value) if isinstance(value, str) else None
+        if member is None:
+            member = by_str_value.get(str(value).strip())
+        if member is None:
+            raise ValueError
+        return member.value
+
+    return convert
+
+
+def _strict_enum_factory(input_type: type) -> Converter:
+
+    def convert(value):
+        if isinstance(value, input_type):
+            return value.value
+        return input_type(value).value
+
+    return convert
+
+
+register_converter_factory(enum.Enum, _enum_factory, _strict_enum_factory)
@@ -0,0 +1,187 @@
+"""
+Date math of the bounds of the date ranges.
+
+Relative bounds are Elasticsearch date math expressions anchored
+at `now`, e.g. `now-1d/h`, or the shorthand `last 24h` of `now-24h`.
+Bounds are rounded to a unit, so that the queries built within
+the same unit are the same and hit the request cache of the shards.
+Absolute bounds are floored and anchored, e.g. `2024-01-31||/M`,
+so that Elasticsearch rounds them the same way as the relative ones:
+up for `gt` and `lte`, down for `gte` and `lt`.
+"""
+import datetime
+import re
+from typing import Any, Callable, Optional
+
+from .converters import Converter, InputValueError
+
+# Units of the date math, `H` is the same as `h`.
+units = ("y", "M", "w", "d", "h", "H", "m", "s")
+
+# Formats of the range which parse the ISO dates of the converters,
+# the first ones parse the ISO datetimes as well.
+iso_datetime_formats = frozenset((
+    "strict_date_optional_time",
+    "date_optional_time",
+    "strict_date_optional_time_nanos",
+))
+iso_date_formats = frozenset((
+    "strict_date",
+    "date",
+    "yyyy-MM-dd",
+))
+_epoch = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+_date_math_re = re.compile(r"now(?:[+-]\d+[yMwdhHms])*(?:/[yMwdhHms])?")
+_last_re = re.compile(r"last\s*(\d+)\s*([yMwdhHms])")
+
+
+def is_date_type(input_type: Any) -> bool:
+    return isinstance(input_type, type) and issubclass(
+        input_type,
+        datetime.date
+    )
+
+
+def parse_relative(value: str) -> Optional[str]:
+    """
+    Date math expression of the relative bound, None if it's absolute.
+    """
+    value = value.strip()
+    if _date_math_re.fullmatch(value):
+        return value
+
+    match = _last_re.fullmatch(value)
+    if match is not None:
+        return "now-%s%s" % match.groups()
+    return None
+
+
+def is_iso_format(date_format: Optional[str], input_type: type) -> bool:
+    """
+    Whether the ISO bounds of the input type are parsed by the format.
+    """
+    if date_format is None:
+        return True
+    formats = iso_datetime_formats
+    if not issubclass(input_type, datetime.datetime):
+        formats = formats | iso_date_formats
+    return any(name in formats for name in date_format.split("||"))
+
+
+def round_relative(expression: str, rounding: Optional[str]) -> str:
+    """
+    Round the date math expression, unless it's already rounded.
+    """
+    if rounding is None or "/" in expression:
+        return expression
+    return "%s/%s" % (expression, rounding)
+
+
+def floor_date(value: datetime.date, rounding: str) -> datetime.date:
+    """
+    Start of the unit of the date or of the datetime.
+    """
+    if isinstance(value, datetime.datetime):
+        if rounding == "s":
+            return value.replace(microsecond=0)
+        elif rounding == "m":
+            return value.replace(second=0, microsecond=0)
+        elif rounding in ("h", "H"):
+            return value.replace(minute=0, second=0, microsecond=0)
+        value = value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if rounding == "w":
+        return value - datetime.timedelta(days=value.weekday())
+    elif rounding == "M":
+        return value.replace(day=1)
+    elif rounding == "y":
+        return value.replace(month=1, day=1)
+    return value
+
+
+def round_absolute(value: str, rounding: str) -> str:
+    """
+    Date math of the ISO date or datetime rounded to the unit.
+    """
+    if "T" in value:
+        parsed = datetime.datetime.fromisoformat(value)
+    else:
+        parsed = datetime.date.fromisoformat(value)
+    return "%s||/%s" % (floor_date(parsed, rounding).isoformat(), rounding)
+
+
+def format_date(value: datetime.date, date_format: str) -> Any:
+    """
+    Date or datetime in the first of the `||` separated formats
+    which it can be formatted in, datetimes without the offset are UTC.
+    """
+    for name in date_format.split("||"):
+        if name in ("epoch_millis", "epoch_second"):
+            if not isinstance(value, datetime.datetime):
+                value = datetime.datetime.combine(value, datetime.time())
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=datetime.timezone.utc)
+            if name == "epoch_second":
+                return (value - _epoch) // datetime.timedelta(seconds=1)
+            return (value - _epoch) // datetime.timedelta(milliseconds=1)
+        elif name in iso_datetime_formats:
+            return value.isoformat()
+        elif name in iso_date_formats:
+            if isinstance(value, datetime.datetime):
+                value = value.date()
+            return value.isoformat()
+    raise InputValueError("Dates can't be formatted as `%s`" % date_format)
+
+
+def format_absolute(value: Any,
+                    date_format: str,
+                    rounding: Optional[str]) -> Any:
+    """
+    Absolute bound of the range with the format: strings and numbers
+    are parsed by Elasticsearch, dates and datetimes are formatted.
+    """
+    if isinstance(value, datetime.date):
+        if rounding is not None:
+            value = floor_date(value, rounding)
+        value = format_date(value, date_format)
+    elif isinstance(value, str):
+        value = value.strip()
+    elif not isinstance(value, int) or isinstance(value, bool):
+        raise InputValueError(
+            "Bound must be a string, a number or a date in `%s`"
+            % date_format
+        )
+
+    if rounding is not None:
+        return "%s||/%s" % (value, rounding)
+    return value
+
+
+def make_date_converter(convert: Converter,
+                        rounding: Optional[str],
+                        date_format: Optional[str] = None
+                        ) -> Callable[[Any], Any]:
+    """
+    Converter of the bounds of the date input type, which accepts
+    the relative bounds besides the values accepted by `convert`.
+
+    With the `format` of the range which doesn't parse ISO dates,
+    the absolute bounds are in the format, see `format_absolute`.
+    """
+
+    def convert_date(value):
+        if isinstance(value, str):
+            expression = parse_relative(value)
+            if expression is not None:
+                return round_relative(expression, rounding)
+
+        if date_format is not None:
+            return format_absolute(value, date_format, rounding)
+
+        value = convert(value)
+        if rounding is not None:
+            value = round_absolute(value, rounding)
+        return value
+
+    return convert_date
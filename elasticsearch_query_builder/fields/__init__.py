@@ -9,7 +9,7 @@ from .match_phrase_prefix import MatchPhrasePrefixElasticField
 from .multi_match import MultiMatchElasticField
 from .nested import NestedElasticField
 from .query_string import QueryStringElasticField
-from .range import RangeElasticField
+from .range import RangeElasticField, TwoSidedRangeElasticField
 from .term import TermElasticField
 from .terms import TermsElasticField
 
@@ -28,4 +28,5 @@ __all__ = [
     "RangeElasticField",
     "TermElasticField",
     "TermsElasticField",
+    "TwoSidedRangeElasticField",
 ]
@@ -1,8 +1,69 @@
+import copy
+import json
+import math
 from abc import ABC
 from typing import Union, Optional, List, Tuple, Any
 
+from ..cache import CacheInfo, FragmentCache, freeze
+from ..compact import (
+    canonical_values,
+    compact_types,
+    make_values_converter,
+    to_list
+)
+from ..converters import InputValueError, get_converter
+
+
+_encode = json.JSONEncoder().encode
+_encode_str = json.encoder.encode_basestring_ascii
+
+
+def encode_value(value) -> str:
+    """
+    Encode value the same way as `json.dumps` with default arguments.
+    """
+    value_type = type(value)
+    if value_type is str:
+        return _encode_str(value)
+    elif value_type is bool:
+        return "true" if value else "false"
+    elif value_type is int:
+        return int.__repr__(value)
+    elif value_type is float and math.isfinite(value):
+        return float.__repr__(value)
+    elif isinstance(value, compact_types):
+        return _encode(value.tolist())
+    return _encode(value)
+
+
+def invalid_input_error(field_query_name: str,
+                        field: "FieldInterface",
+                        error: ValueError) -> ValueError:
+    """
+    Error of the invalid input of the field with the message
+    of `InputValueError` or the expected input of the field,
+    the error raised by the field is the cause.
+    """
+    message = "Invalid input for `%s`" % field_query_name
+    if isinstance(error, InputValueError):
+        message = "%s: %s" % (message, error)
+    else:
+        expected_input = field.get_expected_input()
+        if expected_input is not None:
+            message = "%s: expected %s" % (message, expected_input)
+    invalid_input = ValueError(message)
+    invalid_input.__cause__ = error
+    return invalid_input
+
+
+def get_type_name(input_type: Optional[type]) -> Optional[str]:
+    if input_type is None:
+        return None
+    return getattr(input_type, "__name__", None)
+
 
 class FieldInterface:
+    __slots__ = ()
 
     def get_query(self, value, field_name: str, **kwargs):
         raise NotImplementedError
@@ -10,21 +71,51 @@ class FieldInterface:
     def normalize_input(self, value, field_query_name: str):
         raise NotImplementedError
 
+    def get_expected_input(self) -> Optional[str]:
+        """
+        Description of the valid input for the invalid input errors.
+        """
+        return None
+
 
 class AbstractElasticField(FieldInterface):
     """
     Abstract Elasticsearch Field
     """
-    _logic_operator = None
+    __slots__ = (
+        "_logic_operator",
+        "_explicit_logic_operator",
+        "_field_name",
+    )
+
+    _default_logic_operator = None
+
+    # Queries of the field affect the scores of the documents.
+    scoring = True
+    # Queries of the field are costly to build, so that cached fragments
+    # pay off, simple queries are built as fast as they're looked up.
+    costly = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Default logic operator may be declared as `_logic_operator`
+        # class attribute, which would hide the slot of the instance.
+        logic_operator = cls.__dict__.get("_logic_operator")
+        if logic_operator is None or isinstance(logic_operator, str):
+            if "_logic_operator" in cls.__dict__:
+                cls._default_logic_operator = logic_operator
+                del cls._logic_operator
 
     def __init__(self,
                  logic_operator: Optional[str] = None,
                  field_name: Optional[str] = None):
-        if logic_operator:
-            self._logic_operator = logic_operator
+        self._explicit_logic_operator = bool(logic_operator)
+        if not logic_operator:
+            logic_operator = self._default_logic_operator
 
-        assert self._logic_operator is not None, "You must set logic operator"
+        assert logic_operator is not None, "You must set logic operator"
 
+        self._logic_operator = logic_operator
         self._field_name = field_name
 
     @property
@@ -35,12 +126,69 @@ class AbstractElasticField(FieldInterface):
     def field_name(self):
         return self._field_name
 
+    @property
+    def filterable(self) -> bool:
+        """
+        Whether the `must` clause of the field can be placed
+        in the filter context, unless the logic operator is explicit.
+        """
+        return not self.scoring and not self._explicit_logic_operator
+
+    def get_logic_operator(self, value) -> str:
+        """
+        Logic operator of the query for the normalized value.
+        """
+        return self._logic_operator
+
+    def get_clause(self,
+                   value,
+                   field_name: str,
+                   additional_queries: Optional[Union[list, dict]] = None
+                   ) -> Tuple[str, Any]:
+        """
+        Query of the field together with its logic operator.
+        """
+        return (
+            self.get_logic_operator(value),
+            self.get_query(
+                value,
+                field_name,
+                additional_queries=additional_queries
+            )
+        )
+
+    def encode_clause(self,
+                      value,
+                      field_name: str,
+                      additional_queries: Optional[Union[list, dict]] = None
+                      ) -> Tuple[str, str]:
+        """
+        Encoded query of the field together with its logic operator.
+        """
+        return (
+            self.get_logic_operator(value),
+            self.encode_query(
+                value,
+                field_name,
+                additional_queries=additional_queries
+            )
+        )
+
     @field_name.setter
     def field_name(self, value):
         self._field_name = value
 
+    def with_field_name_prefix(self, prefix: str) -> "AbstractElasticField":
+        """
+        Copy of the field with the field name prefixed by the path.
+        """
+        field = copy.copy(self)
+        field._field_name = "%s.%s" % (prefix, self._field_name)
+        return field
+
 
 class AdditionalQueryElasticFieldMixin:
+    __slots__ = ()
 
     @staticmethod
     def _concatenate_query(default_query, additional_queries):
@@ -52,8 +200,27 @@ class AdditionalQueryElasticFieldMixin:
         general_query["bool"][logic_operator].append(default_query)
         return general_query
 
+    @staticmethod
+    def _encode_concatenated_query(default_query: str, additional_queries):
+        return '{"bool": {"must": [%s]}}' % ", ".join([
+            *(_encode(query) for query in additional_queries),
+            default_query
+        ])
+
 
 class ConstructQueryElasticFieldMixin:
+    __slots__ = ()
+
+    @staticmethod
+    def _compact_attrs(attrs: List[Tuple[str, Any]]) -> Tuple[Tuple[str, Any]]:
+        """
+        Keep only the attributes that are set.
+        """
+        return tuple(
+            (attr_name, attr_value)
+            for attr_name, attr_value in attrs
+            if attr_value is not None
+        )
 
     @staticmethod
     def _construct(default: dict, attrs: List[Tuple[str, Any]]):
@@ -63,10 +230,361 @@ class ConstructQueryElasticFieldMixin:
         return default
 
 
+class ConvertInputElasticFieldMixin:
+    """
+    Conversion of the input values to the input type of the field.
+
+    The converter is resolved from the registry of `converters`
+    when the input type is set, so normalization is a single call.
+    """
+    __slots__ = ()
+
+    @property
+    def _input_type(self) -> type:
+        return self._input_type_value
+
+    @_input_type.setter
+    def _input_type(self, input_type: type):
+        self._input_type_value = input_type
+        self._convert = self._make_converter(input_type)
+
+    def _make_converter(self, input_type: type):
+        return get_converter(input_type, strict=self._strict)
+
+    def get_expected_input(self) -> Optional[str]:
+        return get_type_name(self._input_type)
+
+
+class ValuesElasticFieldMixin(ConvertInputElasticFieldMixin):
+    """
+    Fields of the iterable values, e.g. `terms` and `ids`.
+
+    Values may be deduplicated and sorted, so that the same values
+    give the same query. Past `max_terms_count` values, the limit
+    of the index, the values are split into the queries
+    of `should` clause, or the input is invalid with `overflow="raise"`.
+    """
+    __slots__ = ()
+
+    _overflows = ("split", "raise")
+
+    def __init__(self,
+                 *args,
+                 input_type: Optional[type] = None,
+                 strict: bool = False,
+                 unique: bool = False,
+                 sort: bool = False,
+                 max_terms_count: Optional[int] = None,
+                 overflow: str = "split",
+                 **kwargs):
+        assert overflow in self._overflows, \
+            "Overflow must be one of %s" % ", ".join(self._overflows)
+        assert max_terms_count is None or max_terms_count > 0, \
+            "Max terms count must be positive"
+        super().__init__(*args, **kwargs)
+        self._strict = strict
+        self._unique = unique
+        self._sort = sort
+        self._max_terms_count = max_terms_count
+        self._overflow = overflow
+        self._input_type = input_type
+
+    @property
+    def max_terms_count(self) -> Optional[int]:
+        return self._max_terms_count
+
+    def _make_converter(self, input_type: Optional[type]):
+        convert = make_values_converter(input_type, strict=self._strict)
+        unique = self._unique
+        sort = self._sort
+        max_terms_count = None
+        if self._overflow == "raise":
+            max_terms_count = self._max_terms_count
+        if not unique and not sort and max_terms_count is None:
+            return convert
+
+        def convert_values(value):
+            value = convert(value)
+            if unique or sort:
+                value = canonical_values(value, unique=unique, sort=sort)
+            if max_terms_count is not None and len(value) > max_terms_count:
+                raise InputValueError(
+                    "%d values exceed the max terms count %d" % (
+                        len(value),
+                        max_terms_count
+                    )
+                )
+            return value
+
+        return convert_values
+
+    def get_expected_input(self) -> Optional[str]:
+        type_name = get_type_name(self._input_type)
+        if type_name is None:
+            return "iterable"
+        return "iterable of %s" % type_name
+
+    def _is_empty_value(self, value) -> bool:
+        return len(value) == 0
+
+    def _is_split(self, value) -> bool:
+        # The placeholder of the encoded template is a single value.
+        max_terms_count = self._max_terms_count
+        return (
+            max_terms_count is not None
+            and value is not self._placeholder
+            and len(value) > max_terms_count
+        )
+
+    def _get_template_key(self) -> tuple:
+        return self._field_name, self._max_terms_count
+
+    def _get_query(self, value, field_name: str):
+        if self._is_empty_value(value):
+            return {}
+        if not self._is_split(value):
+            return self._get_values_query(to_list(value), field_name)
+
+        max_terms_count = self._max_terms_count
+        return {
+            "bool": {
+                "should": [
+                    self._get_values_query(
+                        to_list(value[start:start + max_terms_count]),
+                        field_name
+                    )
+                    for start in range(0, len(value), max_terms_count)
+                ]
+            }
+        }
+
+    def _get_values_query(self, values: list, field_name: str) -> dict:
+        raise NotImplementedError
+
+    def encode_query(self,
+                     value,
+                     field_name: str,
+                     additional_queries: Optional[Union[list, dict]] = None
+                     ) -> str:
+        if self._is_split(value):
+            return json.dumps(self.get_query(
+                value,
+                field_name,
+                additional_queries=additional_queries
+            ))
+        return super().encode_query(
+            value,
+            field_name,
+            additional_queries=additional_queries
+        )
+
+    def normalize_input(self, value, field_query_name: str):
+        return self._convert(value)
+
+
+class EncodeQueryElasticFieldMixin:
+    """
+    Encoding of the field query to JSON without building it.
+
+    The query built for a placeholder value is encoded once and split
+    around the placeholder, the segments are cached per field instance
+    and reused while the template key of the field is not changed.
+    """
+    __slots__ = ()
+
+    _placeholder = "\x00value\x00"
+    _encoded_placeholder = json.dumps(_placeholder)
+
+    # The value is inserted into the query as is, so that the query
+    # may be encoded by the template. Subclasses overriding the query
+    # methods must declare it again, otherwise the query is built
+    # and encoded for every value.
+    templated = True
+    _query_methods = ("get_query", "_get_query", "_get_values_query")
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "templated" not in cls.__dict__ and any(
+            name in cls.__dict__ for name in cls._query_methods
+        ):
+            cls.templated = False
+
+    def encode_query(self,
+                     value,
+                     field_name: str,
+                     additional_queries: Optional[Union[list, dict]] = None
+                     ) -> str:
+        """
+        Encode clauses of the field query, separated by `, `.
+
+        The result is the same as for `json.dumps` of the query items
+        added by the builder, an empty string if there are no clauses.
+        """
+        segments = self._get_encoded_template(field_name)
+        if segments is None:
+            query = self.get_query(
+                value,
+                field_name,
+                additional_queries=additional_queries
+            )
+            if not query:
+                return ""
+            if isinstance(query, list):
+                return ", ".join(json.dumps(item) for item in query)
+            return json.dumps(query)
+
+        if self._is_empty_value(value):
+            default_query = "{}"
+        else:
+            prefix, suffix = segments
+            default_query = prefix + encode_value(value) + suffix
+
+        if additional_queries:
+            return self._encode_concatenated_query(
+                default_query=default_query,
+                additional_queries=additional_queries
+            )
+        if default_query == "{}":
+            return ""
+        return default_query
+
+    def _get_template_key(self) -> tuple:
+        """
+        Attributes of the field which the query template depends on.
+        """
+        return (self._field_name,)
+
+    def _get_encoded_template(self, field_name: str):
+        key = self._get_template_key()
+        encoded_template = self._encoded_template
+        if encoded_template is None or encoded_template[0] != key:
+            encoded_template = (
+                key,
+                self._encode_template(field_name)
+            )
+            self._encoded_template = encoded_template
+        return encoded_template[1]
+
+    def _encode_template(self, field_name: str):
+        if not self.templated:
+            return None
+
+        try:
+            query = self._get_query(self._placeholder, field_name)
+            if not isinstance(query, dict):
+                return None
+            encoded = json.dumps(query)
+        except Exception:
+            # The query can't be built for the placeholder,
+            # e.g. the value is compared.
+            return None
+
+        segments = encoded.split(self._encoded_placeholder)
+        if len(segments) != 2:
+            # The value is converted, used several times or not used.
+            return None
+        return segments[0], segments[1]
+
+    def _is_empty_value(self, value) -> bool:
+        """
+        Whether the query is empty for the normalized value.
+        """
+        return False
+
+
 class ElasticField(AbstractElasticField,
                    AdditionalQueryElasticFieldMixin,
                    ConstructQueryElasticFieldMixin,
+                   EncodeQueryElasticFieldMixin,
                    ABC):
+    __slots__ = (
+        "_encoded_template",
+        "_fragment_cache",
+    )
+
+    templated = True
+
+    def __init__(self,
+                 *args,
+                 fragment_cache: Optional[FragmentCache] = None,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        self._encoded_template = None
+        self._fragment_cache = fragment_cache
+
+    @property
+    def fragment_cache(self) -> Optional[FragmentCache]:
+        return self._fragment_cache
+
+    def fragment_cache_info(self) -> Optional[CacheInfo]:
+        """
+        Hits and misses of the fragment cache, None if it isn't set.
+        """
+        if self._fragment_cache is None:
+            return None
+        return self._fragment_cache.info()
+
+    def get_clause(self,
+                   value,
+                   field_name: str,
+                   additional_queries: Optional[Union[list, dict]] = None
+                   ) -> Tuple[str, Any]:
+        if self._fragment_cache is None:
+            return super().get_clause(
+                value,
+                field_name,
+                additional_queries=additional_queries
+            )
+        return (
+            self.get_logic_operator(value),
+            self._get_cached_query(value, field_name, additional_queries)
+        )
+
+    def _get_cached_query(self,
+                          value,
+                          field_name: str,
+                          additional_queries: Optional[Union[list, dict]]):
+        """
+        Query of the field from the fragment cache, if it's set.
+
+        Fields wrapping the child field, e.g. nested, build the query
+        of the child with it, so that the cache of the child is used.
+        """
+        fragment_cache = self._fragment_cache
+        if fragment_cache is None:
+            return self.get_query(
+                value,
+                field_name,
+                additional_queries=additional_queries
+            )
+
+        # The cache may be shared by the fields, the field itself is
+        # in the key. Template key changes if the field is changed
+        # after declaration.
+        key = (
+            self,
+            field_name,
+            self._get_template_key(),
+            freeze(value),
+            freeze(additional_queries) if additional_queries else None
+        )
+        try:
+            query = fragment_cache.get(key)
+        except TypeError:
+            # Value can't be used as a key.
+            return self.get_query(
+                value,
+                field_name,
+                additional_queries=additional_queries
+            )
+
+        if query is None:
+            query = fragment_cache.set(key, self.get_query(
+                value,
+                field_name,
+                additional_queries=additional_queries
+            ))
+        return query
 
     def get_query(self,
                   value,
@@ -1,29 +1,311 @@
-from typing import Union
+import copy
+import json
+from collections.abc import Mapping
+from typing import Dict, NamedTuple, Optional, Tuple, Union
 
+from ..cache import copy_query, freeze, freeze_query
 from .abstract import ElasticField
 
 
+class DispatchedValue(NamedTuple):
+    """
+    Normalized value of the dispatching choice field.
+    """
+    choice: object
+    value: object
+
+
+# Child field, child field with its fixed input value or fixed query.
+Dispatch = Union[ElasticField, Tuple[ElasticField, object], dict]
+
+
+def _split_dispatch(choice, dispatch: Dispatch) -> tuple:
+    """
+    Child field and its input value of the dispatched choice,
+    None and the query if the choice gives the fixed query.
+    """
+    if isinstance(dispatch, ElasticField):
+        return dispatch, choice
+    elif isinstance(dispatch, tuple):
+        return dispatch
+    return None, dispatch
+
+
 class ChoiceElasticField(ElasticField):
+    """
+    Query of the child field for the allowed values only.
+
+    If `choices` is a mapping, every choice is dispatched to its own
+    child field, which normalizes the choice and builds the query.
+    The choice may be also mapped to a pair of the child field and
+    its fixed input value, or to the fixed query.
+
+    The list of choices is frozen to a tuple, so that the hash set
+    of the choices can't be stale, they may be replaced only.
+
+    With `cache_fragments` the costly query of the child, e.g. nested,
+    is built once per choice, the cached fragments are shared
+    by the built queries and can't be changed. It has no effect
+    for the children which aren't costly, e.g. term, their queries
+    are built as fast as they're looked up.
+
+    With `delegate_logic_operator` the logic operator of the child
+    is used, e.g. `must_not` of `ExistsElasticField` for `False`,
+    unless the logic operator of the choice field is explicit.
+    """
+    __slots__ = (
+        "_choices",
+        "_child",
+        "_choice_set",
+        "_cache_fragments",
+        "_fragments",
+        "_delegate_logic_operator",
+    )
+
     _logic_operator = "must"
 
     def __init__(self,
-                 choices: list,
-                 child: ElasticField,
+                 choices: Union[list, Dict[object, Dispatch]],
+                 child: Optional[ElasticField] = None,
                  *args,
+                 cache_fragments: bool = False,
+                 delegate_logic_operator: bool = False,
                  **kwargs):
         super().__init__(*args, **kwargs)
 
+        if isinstance(choices, Mapping):
+            assert child is None, \
+                "You can't set child with dispatched choices"
+            for dispatch in choices.values():
+                assert isinstance(dispatch, (ElasticField, dict)) or (
+                    isinstance(dispatch, tuple)
+                    and len(dispatch) == 2
+                    and isinstance(dispatch[0], ElasticField)
+                ), "You must dispatch choice to field, (field, value) or query"
+        else:
+            assert child is not None, "You must set child"
+            choices = tuple(choices)
+
         self._choices = choices
         self._child = child
+        self._choice_set = None
+        self._cache_fragments = cache_fragments
+        self._fragments = {}
+        self._delegate_logic_operator = delegate_logic_operator
+
+    def _get_choice_set(self) -> Optional[frozenset]:
+        """
+        Hash set of the choices, None if they aren't hashable.
+        """
+        choices = self._choices
+        choice_set = self._choice_set
+        if choice_set is None or choice_set[0] is not choices:
+            # Choices were replaced after the field was declared.
+            choices = self._choices = tuple(choices)
+            try:
+                choice_set = (choices, frozenset(choices))
+            except TypeError:
+                choice_set = (choices, None)
+            self._choice_set = choice_set
+        return choice_set[1]
+
+    def _is_allowed(self, value) -> bool:
+        choice_set = self._get_choice_set()
+        if choice_set is not None:
+            try:
+                return value in choice_set
+            except TypeError:
+                return False
+        return value in self._choices
+
+    def _get_child(self, value):
+        """
+        Child field and its value for the normalized value,
+        None and the fixed query if the choice gives it,
+        None if the value isn't allowed.
+        """
+        child = self._child
+        if child is not None:
+            if not self._is_allowed(value):
+                return None
+            return child, value
+
+        # Choices are dispatched to their own children.
+        if not isinstance(value, DispatchedValue):
+            return None
+        dispatch = self._choices.get(value.choice)
+        if dispatch is None:
+            return None
+        child, query = _split_dispatch(value.choice, dispatch)
+        if child is None:
+            return None, query
+        return child, value.value
+
+    def get_logic_operator(self, value) -> str:
+        if (
+            not self._delegate_logic_operator
+            or self._explicit_logic_operator
+        ):
+            return self._logic_operator
+
+        child_value = self._get_child(value)
+        if child_value is None or child_value[0] is None:
+            return self._logic_operator
+
+        child, value = child_value
+        return child.get_logic_operator(value)
 
     def get_query(self,
                   value,
                   field_name: str,
                   additional_queries: Union[list, dict, None] = None):
-        if value not in self._choices:
+        child_value = self._get_child(value)
+        if child_value is None:
             return {}
 
-        return self._child.get_query(value, field_name, additional_queries)
+        child, value = child_value
+        if child is None:
+            if additional_queries:
+                return self._concatenate_query(
+                    default_query=copy_query(value),
+                    additional_queries=additional_queries
+                )
+            return copy_query(value)
+        if (
+            self._cache_fragments
+            and child.costly
+            and not additional_queries
+        ):
+            return self._get_fragment(child, value, field_name)
+        return child._get_cached_query(value, field_name, additional_queries)
+
+    def encode_query(self,
+                     value,
+                     field_name: str,
+                     additional_queries: Union[list, dict, None] = None):
+        child_value = self._get_child(value)
+        if child_value is None:
+            return ""
+
+        child, value = child_value
+        if child is None:
+            if additional_queries:
+                return self._encode_concatenated_query(
+                    default_query=json.dumps(value),
+                    additional_queries=additional_queries
+                )
+            return json.dumps(value)
+        return child.encode_query(value, field_name, additional_queries)
+
+    def _get_fragment(self, child: ElasticField, value, field_name: str):
+        try:
+            fragment = self._fragments.get((value, field_name))
+        except TypeError:
+            # Value can't be used as a key.
+            return child.get_query(value, field_name)
+
+        key = child._get_template_key()
+        if (
+            fragment is None
+            or fragment[0] is not child
+            or fragment[1] != key
+        ):
+            # Child was changed after the fragment was built.
+            fragment = (
+                child,
+                key,
+                freeze_query(child.get_query(value, field_name))
+            )
+            self._fragments[(value, field_name)] = fragment
+        return fragment[2]
+
+    def _get_children(self):
+        if self._child is not None:
+            return [self._child]
+        return [
+            child
+            for child, _ in (
+                _split_dispatch(choice, dispatch)
+                for choice, dispatch in self._choices.items()
+            )
+            if child is not None
+        ]
+
+    @property
+    def scoring(self) -> bool:
+        if self._child is None and any(
+            isinstance(dispatch, dict)
+            for dispatch in self._choices.values()
+        ):
+            # Fixed queries may be scoring.
+            return True
+        return any(child.scoring for child in self._get_children())
+
+    @property
+    def costly(self) -> bool:
+        return any(child.costly for child in self._get_children())
+
+    def _get_template_key(self) -> tuple:
+        if self._child is None:
+            key = []
+            for choice, dispatch in self._choices.items():
+                child, value = _split_dispatch(choice, dispatch)
+                key.append((
+                    choice,
+                    None if child is None else child._get_template_key(),
+                    freeze(value)
+                ))
+            return tuple(key)
+        choice_set = self._get_choice_set()
+        return (
+            self._child._get_template_key(),
+            tuple(self._choices) if choice_set is None else choice_set
+        )
+
+    def with_field_name_prefix(self, prefix: str) -> "ChoiceElasticField":
+        field = copy.copy(self)
+        field._fragments = {}
+        if self._child is None:
+            field._choices = {
+                choice: self._prefix_dispatch(dispatch, prefix)
+                for choice, dispatch in self._choices.items()
+            }
+        else:
+            field._child = self._child.with_field_name_prefix(prefix)
+        return field
+
+    @staticmethod
+    def _prefix_dispatch(dispatch: Dispatch, prefix: str) -> Dispatch:
+        if isinstance(dispatch, ElasticField):
+            return dispatch.with_field_name_prefix(prefix)
+        elif isinstance(dispatch, tuple):
+            child, value = dispatch
+            return child.with_field_name_prefix(prefix), value
+        # Fields of the fixed query are full.
+        return dispatch
+
+    def get_expected_input(self) -> Optional[str]:
+        # Input of the dispatched values depends on the choice.
+        if self._child is not None:
+            return self._child.get_expected_input()
+        return None
 
     def normalize_input(self, value, field_name: str):
-        return self._child.normalize_input(value, field_name)
+        if self._child is not None:
+            return self._child.normalize_input(value, field_name)
+
+        try:
+            dispatch = self._choices.get(value)
+        except TypeError:
+            dispatch = None
+        if dispatch is None:
+            # Not allowed values give no query.
+            return value
+
+        child, child_value = _split_dispatch(value, dispatch)
+        if child is None:
+            return DispatchedValue(choice=value, value=None)
+        return DispatchedValue(
+            choice=value,
+            value=child.normalize_input(child_value, field_name)
+        )
@@ -4,15 +4,24 @@ from .abstract import ElasticField
 
 
 class ExistsElasticField(ElasticField):
+    __slots__ = ()
+
     _logic_operator = "must"
+    scoring = False
+
+    def get_logic_operator(self, value: Optional[bool]) -> str:
+        if value is False:
+            return "must_not"
+        if self._explicit_logic_operator:
+            return self._logic_operator
+        return "must"
+
+    def _is_empty_value(self, value: Optional[bool]) -> bool:
+        return value is None
 
     def _get_query(self, value: Optional[bool], field_name: str):
-        if value is None:
+        if self._is_empty_value(value):
             return {}
-        elif value is True:
-            self._logic_operator = "must"
-        elif value is False:
-            self._logic_operator = "must_not"
 
         return {
             "exists": {
@@ -20,6 +29,9 @@ class ExistsElasticField(ElasticField):
             }
         }
 
+    def get_expected_input(self) -> Optional[str]:
+        return "bool"
+
     def normalize_input(self, value, field_query_name: str):
         if isinstance(value, bool):
             return value
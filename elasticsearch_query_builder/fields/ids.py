@@ -1,24 +1,30 @@
-from collections import abc
-from typing import Optional
+from .abstract import ElasticField, ValuesElasticFieldMixin
 
-from .abstract import ElasticField
 
+class IdsElasticField(ValuesElasticFieldMixin, ElasticField):
+    """
+    Ids of the iterable value.
 
-class IdsElasticField(ElasticField):
-    _logic_operator = "must"
+    With `input_type` every value is converted, integers and floats
+    are kept in a compact array until the query is serialized.
+    """
+    __slots__ = (
+        "_input_type_value",
+        "_strict",
+        "_convert",
+        "_unique",
+        "_sort",
+        "_max_terms_count",
+        "_overflow",
+    )
 
-    def _get_query(self, value: Optional[list], field_name: str):
-        if not value:
-            return {}
+    _logic_operator = "must"
+    scoring = False
+    templated = True
 
+    def _get_values_query(self, values: list, field_name: str) -> dict:
         return {
             "ids": {
-                "values": value
+                "values": values
             }
         }
-
-    def normalize_input(self, value, field_query_name: str):
-        if isinstance(value, abc.Iterable):
-            return list(value)
-        else:
-            raise ValueError
@@ -1,8 +1,16 @@
-from .abstract import ElasticField
+from .abstract import ConvertInputElasticFieldMixin, ElasticField
 
 
-class MatchElasticField(ElasticField):
+class MatchElasticField(ConvertInputElasticFieldMixin, ElasticField):
+    __slots__ = (
+        "_input_type_value",
+        "_strict",
+        "_convert",
+        "_attrs",
+    )
+
     _logic_operator = "must"
+    templated = True
 
     def __init__(self,
                  input_type: type,
@@ -10,17 +18,25 @@ class MatchElasticField(ElasticField):
                  fuzziness: str = None,
                  minimum_should_match: str = None,
                  *args,
+                 strict: bool = False,
                  **kwargs):
         super().__init__(*args, **kwargs)
+        self._strict = strict
         self._input_type = input_type
-        self._attrs = [
+        self._attrs = self._compact_attrs([
             ("operator", operator),
             ("fuzziness", fuzziness),
             ("minimum_should_match", minimum_should_match),
-        ]
+        ])
+
+    def _get_template_key(self) -> tuple:
+        return self._field_name, tuple(self._attrs)
+
+    def _is_empty_value(self, value) -> bool:
+        return not value
 
     def _get_query(self, value, field_name: str):
-        if not value:
+        if self._is_empty_value(value):
             return {}
 
         return {
@@ -35,9 +51,4 @@ class MatchElasticField(ElasticField):
         }
 
     def normalize_input(self, value, field_name: str):
-        if self._input_type == int:
-            return int(value)
-        elif self._input_type == str:
-            return str(value)
-        else:
-            raise ValueError
+        return self._convert(value)
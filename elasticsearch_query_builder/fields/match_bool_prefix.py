@@ -2,7 +2,12 @@ from .abstract import ElasticField
 
 
 class MatchBoolPrefixElasticField(ElasticField):
+    __slots__ = (
+        "_attrs",
+    )
+
     _logic_operator = "must"
+    templated = True
 
     def __init__(self,
                  operator: str = None,
@@ -10,13 +15,19 @@ class MatchBoolPrefixElasticField(ElasticField):
                  *args,
                  **kwargs):
         super().__init__(*args, **kwargs)
-        self._attrs = [
+        self._attrs = self._compact_attrs([
             ("operator", operator),
             ("minimum_should_match", minimum_should_match),
-        ]
+        ])
+
+    def _get_template_key(self) -> tuple:
+        return self._field_name, tuple(self._attrs)
+
+    def _is_empty_value(self, value) -> bool:
+        return not value
 
     def _get_query(self, value, field_name: str):
-        if not value:
+        if self._is_empty_value(value):
             return {}
 
         return {
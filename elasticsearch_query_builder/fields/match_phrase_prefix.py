@@ -2,7 +2,10 @@ from .abstract import ElasticField
 
 
 class MatchPhrasePrefixElasticField(ElasticField):
+    __slots__ = ()
+
     _logic_operator = "must"
+    templated = True
 
     def _get_query(self, value, field_query_name: str):
         return {
@@ -2,7 +2,18 @@ from .abstract import ElasticField
 
 
 class MultiMatchElasticField(ElasticField):
+    __slots__ = (
+        "_query_type",
+        "_fields",
+        "_operator",
+        "_minimum_should_match",
+        "_tie_breaker",
+        "_fuzziness",
+        "_attrs",
+    )
+
     _logic_operator = "must"
+    templated = True
 
     def __init__(self,
                  query_type: str,
@@ -20,7 +31,9 @@ class MultiMatchElasticField(ElasticField):
         self._minimum_should_match = minimum_should_match
         self._tie_breaker = tie_breaker
         self._fuzziness = fuzziness
-        self._attrs = self._get_attrs_by_query_type(query_type)
+        self._attrs = self._compact_attrs(
+            self._get_attrs_by_query_type(query_type)
+        )
 
     def _get_attrs_by_query_type(self, query_type: str):
         if query_type == "best_fields":
@@ -53,6 +66,9 @@ class MultiMatchElasticField(ElasticField):
         else:
             raise TypeError("Unknown query type: %s" % query_type)
 
+    def _get_template_key(self) -> tuple:
+        return self._query_type, tuple(self._fields), tuple(self._attrs)
+
     def _get_query(self, value, field_query_name: str):
         query = self._construct(
             default={
@@ -1,56 +1,159 @@
-from typing import Union
+import json
+from typing import Optional, Union
 
 from .abstract import ElasticField
 
 
 class NestedElasticField(ElasticField):
+    """
+    Nested query of the child field.
+
+    With `delegate_logic_operator` the logic operator of the child
+    is used, e.g. `must_not` of `ExistsElasticField` for `False`,
+    unless the logic operator of the nested field is explicit.
+    """
+    __slots__ = (
+        "_path",
+        "_child",
+        "_bound_child",
+        "_delegate_logic_operator",
+    )
+
     _logic_operator = "must"
+    costly = True
 
     def __init__(self,
                  path: str,
                  child: ElasticField,
                  *args,
+                 delegate_logic_operator: bool = False,
                  **kwargs):
         super().__init__(*args, **kwargs)
         self._path = path
         self._child = child
+        self._delegate_logic_operator = delegate_logic_operator
+        self._bound_child = self._bind_child()
+
+    @property
+    def scoring(self) -> bool:
+        return self._child.scoring
+
+    def _bind_child(self):
+        """
+        Bind a copy of the child with the field name prefixed by the path.
+        """
+        return (
+            self._path,
+            self._child,
+            self._child.field_name,
+            self._child.with_field_name_prefix(self._path)
+        )
+
+    def _get_bound_child(self) -> ElasticField:
+        bound_child = self._bound_child
+        path, child, child_field_name, prefixed_child = bound_child
+        if (
+            path != self._path
+            or child is not self._child
+            or child_field_name != child.field_name
+        ):
+            # Path or child was changed after the field was declared.
+            bound_child = self._bind_child()
+            self._bound_child = bound_child
+        return bound_child[3]
+
+    def get_logic_operator(self, value) -> str:
+        if (
+            self._delegate_logic_operator
+            and not self._explicit_logic_operator
+        ):
+            return self._child.get_logic_operator(value)
+        return self._logic_operator
+
+    def _get_template_key(self) -> tuple:
+        return (
+            self._path,
+            self._child.field_name,
+            self._child._get_template_key()
+        )
+
+    def with_field_name_prefix(self, prefix: str) -> "NestedElasticField":
+        # Path of nested field is always full.
+        return self
 
     def get_query(self,
                   value,
                   field_name: str,
                   additional_queries: Union[list, dict, None] = None):
-        if not additional_queries:
-            additional_queries = {}
-        nested_additional_queries = additional_queries.pop(self._path, None)
-
-        # Get default child field name.
-        default_child_field_name = self._child.field_name
-        # Set normalized child field name with nested path.
-        self._child.field_name = f"{self._path}.{default_child_field_name}"
-        # Get query for child.
-        query = self._child.get_query(
+        nested_additional_queries, additional_queries = (
+            self._split_additional_queries(additional_queries)
+        )
+
+        query = self._get_bound_child()._get_cached_query(
             value,
             field_name,
-            additional_queries=additional_queries
+            additional_queries
         )
-        # Reset child field name.
-        self._child.field_name = default_child_field_name
-
         if not query:
             return {}
 
-        default_query = {
+        if nested_additional_queries:
+            query = self._concatenate_query(
+                default_query=query,
+                additional_queries=nested_additional_queries
+            )
+        return {
             "nested": {
                 "path": self._path,
                 "query": query
             }
         }
+
+    def encode_query(self,
+                     value,
+                     field_name: str,
+                     additional_queries: Union[list, dict, None] = None):
+        nested_additional_queries, additional_queries = (
+            self._split_additional_queries(additional_queries)
+        )
+
+        query = self._get_bound_child().encode_query(
+            value,
+            field_name,
+            additional_queries=additional_queries
+        )
+        if not query:
+            return ""
+
         if nested_additional_queries:
-            default_query['nested']['query'] = self._concatenate_query(
-                default_query=default_query['nested']['query'],
+            query = self._encode_concatenated_query(
+                default_query=query,
                 additional_queries=nested_additional_queries
             )
-        return default_query
+        return '{"nested": {"path": %s, "query": %s}}' % (
+            json.dumps(self._path),
+            query
+        )
+
+    def _split_additional_queries(self,
+                                  additional_queries: Union[list, dict, None]):
+        """
+        Split additional queries of the nested query and of the child.
+        """
+        if not isinstance(additional_queries, dict):
+            return None, additional_queries
+
+        return (
+            additional_queries.get(self._path),
+            {
+                key: queries
+                for key, queries in additional_queries.items()
+                if key != self._path
+            }
+        )
+
+    def get_expected_input(self) -> Optional[str]:
+        return self._child.get_expected_input()
 
     def normalize_input(self, value, field_name: str):
         return self._child.normalize_input(value, field_name)
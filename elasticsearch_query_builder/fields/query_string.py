@@ -2,7 +2,12 @@ from .abstract import ElasticField
 
 
 class QueryStringElasticField(ElasticField):
+    __slots__ = (
+        "_attrs",
+    )
+
     _logic_operator = "must"
+    templated = True
 
     def __init__(self,
                  default_field: str = None,
@@ -16,26 +21,33 @@ class QueryStringElasticField(ElasticField):
         if default_field and fields and len(fields):
             raise TypeError
 
-        self._attrs = [
+        attrs = [
             ("fuzziness", fuzziness),
             ("default_operator", default_operator),
             ("minimum_should_match", minimum_should_match),
         ]
         if default_field:
-            self._attrs.append(
+            attrs.append(
                 ("default_field", default_field)
             )
         elif fields:
-            self._attrs.append(
+            attrs.append(
                 ("fields", fields)
             )
         else:
-            self._attrs.append(
+            attrs.append(
                 ("default_field", self._field_name)
             )
+        self._attrs = self._compact_attrs(attrs)
+
+    def _get_template_key(self) -> tuple:
+        return tuple(self._attrs)
+
+    def _is_empty_value(self, value) -> bool:
+        return not value
 
     def _get_query(self, value, field_query_name):
-        if not value:
+        if self._is_empty_value(value):
             return {}
 
         return {
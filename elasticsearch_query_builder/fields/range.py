@@ -1,36 +1,195 @@
-from .abstract import ElasticField
+from typing import Optional
 
+from ..datemath import (
+    is_date_type,
+    is_iso_format,
+    make_date_converter,
+    units
+)
+from .abstract import ConvertInputElasticFieldMixin, ElasticField
+
+
+class RangeOptionsElasticFieldMixin(ConvertInputElasticFieldMixin):
+    """
+    Options of the ranges of dates.
+
+    `format` and `time_zone` of the bounds are added to the query.
+    Bounds of the `date` and `datetime` input types may be relative,
+    see `datemath`, with `rounding` they are rounded to the unit
+    of the date math, e.g. `now-1d` to `now-1d/h` and `2024-01-31T10:15`
+    to `2024-01-31T10:00:00||/h` for `h`. With `format` which doesn't
+    parse ISO dates, e.g. `epoch_millis`, the absolute bounds are kept
+    in the format.
+    """
+    __slots__ = ()
+
+    def __init__(self,
+                 *args,
+                 format: Optional[str] = None,
+                 time_zone: Optional[str] = None,
+                 rounding: Optional[str] = None,
+                 **kwargs):
+        assert rounding is None or rounding in units, \
+            "Rounding must be one of %s" % ", ".join(units)
+        super().__init__(*args, **kwargs)
+        self._rounding = rounding
+        self._options = self._compact_attrs([
+            ("format", format),
+            ("time_zone", time_zone),
+        ])
+
+    def _make_converter(self, input_type: type):
+        convert = super()._make_converter(input_type)
+        if is_date_type(input_type):
+            date_format = dict(self._options).get("format")
+            if is_iso_format(date_format, input_type):
+                date_format = None
+            return make_date_converter(convert, self._rounding, date_format)
+        return convert
+
+    def get_expected_input(self) -> Optional[str]:
+        type_name = super().get_expected_input()
+        if is_date_type(self._input_type):
+            return "%s or date math" % type_name
+        return type_name
+
+
+class RangeElasticField(RangeOptionsElasticFieldMixin, ElasticField):
+    __slots__ = (
+        "_lookup_expr",
+        "_input_type_value",
+        "_strict",
+        "_convert",
+        "_rounding",
+        "_options",
+    )
 
-class RangeElasticField(ElasticField):
     _logic_operator = "must"
+    scoring = False
+    templated = True
 
     def __init__(self,
                  input_type: type,
                  lookup_expr: str,
                  *args,
+                 strict: bool = False,
                  **kwargs):
         super().__init__(*args, **kwargs)
 
         assert lookup_expr in ("gte", "lte", "gt", "lt")
         self._lookup_expr = lookup_expr
+        self._strict = strict
         self._input_type = input_type
 
+    def _get_template_key(self) -> tuple:
+        return self._field_name, self._lookup_expr, self._options
+
+    def _is_empty_value(self, value) -> bool:
+        # Zero bound gives no query as well.
+        return not value
+
     def _get_query(self, value, field_query_name: str):
-        if not value:
+        if self._is_empty_value(value):
             return {}
 
         return {
             "range": {
-                self._field_name: {
-                    self._lookup_expr: value,
-                }
+                self._field_name: self._construct(
+                    default={
+                        self._lookup_expr: value,
+                    },
+                    attrs=self._options
+                )
             }
         }
 
     def normalize_input(self, value, field_name: str):
-        if self._input_type == float:
-            return float(value)
-        elif self._input_type == int:
-            return int(value)
+        return self._convert(value)
+
+
+class TwoSidedRangeElasticField(RangeOptionsElasticFieldMixin, ElasticField):
+    """
+    Range with the lower bound, the upper bound or both.
+
+    The value is a pair of the bounds, `None` for an open bound,
+    or a dict of the bounds keyed by their lookup expressions.
+    """
+    __slots__ = (
+        "_lower_lookup_expr",
+        "_upper_lookup_expr",
+        "_input_type_value",
+        "_strict",
+        "_convert",
+        "_rounding",
+        "_options",
+    )
+
+    _logic_operator = "must"
+    scoring = False
+
+    def __init__(self,
+                 input_type: type,
+                 lower_lookup_expr: str = "gte",
+                 upper_lookup_expr: str = "lte",
+                 *args,
+                 strict: bool = False,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+
+        assert lower_lookup_expr in ("gte", "gt")
+        assert upper_lookup_expr in ("lte", "lt")
+        self._lower_lookup_expr = lower_lookup_expr
+        self._upper_lookup_expr = upper_lookup_expr
+        self._strict = strict
+        self._input_type = input_type
+
+    def _encode_template(self, field_name: str):
+        # Bounds are not a single value, the query is always built.
+        return None
+
+    def _is_empty_value(self, value) -> bool:
+        return value is None or value == (None, None)
+
+    def _get_query(self, value, field_query_name: str):
+        if self._is_empty_value(value):
+            return {}
+
+        lower, upper = value
+        bounds = {}
+        if lower is not None:
+            bounds[self._lower_lookup_expr] = lower
+        if upper is not None:
+            bounds[self._upper_lookup_expr] = upper
+        return {
+            "range": {
+                self._field_name: self._construct(
+                    default=bounds,
+                    attrs=self._options
+                ),
+            }
+        }
+
+    def get_expected_input(self) -> Optional[str]:
+        return "pair of %s bounds or mapping of %s and %s" % (
+            super().get_expected_input(),
+            self._lower_lookup_expr,
+            self._upper_lookup_expr
+        )
+
+    def normalize_input(self, value, field_name: str):
+        if isinstance(value, dict):
+            if set(value) - {self._lower_lookup_expr, self._upper_lookup_expr}:
+                raise ValueError
+            lower = value.get(self._lower_lookup_expr)
+            upper = value.get(self._upper_lookup_expr)
+        elif isinstance(value, (list, tuple)) and len(value) == 2:
+            lower, upper = value
         else:
             raise ValueError
+        return self._normalize_bound(lower), self._normalize_bound(upper)
+
+    def _normalize_bound(self, value):
+        # Empty bound is open, zero is a bound.
+        if value is None or value == "":
+            return None
+        return self._convert(value)
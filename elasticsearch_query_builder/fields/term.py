@@ -1,22 +1,87 @@
-from typing import Union
+from collections import abc
+from typing import Optional, Union
 
-from .abstract import ElasticField
+from ..compact import make_values_converter, to_list
+from .abstract import ConvertInputElasticFieldMixin, ElasticField
 
 
-class TermElasticField(ElasticField):
+class TermElasticField(ConvertInputElasticFieldMixin, ElasticField):
+    """
+    Term of the value.
+
+    With `multiple` the value may be iterable too, every value
+    is converted: the query is the `term` of a single value
+    and the `terms` of several ones, no query for no values.
+    """
+    __slots__ = (
+        "_input_type_value",
+        "_strict",
+        "_convert",
+        "_multiple",
+    )
+
     _logic_operator = "must"
+    scoring = False
+    templated = True
 
     def __init__(self,
                  input_type: type,
                  *args,
+                 strict: bool = False,
+                 multiple: bool = False,
                  **kwargs):
         super().__init__(*args, **kwargs)
+        self._strict = strict
+        self._multiple = multiple
         self._input_type = input_type
 
+    def _make_converter(self, input_type: Optional[type]):
+        if not self._multiple:
+            return super()._make_converter(input_type)
+
+        convert_values = make_values_converter(input_type, strict=self._strict)
+
+        def convert(value):
+            # Single value is the same as the one of the iterable.
+            if isinstance(value, (str, bytes)) or not isinstance(
+                value,
+                abc.Iterable
+            ):
+                value = (value,)
+            return convert_values(value)
+
+        return convert
+
+    def get_expected_input(self) -> Optional[str]:
+        type_name = super().get_expected_input()
+        if not self._multiple or type_name is None:
+            return type_name
+        return "%s or iterable of %s" % (type_name, type_name)
+
+    def _is_empty_value(self, value) -> bool:
+        return self._multiple and len(value) == 0
+
+    def _encode_template(self, field_name: str):
+        if self._multiple:
+            # Query type depends on the number of values.
+            return None
+        return super()._encode_template(field_name)
+
     def _get_query(self,
                    value,
                    field_query_name: str,
                    additional_queries: Union[list, dict, None] = None):
+        if self._multiple:
+            if len(value) == 0:
+                return {}
+            elif len(value) > 1:
+                return {
+                    "terms": {
+                        self._field_name: to_list(value)
+                    }
+                }
+            value = to_list(value)[0]
+
         return {
             "term": {
                 self._field_name:  value
@@ -24,16 +89,4 @@ class TermElasticField(ElasticField):
         }
 
     def normalize_input(self, value, field_query_name: str):
-        if self._input_type == bool:
-            if isinstance(value, str):
-                return value == "true"
-            elif isinstance(value, bool):
-                return value
-            else:
-                raise ValueError
-        elif self._input_type == str:
-            return str(value)
-        elif self._input_type == int:
-            return int(value)
-        else:
-            raise ValueError
+        return self._convert(value)
@@ -1,22 +1,99 @@
 from collections import abc
+from typing import Any, Mapping, Optional
 
-from .abstract import ElasticField
+from .abstract import ElasticField, ValuesElasticFieldMixin
 
 
-class TermsElasticField(ElasticField):
+class TermsElasticField(ValuesElasticFieldMixin, ElasticField):
+    """
+    Terms of the iterable value.
+
+    With `input_type` every value is converted, integers and floats
+    are kept in a compact array until the query is serialized.
+
+    With `lookup` the terms are fetched by Elasticsearch from the field
+    `path` of the document `id` in the `index`. The value is the id
+    of the document or the mapping of the lookup keys, `lookup` holds
+    their defaults, e.g. `{"index": "groups", "path": "members"}`.
+    The param may be resolved by `get_<field>_lookup` hook of the builder
+    with the request context, e.g. the routing of the user.
+    """
+    __slots__ = (
+        "_input_type_value",
+        "_strict",
+        "_convert",
+        "_unique",
+        "_sort",
+        "_max_terms_count",
+        "_overflow",
+        "_lookup",
+    )
+
     _logic_operator = "must"
+    scoring = False
+    templated = True
+
+    _lookup_keys = ("index", "id", "path", "routing")
+    _required_lookup_keys = ("index", "id", "path")
+
+    def __init__(self,
+                 *args,
+                 lookup: Optional[Mapping[str, Any]] = None,
+                 **kwargs):
+        if lookup is not None:
+            assert not set(lookup) - set(self._lookup_keys), \
+                "Lookup keys must be %s" % ", ".join(self._lookup_keys)
+            assert not any(
+                kwargs.get(name)
+                for name in ("input_type", "unique", "sort", "max_terms_count")
+            ), "Lookup can't be combined with the options of the values"
+            lookup = dict(lookup)
+        self._lookup = lookup
+        super().__init__(*args, **kwargs)
 
-    def _get_query(self, value, field_query_name):
-        if not value:
-            return {}
+    @property
+    def lookup(self) -> Optional[Mapping[str, Any]]:
+        return self._lookup
+
+    def _make_converter(self, input_type: Optional[type]):
+        if self._lookup is not None:
+            return self.get_lookup
+        return super()._make_converter(input_type)
+
+    def get_expected_input(self) -> Optional[str]:
+        if self._lookup is not None:
+            return "document id or mapping of %s" % ", ".join(
+                self._lookup_keys
+            )
+        return super().get_expected_input()
+
+    def get_lookup(self, value) -> dict:
+        """
+        Terms lookup of the value, override it to resolve the lookup
+        of the value otherwise.
+        """
+        if isinstance(value, abc.Mapping):
+            if set(value) - set(self._lookup_keys):
+                raise ValueError
+            lookup = {**self._lookup, **value}
+        elif isinstance(value, (str, int)) and not isinstance(value, bool):
+            lookup = {**self._lookup, "id": value}
+        else:
+            raise ValueError
+
+        for key in self._required_lookup_keys:
+            if lookup.get(key) is None:
+                raise ValueError
+        # Keys are ordered, so the same lookups are equal in JSON.
+        return {
+            key: str(lookup[key])
+            for key in self._lookup_keys
+            if lookup.get(key) is not None
+        }
+
+    def _get_values_query(self, values, field_name: str) -> dict:
         return {
             "terms": {
-                self._field_name: value
+                self._field_name: values
             }
         }
-
-    def normalize_input(self, value, field_query_name):
-        if isinstance(value, abc.Iterable):
-            return list(value)
-        else:
-            raise ValueError
@@ -0,0 +1,1096 @@
+"""
+In-memory execution of the queries built by the builders.
+
+Documents are indexed into an inverted index, the queries of the shapes
+produced by the fields (`bool`, `term`, `terms`, `range`, `exists`,
+`ids`, `match` family, `multi_match`, `query_string`, `nested`) are
+evaluated against it and matched documents are scored with BM25.
+
+It is meant for tests and small reference indices, not as a replacement
+of Elasticsearch: there is no fuzzy matching, `query_string` syntax is
+reduced to its terms and scores are close to, but not the same as
+the Elasticsearch ones.
+"""
+import calendar
+import datetime
+import itertools
+import json
+import math
+import re
+from collections import defaultdict
+from fnmatch import fnmatchcase
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union
+)
+
+from .datemath import floor_date
+
+K1 = 1.2
+B = 0.75
+# Gap between positions of the values of a multi-valued field,
+# so phrases don't match across the values.
+POSITION_INCREMENT_GAP = 100
+
+NUMERIC_TYPES = {
+    "long",
+    "integer",
+    "short",
+    "byte",
+    "double",
+    "float",
+    "half_float",
+    "scaled_float",
+    "unsigned_long",
+}
+
+_token_re = re.compile(r"\w+", re.UNICODE)
+_date_math_re = re.compile(
+    r"(?:(now)|(.+?)\|\|)((?:[+-]\d+[yMwdhHms])*)(?:/([yMwdhHms]))?"
+)
+_date_operation_re = re.compile(r"([+-])(\d+)([yMwdhHms])")
+_time_zone_re = re.compile(r"([+-])(\d\d):?(\d\d)")
+# Formats of the dates, which are parsed as ISO dates or epoch millis.
+_date_formats = {
+    "strict_date_optional_time",
+    "date_optional_time",
+    "strict_date_optional_time_nanos",
+    "strict_date",
+    "date",
+    "strict_date_time",
+    "date_time",
+    "strict_date_time_no_millis",
+    "date_time_no_millis",
+    "yyyy-MM-dd",
+    "epoch_millis",
+}
+_epoch = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_query_string_operators = {"AND", "OR", "NOT"}
+
+Scores = Dict[Hashable, float]
+
+
+def analyze(text: Any) -> List[str]:
+    """
+    Split the text to lowercase tokens, like the standard analyzer.
+    """
+    if isinstance(text, bool):
+        text = "true" if text else "false"
+    return _token_re.findall(str(text).lower())
+
+
+def _keyword(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _parse_minimum_should_match(value, count: int) -> int:
+    if value is None:
+        return 1
+    value = str(value).strip()
+    if value.endswith("%"):
+        percent = int(value[:-1])
+        if percent < 0:
+            return count - int(count * -percent / 100)
+        return int(count * percent / 100)
+    number = int(value)
+    if number < 0:
+        return count + number
+    return number
+
+
+def _is_date_math(value: Any) -> bool:
+    return isinstance(value, str) and (
+        value.startswith("now") or "||" in value
+    )
+
+
+def _parse_time_zone(value: Optional[str]) -> datetime.tzinfo:
+    if value is None or value in ("Z", "UTC"):
+        return datetime.timezone.utc
+
+    match = _time_zone_re.fullmatch(value)
+    if match is not None:
+        sign, hours, minutes = match.groups()
+        offset = datetime.timedelta(hours=int(hours), minutes=int(minutes))
+        return datetime.timezone(-offset if sign == "-" else offset)
+
+    try:
+        from zoneinfo import ZoneInfo
+    except ImportError:
+        raise NotImplementedError("Time zone is not supported: %s" % value)
+    return ZoneInfo(value)
+
+
+def _check_date_format(value: Optional[str]):
+    if value is not None and not set(value.split("||")) <= _date_formats:
+        raise NotImplementedError("Date format is not supported: %s" % value)
+
+
+def _parse_date(value: Any,
+                time_zone: datetime.tzinfo) -> datetime.datetime:
+    """
+    Datetime of the ISO date or of the epoch millis, dates without
+    the offset are in the time zone.
+    """
+    if isinstance(value, bool):
+        raise ValueError("Invalid date value: %r" % value)
+    if isinstance(value, (int, float)):
+        return _epoch + datetime.timedelta(milliseconds=value)
+
+    text = str(value).strip()
+    if text.lstrip("-").isdigit():
+        return _epoch + datetime.timedelta(milliseconds=int(text))
+    if text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    try:
+        if "T" in text:
+            parsed = datetime.datetime.fromisoformat(text)
+        else:
+            parsed = datetime.datetime.combine(
+                datetime.date.fromisoformat(text),
+                datetime.time()
+            )
+    except ValueError:
+        raise ValueError("Invalid date value: %r" % value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=time_zone)
+    return parsed
+
+
+def _add_months(value: datetime.datetime,
+                months: int) -> datetime.datetime:
+    month = value.month - 1 + months
+    year = value.year + month // 12
+    month = month % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+def _add_units(value: datetime.datetime,
+               count: int,
+               unit: str) -> datetime.datetime:
+    if unit == "y":
+        return _add_months(value, 12 * count)
+    elif unit == "M":
+        return _add_months(value, count)
+    elif unit == "w":
+        return value + datetime.timedelta(weeks=count)
+    elif unit == "d":
+        return value + datetime.timedelta(days=count)
+    elif unit in ("h", "H"):
+        return value + datetime.timedelta(hours=count)
+    elif unit == "m":
+        return value + datetime.timedelta(minutes=count)
+    return value + datetime.timedelta(seconds=count)
+
+
+def _date_millis(value: datetime.datetime) -> float:
+    return (value - _epoch) / datetime.timedelta(milliseconds=1)
+
+
+def _evaluate_date(value: Any,
+                   time_zone: datetime.tzinfo,
+                   round_up: bool) -> float:
+    """
+    Epoch millis of the date or of the date math expression, rounded
+    in the time zone down to the start of the unit, or up to its last
+    millisecond, like Elasticsearch does for `gt` and `lte` bounds.
+    """
+    match = _date_math_re.fullmatch(value) if _is_date_math(value) else None
+    if match is None:
+        return _date_millis(_parse_date(value, time_zone))
+
+    now, anchor, operations, rounding = match.groups()
+    if now:
+        date = datetime.datetime.now(time_zone)
+    else:
+        date = _parse_date(anchor, time_zone).astimezone(time_zone)
+    for sign, count, unit in _date_operation_re.findall(operations):
+        count = -int(count) if sign == "-" else int(count)
+        date = _add_units(date, count, unit)
+
+    if rounding is None:
+        return _date_millis(date)
+    start = floor_date(date, rounding)
+    if not round_up:
+        return _date_millis(start)
+    return _date_millis(_add_units(start, 1, rounding)) - 1
+
+
+class _FieldIndex:
+    __slots__ = (
+        "exact",
+        "postings",
+        "lengths",
+        "total_length",
+        "docs",
+    )
+
+    def __init__(self):
+        # Value -> documents, for the fields which are not analyzed.
+        self.exact = defaultdict(set)
+        # Token -> document -> positions, for the analyzed fields.
+        self.postings = defaultdict(dict)
+        self.lengths = {}
+        self.total_length = 0
+        self.docs = set()
+
+
+class MemoryIndex:
+    """
+    Inverted index of the documents.
+
+    Mappings are the same as for Elasticsearch index, types of the fields
+    without mappings are detected by the first indexed value: strings are
+    `text` fields with `keyword` subfield, lists of objects are also
+    indexed as nested documents. Values of `date` fields are ISO dates
+    or epoch millis, the date math of the range bounds is evaluated with
+    the `time_zone` of the range.
+
+    Terms lookups read the documents of `indices` by the index name.
+    """
+
+    def __init__(self,
+                 mappings: Optional[dict] = None,
+                 indices: Optional[Mapping[str, "MemoryIndex"]] = None):
+        self._indices = indices
+        self._types = {}
+        self._nested_paths = set()
+        if mappings:
+            self._add_mappings(mappings.get("properties", {}), "")
+
+        self._fields = defaultdict(_FieldIndex)
+        self._sources = {}
+        # Insertion order, for the stable order of equally scored hits.
+        self._order = {}
+        self._counter = itertools.count()
+        self._nested = {}
+        self._doc_fields = {}
+
+    def _add_mappings(self, properties: dict, prefix: str):
+        for name, mapping in properties.items():
+            path = prefix + name
+            field_type = mapping.get("type", "object")
+            self._types[path] = field_type
+            if field_type == "nested":
+                self._nested_paths.add(path)
+            if "properties" in mapping:
+                self._add_mappings(mapping["properties"], path + ".")
+            for subfield, submapping in mapping.get("fields", {}).items():
+                self._types["%s.%s" % (path, subfield)] = submapping["type"]
+
+    def __len__(self):
+        return len(self._sources)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._sources
+
+    def get(self, doc_id) -> Optional[dict]:
+        return self._sources.get(doc_id)
+
+    # Indexing.
+
+    def add(self, doc_id: Hashable, source: dict):
+        """
+        Index the document, replacing the one with the same id.
+        """
+        if doc_id in self._sources:
+            self.delete(doc_id)
+
+        self._sources[doc_id] = source
+        self._order[doc_id] = next(self._counter)
+        self._doc_fields[doc_id] = []
+        positions = defaultdict(int)
+        self._index_object(doc_id, source, "", positions)
+
+    def add_many(self,
+                 documents: Iterable[dict],
+                 id_field: str = "_id"):
+        """
+        Index the documents, ids are taken from `id_field`
+        or assigned sequentially.
+        """
+        for document in documents:
+            document = dict(document)
+            doc_id = document.pop(id_field, None)
+            if doc_id is None:
+                doc_id = str(len(self._sources))
+            self.add(str(doc_id), document)
+
+    def load_ndjson(self,
+                    lines: Iterable[Union[str, bytes]],
+                    id_field: str = "_id"):
+        """
+        Index the documents from NDJSON lines.
+        """
+        self.add_many(
+            (json.loads(line) for line in lines if line.strip()),
+            id_field=id_field
+        )
+
+    def delete(self, doc_id: Hashable):
+        self._sources.pop(doc_id)
+        self._order.pop(doc_id)
+        for path, kind, key in self._doc_fields.pop(doc_id):
+            field = self._fields[path]
+            if kind == "exact":
+                field.exact[key].discard(doc_id)
+                if not field.exact[key]:
+                    del field.exact[key]
+            else:
+                field.postings[key].pop(doc_id, None)
+                if not field.postings[key]:
+                    del field.postings[key]
+            field.docs.discard(doc_id)
+            length = field.lengths.pop(doc_id, None)
+            if length is not None:
+                field.total_length -= length
+
+        for nested in self._nested.values():
+            for nested_id in [
+                nested_id for nested_id in nested._sources
+                if nested_id[0] == doc_id
+            ]:
+                nested.delete(nested_id)
+
+    def _get_type(self, path: str, value: Any) -> str:
+        field_type = self._types.get(path)
+        if field_type is None:
+            # Dynamic mapping.
+            if isinstance(value, bool):
+                field_type = "boolean"
+            elif isinstance(value, int):
+                field_type = "long"
+            elif isinstance(value, float):
+                field_type = "float"
+            else:
+                field_type = "text"
+                self._types.setdefault(path + ".keyword", "keyword")
+            self._types[path] = field_type
+        return field_type
+
+    def _index_object(self, doc_id, source: dict, prefix: str, positions):
+        for name, value in source.items():
+            path = prefix + name
+            if isinstance(value, dict):
+                self._index_object(doc_id, value, path + ".", positions)
+            elif isinstance(value, list):
+                if any(isinstance(item, dict) for item in value):
+                    self._index_nested(doc_id, path, value)
+                    if path in self._nested_paths:
+                        continue
+                    for item in value:
+                        if isinstance(item, dict):
+                            self._index_object(
+                                doc_id,
+                                item,
+                                path + ".",
+                                positions
+                            )
+                else:
+                    for item in value:
+                        self._index_value(doc_id, path, item, positions)
+            else:
+                self._index_value(doc_id, path, value, positions)
+
+    def _index_nested(self, doc_id, path: str, items: list):
+        nested = self._nested.get(path)
+        if nested is None:
+            nested = MemoryIndex()
+            # Nested documents share the types of the parent fields.
+            nested._types = self._types
+            nested._indices = self._indices
+            nested._nested_paths = {
+                nested_path
+                for nested_path in self._nested_paths
+                if nested_path != path
+            }
+            self._nested[path] = nested
+
+        for position, item in enumerate(items):
+            if isinstance(item, dict):
+                nested.add((doc_id, position), {path: item})
+
+    def _index_value(self, doc_id, path: str, value: Any, positions):
+        if value is None:
+            return
+
+        field_type = self._get_type(path, value)
+        field = self._fields[path]
+        field.docs.add(doc_id)
+        doc_fields = self._doc_fields[doc_id]
+
+        if field_type == "text":
+            tokens = analyze(value)
+            start = positions[path]
+            for offset, token in enumerate(tokens):
+                field.postings[token].setdefault(doc_id, []).append(
+                    start + offset
+                )
+                doc_fields.append((path, "postings", token))
+            positions[path] = start + len(tokens) + POSITION_INCREMENT_GAP
+            field.lengths[doc_id] = field.lengths.get(doc_id, 0) + len(tokens)
+            field.total_length += len(tokens)
+
+            keyword_path = path + ".keyword"
+            if self._types.get(keyword_path) == "keyword":
+                keyword_field = self._fields[keyword_path]
+                keyword_field.docs.add(doc_id)
+                keyword_field.exact[_keyword(value)].add(doc_id)
+                doc_fields.append((keyword_path, "exact", _keyword(value)))
+        else:
+            key = self._coerce(field_type, value)
+            field.exact[key].add(doc_id)
+            doc_fields.append((path, "exact", key))
+
+    @staticmethod
+    def _coerce(field_type: Optional[str], value: Any):
+        if field_type in NUMERIC_TYPES:
+            if isinstance(value, bool):
+                raise ValueError("Invalid numeric value: %r" % value)
+            return float(value)
+        elif field_type == "boolean":
+            if value in (True, "true"):
+                return True
+            elif value in (False, "false", ""):
+                return False
+            raise ValueError("Invalid boolean value: %r" % value)
+        elif field_type == "date":
+            return _date_millis(_parse_date(value, datetime.timezone.utc))
+        return _keyword(value)
+
+    # Searching.
+
+    def search(self, query: Optional[dict] = None) -> List[Tuple[Any, float]]:
+        """
+        Ids of the documents matching the query body with their scores,
+        sorted by score.
+        """
+        query = (query or {}).get("query")
+        if query is None:
+            scores = dict.fromkeys(self._sources, 1.0)
+        else:
+            scores = self.evaluate(query)
+
+        order = self._order
+        return sorted(
+            scores.items(),
+            key=lambda item: (-item[1], order[item[0]])
+        )
+
+    def evaluate(self, query: dict) -> Scores:
+        """
+        Scores of the documents matching the query clause.
+        """
+        if not query:
+            return dict.fromkeys(self._sources, 1.0)
+        if len(query) != 1:
+            raise ValueError("Query clause must have a single key: %s" % query)
+
+        (query_type, body), = query.items()
+        method = getattr(self, "_evaluate_%s" % query_type, None)
+        if method is None:
+            raise NotImplementedError("Unsupported query: %s" % query_type)
+        return method(body)
+
+    def _evaluate_match_all(self, body: dict) -> Scores:
+        return dict.fromkeys(self._sources, float(body.get("boost", 1.0)))
+
+    def _evaluate_match_none(self, body: dict) -> Scores:
+        return {}
+
+    def _evaluate_bool(self, body: dict) -> Scores:
+        required = None
+        scores = defaultdict(float)
+
+        for clause in self._as_list(body.get("must")):
+            matched = self.evaluate(clause)
+            required = self._intersect(required, matched)
+            if not required:
+                return {}
+            for doc_id, score in matched.items():
+                scores[doc_id] += score
+
+        for clause in self._as_list(body.get("filter")):
+            required = self._intersect(required, self.evaluate(clause))
+            if not required:
+                return {}
+
+        should = [
+            self.evaluate(clause)
+            for clause in self._as_list(body.get("should"))
+        ]
+        if should:
+            minimum_should_match = body.get("minimum_should_match")
+            if minimum_should_match is None:
+                minimum_should_match = 0 if required is not None else 1
+            else:
+                minimum_should_match = _parse_minimum_should_match(
+                    minimum_should_match,
+                    len(should)
+                )
+
+            matches = defaultdict(int)
+            for matched in should:
+                for doc_id, score in matched.items():
+                    matches[doc_id] += 1
+                    scores[doc_id] += score
+            if minimum_should_match > 0:
+                required = self._intersect(required, {
+                    doc_id
+                    for doc_id, count in matches.items()
+                    if count >= minimum_should_match
+                })
+
+        if required is None:
+            required = set(self._sources)
+
+        for clause in self._as_list(body.get("must_not")):
+            required = required - self.evaluate(clause).keys()
+
+        return {doc_id: scores.get(doc_id, 0.0) for doc_id in required}
+
+    def _evaluate_constant_score(self, body: dict) -> Scores:
+        return dict.fromkeys(
+            self.evaluate(body["filter"]),
+            float(body.get("boost", 1.0))
+        )
+
+    def _evaluate_term(self, body: dict) -> Scores:
+        (path, value), = body.items()
+        if isinstance(value, dict):
+            value = value["value"]
+        return self._term_scores(path, value)
+
+    def _evaluate_terms(self, body: dict) -> Scores:
+        body = {
+            key: value
+            for key, value in body.items()
+            if key != "boost"
+        }
+        (path, values), = body.items()
+        if isinstance(values, dict):
+            values = self._lookup_terms(values)
+
+        matched = set()
+        for value in values:
+            matched.update(self._term_docs(path, value))
+        return dict.fromkeys(matched, 1.0)
+
+    def _lookup_terms(self, lookup: dict) -> list:
+        """
+        Values of the `path` of the looked up document.
+        """
+        if self._indices is None:
+            raise NotImplementedError("Terms lookup needs the indices")
+
+        source = self._indices[lookup["index"]].get(str(lookup["id"]))
+        values = [] if source is None else [source]
+        for key in lookup["path"].split("."):
+            values = [
+                item[key]
+                for value in values
+                for item in (value if isinstance(value, list) else [value])
+                if isinstance(item, dict) and key in item
+            ]
+        return [
+            item
+            for value in values
+            for item in (value if isinstance(value, list) else [value])
+        ]
+
+    def _evaluate_ids(self, body: dict) -> Scores:
+        return {
+            doc_id: 1.0
+            for doc_id in map(str, body.get("values", []))
+            if doc_id in self._sources
+        }
+
+    def _evaluate_exists(self, body: dict) -> Scores:
+        path = body["field"]
+        matched = set()
+        for field_path, field in self._fields.items():
+            if field_path == path or field_path.startswith(path + "."):
+                matched.update(field.docs)
+        for nested_path, nested in self._nested.items():
+            if nested_path == path or nested_path.startswith(path + "."):
+                matched.update(
+                    doc_id[0] for doc_id in nested._sources
+                )
+        return dict.fromkeys(matched, 1.0)
+
+    def _evaluate_range(self, body: dict) -> Scores:
+        (path, bounds), = body.items()
+        field_type = self._types.get(path)
+        field = self._fields.get(path)
+        if field is None:
+            return {}
+
+        if field_type == "date":
+            _check_date_format(bounds.get("format"))
+            time_zone = _parse_time_zone(bounds.get("time_zone"))
+
+        checks = []
+        for lookup_expr, bound in bounds.items():
+            if lookup_expr not in ("gte", "gt", "lte", "lt"):
+                continue
+            if bound is None:
+                continue
+            if field_type == "date":
+                bound = _evaluate_date(
+                    bound,
+                    time_zone,
+                    round_up=lookup_expr in ("gt", "lte")
+                )
+            elif _is_date_math(bound):
+                raise NotImplementedError(
+                    "Date math needs the `date` mapping of `%s`: %s"
+                    % (path, bound)
+                )
+            else:
+                bound = self._coerce(field_type, bound)
+            checks.append((lookup_expr, bound))
+
+        matched = set()
+        values = field.exact.items()
+        if field_type == "text":
+            values = field.postings.items()
+        for value, docs in values:
+            if all(
+                self._compare(lookup_expr, value, bound)
+                for lookup_expr, bound in checks
+            ):
+                matched.update(docs)
+        return dict.fromkeys(matched, 1.0)
+
+    @staticmethod
+    def _compare(lookup_expr: str, value, bound) -> bool:
+        try:
+            if lookup_expr == "gte":
+                return value >= bound
+            elif lookup_expr == "gt":
+                return value > bound
+            elif lookup_expr == "lte":
+                return value <= bound
+            return value < bound
+        except TypeError:
+            return False
+
+    def _evaluate_match(self, body: dict) -> Scores:
+        (path, options), = body.items()
+        options = self._as_options(options)
+        return self._match(
+            path,
+            options["query"],
+            operator=options.get("operator", "or"),
+            minimum_should_match=options.get("minimum_should_match")
+        )
+
+    def _evaluate_match_phrase(self, body: dict) -> Scores:
+        (path, options), = body.items()
+        return self._phrase(path, self._as_options(options)["query"])
+
+    def _evaluate_match_phrase_prefix(self, body: dict) -> Scores:
+        (path, options), = body.items()
+        return self._phrase(
+            path,
+            self._as_options(options)["query"],
+            prefix=True
+        )
+
+    def _evaluate_match_bool_prefix(self, body: dict) -> Scores:
+        (path, options), = body.items()
+        options = self._as_options(options)
+        return self._match(
+            path,
+            options["query"],
+            operator=options.get("operator", "or"),
+            minimum_should_match=options.get("minimum_should_match"),
+            prefix=True
+        )
+
+    def _evaluate_multi_match(self, body: dict) -> Scores:
+        query_type = body.get("type", "best_fields")
+        per_field = []
+        for path, boost in self._expand_fields(body.get("fields", ["*"])):
+            if query_type in ("phrase", "phrase_prefix"):
+                scores = self._phrase(
+                    path,
+                    body["query"],
+                    prefix=query_type == "phrase_prefix"
+                )
+            else:
+                scores = self._match(
+                    path,
+                    body["query"],
+                    operator=body.get("operator", "or"),
+                    minimum_should_match=body.get("minimum_should_match"),
+                    prefix=query_type == "bool_prefix"
+                )
+            per_field.append({
+                doc_id: score * boost
+                for doc_id, score in scores.items()
+            })
+
+        result = defaultdict(float)
+        if query_type in ("most_fields", "cross_fields"):
+            for scores in per_field:
+                for doc_id, score in scores.items():
+                    result[doc_id] += score
+            return dict(result)
+
+        tie_breaker = float(body.get("tie_breaker", 0.0))
+        for doc_id in set().union(*per_field) if per_field else ():
+            field_scores = [
+                scores[doc_id]
+                for scores in per_field
+                if doc_id in scores
+            ]
+            best = max(field_scores)
+            result[doc_id] = best + tie_breaker * (sum(field_scores) - best)
+        return dict(result)
+
+    def _evaluate_query_string(self, body: dict) -> Scores:
+        # Only the terms of the query are used, the syntax is not parsed.
+        text = " ".join(
+            word
+            for word in str(body["query"]).split()
+            if word not in _query_string_operators
+        )
+        operator = str(body.get("default_operator", "or")).lower()
+
+        if "fields" in body:
+            fields = body["fields"]
+        else:
+            fields = [body.get("default_field", "*")]
+
+        result = defaultdict(float)
+        for path, boost in self._expand_fields(fields):
+            for doc_id, score in self._match(
+                path,
+                text,
+                operator=operator,
+                minimum_should_match=body.get("minimum_should_match")
+            ).items():
+                result[doc_id] = max(result[doc_id], score * boost)
+        return dict(result)
+
+    def _evaluate_nested(self, body: dict) -> Scores:
+        path = body["path"]
+        nested = self._nested.get(path)
+        if nested is not None:
+            scores = nested.evaluate(body["query"])
+        else:
+            parent_path = next(
+                (
+                    nested_path
+                    for nested_path in self._nested
+                    if path.startswith(nested_path + ".")
+                ),
+                None
+            )
+            if parent_path is None:
+                return {}
+            scores = self._nested[parent_path]._evaluate_nested(body)
+
+        score_mode = body.get("score_mode", "avg")
+        grouped = defaultdict(list)
+        for (doc_id, _), score in scores.items():
+            grouped[doc_id].append(score)
+
+        result = {}
+        for doc_id, doc_scores in grouped.items():
+            if score_mode == "max":
+                result[doc_id] = max(doc_scores)
+            elif score_mode == "min":
+                result[doc_id] = min(doc_scores)
+            elif score_mode == "sum":
+                result[doc_id] = sum(doc_scores)
+            elif score_mode == "none":
+                result[doc_id] = 0.0
+            else:
+                result[doc_id] = sum(doc_scores) / len(doc_scores)
+        return result
+
+    # Helpers.
+
+    @staticmethod
+    def _as_list(clauses) -> list:
+        if clauses is None:
+            return []
+        if isinstance(clauses, dict):
+            return [clauses]
+        return clauses
+
+    @staticmethod
+    def _as_options(options) -> dict:
+        if isinstance(options, dict):
+            return options
+        return {"query": options}
+
+    @staticmethod
+    def _intersect(required: Optional[Set], matched) -> Set:
+        if required is None:
+            return set(matched)
+        return required.intersection(matched)
+
+    def _expand_fields(self, fields: List[str]) -> List[Tuple[str, float]]:
+        expanded = []
+        for field in fields:
+            path, _, boost = field.partition("^")
+            boost = float(boost) if boost else 1.0
+            if "*" in path:
+                expanded.extend(
+                    (field_path, boost)
+                    for field_path, field_type in self._types.items()
+                    if field_type == "text" and fnmatchcase(field_path, path)
+                )
+            else:
+                expanded.append((path, boost))
+        return expanded
+
+    def _term_docs(self, path: str, value) -> Set:
+        field = self._fields.get(path)
+        if field is None:
+            return set()
+
+        field_type = self._types.get(path)
+        if field_type == "text":
+            return set(field.postings.get(_keyword(value), ()))
+        try:
+            key = self._coerce(field_type, value)
+        except ValueError:
+            return set()
+        return set(field.exact.get(key, ()))
+
+    def _term_scores(self, path: str, value) -> Scores:
+        if self._types.get(path) == "text":
+            return self._bm25(path, [_keyword(value)])
+        return dict.fromkeys(self._term_docs(path, value), 1.0)
+
+    def _bm25(self, path: str, tokens: List[str]) -> Scores:
+        """
+        Sum of BM25 scores of the tokens for every matched document.
+        """
+        field = self._fields.get(path)
+        if field is None:
+            return {}
+
+        count = len(field.lengths) or 1
+        average_length = (field.total_length / count) or 1.0
+        scores = defaultdict(float)
+        for token in tokens:
+            postings = field.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(
+                1 + (count - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            for doc_id, positions in postings.items():
+                frequency = len(positions)
+                length = field.lengths.get(doc_id, 0)
+                scores[doc_id] += idf * frequency * (K1 + 1) / (
+                    frequency + K1 * (1 - B + B * length / average_length)
+                )
+        return dict(scores)
+
+    def _expand_prefix(self, path: str, prefix: str) -> List[str]:
+        field = self._fields.get(path)
+        if field is None:
+            return []
+        return [
+            token
+            for token in field.postings
+            if token.startswith(prefix)
+        ]
+
+    def _match(self,
+               path: str,
+               text,
+               operator: str = "or",
+               minimum_should_match=None,
+               prefix: bool = False) -> Scores:
+        if self._types.get(path) != "text":
+            return self._term_scores(path, text)
+
+        tokens = analyze(text)
+        if not tokens:
+            return {}
+
+        token_groups = [[token] for token in tokens]
+        if prefix:
+            token_groups[-1] = self._expand_prefix(path, tokens[-1])
+
+        matches = defaultdict(int)
+        scores = defaultdict(float)
+        for group in token_groups:
+            group_scores = self._bm25(path, group)
+            for doc_id, score in group_scores.items():
+                matches[doc_id] += 1
+                scores[doc_id] += score
+
+        if str(operator).lower() == "and":
+            required = len(token_groups)
+        else:
+            required = max(1, _parse_minimum_should_match(
+                minimum_should_match,
+                len(token_groups)
+            ))
+        return {
+            doc_id: score
+            for doc_id, score in scores.items()
+            if matches[doc_id] >= required
+        }
+
+    def _phrase(self, path: str, text, prefix: bool = False) -> Scores:
+        if self._types.get(path) != "text":
+            return self._term_scores(path, text)
+
+        field = self._fields.get(path)
+        tokens = analyze(text)
+        if field is None or not tokens:
+            return {}
+
+        last_tokens = [tokens[-1]]
+        if prefix:
+            last_tokens = self._expand_prefix(path, tokens[-1])
+
+        result = {}
+        scores = self._bm25(path, tokens[:-1] + last_tokens)
+        for doc_id in scores:
+            positions = [
+                set(field.postings.get(token, {}).get(doc_id, ()))
+                for token in tokens[:-1]
+            ]
+            last_positions = set()
+            for token in last_tokens:
+                last_positions.update(
+                    field.postings.get(token, {}).get(doc_id, ())
+                )
+            positions.append(last_positions)
+
+            if any(
+                all(
+                    start + offset in token_positions
+                    for offset, token_positions in enumerate(positions)
+                )
+                for start in positions[0]
+            ):
+                result[doc_id] = scores[doc_id]
+        return result
+
+
+class _MemoryIndicesClient:
+
+    def __init__(self, client: "MemoryElasticsearch"):
+        self._client = client
+
+    def create(self,
+               index: str,
+               mappings: Optional[dict] = None,
+               body: Optional[dict] = None,
+               ignore=None,
+               **kwargs):
+        if body is not None and mappings is None:
+            mappings = body.get("mappings")
+        if index in self._client.indices_by_name:
+            if 400 in self._ignored(ignore):
+                return {"acknowledged": False}
+            raise ValueError("Index already exists: %s" % index)
+        self._client.indices_by_name[index] = MemoryIndex(
+            mappings,
+            indices=self._client.indices_by_name
+        )
+        return {"acknowledged": True, "index": index}
+
+    def delete(self, index: str, ignore=None, **kwargs):
+        if index not in self._client.indices_by_name:
+            if 404 in self._ignored(ignore):
+                return {"acknowledged": False}
+            raise KeyError("Index not found: %s" % index)
+        del self._client.indices_by_name[index]
+        return {"acknowledged": True}
+
+    def exists(self, index: str, **kwargs) -> bool:
+        return index in self._client.indices_by_name
+
+    @staticmethod
+    def _ignored(ignore) -> tuple:
+        if ignore is None:
+            return ()
+        if isinstance(ignore, int):
+            return (ignore,)
+        return tuple(ignore)
+
+
+class MemoryElasticsearch:
+    """
+    Subset of the Elasticsearch client API backed by memory indices.
+    """
+
+    def __init__(self):
+        self.indices_by_name = {}
+        self.indices = _MemoryIndicesClient(self)
+
+    def index(self,
+              index: str,
+              document: Optional[dict] = None,
+              id: Optional[str] = None,
+              body: Optional[dict] = None,
+              **kwargs):
+        memory_index = self.indices_by_name.get(index)
+        if memory_index is None:
+            memory_index = self.indices_by_name[index] = MemoryIndex(
+                indices=self.indices_by_name
+            )
+        if document is None:
+            document = body
+        if id is None:
+            id = str(len(memory_index))
+        memory_index.add(str(id), document)
+        return {"_index": index, "_id": str(id), "result": "created"}
+
+    def search(self,
+               index: str,
+               query: Optional[dict] = None,
+               body: Optional[dict] = None,
+               size: int = 10,
+               from_: int = 0,
+               **kwargs):
+        if body is not None:
+            query = body.get("query", query)
+            size = body.get("size", size)
+            from_ = body.get("from", from_)
+
+        memory_index = self.indices_by_name[index]
+        hits = memory_index.search(
+            {"query": query} if query is not None else None
+        )
+        return {
+            "hits": {
+                "total": {"value": len(hits), "relation": "eq"},
+                "max_score": hits[0][1] if hits else None,
+                "hits": [
+                    {
+                        "_index": index,
+                        "_id": doc_id,
+                        "_score": score,
+                        "_source": memory_index.get(doc_id),
+                    }
+                    for doc_id, score in hits[from_:from_ + size]
+                ],
+            }
+        }
+
+    def close(self):
+        pass
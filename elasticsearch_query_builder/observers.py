@@ -0,0 +1,99 @@
+import threading
+from typing import Dict, Optional
+
+
+class QueryBuilderObserver:
+    """
+    Observer of the query building stages.
+
+    Stages are `normalize`, `hook` and `build` for every field
+    and `common` for the common query and `optimize` for optimization
+    of the optimized builders, whose field query name is None.
+    The size of a `build` stage is the length of the encoded field query.
+    """
+    __slots__ = ()
+
+    def on_start(self,
+                 builder,
+                 stage: str,
+                 field_query_name: Optional[str]):
+        pass
+
+    def on_end(self,
+               builder,
+               stage: str,
+               field_query_name: Optional[str],
+               elapsed: float,
+               size: Optional[int] = None):
+        pass
+
+
+class StageStats:
+    __slots__ = (
+        "count",
+        "total_time",
+        "total_size",
+    )
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.total_size = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total_time": self.total_time,
+            "total_size": self.total_size,
+        }
+
+
+class AggregatingObserver(QueryBuilderObserver):
+    """
+    Counts the stages and their cumulative time
+    per builder class and per field.
+    """
+    __slots__ = (
+        "_stats",
+        "_lock",
+    )
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def on_end(self,
+               builder,
+               stage: str,
+               field_query_name: Optional[str],
+               elapsed: float,
+               size: Optional[int] = None):
+        key = (type(builder).__qualname__, field_query_name, stage)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = StageStats()
+            stats.count += 1
+            stats.total_time += elapsed
+            if size is not None:
+                stats.total_size += size
+
+    def get_stats(self) -> Dict[str, Dict[Optional[str], Dict[str, dict]]]:
+        """
+        Snapshot of the stats: builder class -> field -> stage -> stats.
+        """
+        result = {}
+        with self._lock:
+            for (builder_name, field_query_name, stage), stats in (
+                self._stats.items()
+            ):
+                result.setdefault(
+                    builder_name, {}
+                ).setdefault(
+                    field_query_name, {}
+                )[stage] = stats.as_dict()
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
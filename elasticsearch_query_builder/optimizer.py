@@ -0,0 +1,301 @@
+"""
+Rewrite of the built query body to a smaller one,
+matching the same documents.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+_occurrences = ("must", "filter", "should", "must_not")
+
+
+def optimize_query(query: dict,
+                   max_terms_count: Optional[int] = None) -> dict:
+    """
+    Optimize the query body:
+
+    - flatten `bool` clauses nested in `must`, `filter`, `should`
+      and `must_not` of the same meaning;
+    - drop empty `bool` clauses from `must` and `filter`;
+    - dedupe identical clauses;
+    - merge `term` and `terms` clauses on the same field into one `terms`
+      in `should` and `must_not`, unless the merged clause would have
+      more than `max_terms_count` values;
+    - unwrap `bool` with a single clause.
+
+    Scores of the matched documents may change.
+    """
+    if not query or "query" not in query:
+        return query
+
+    clause = optimize_clause(
+        query["query"],
+        max_terms_count=max_terms_count
+    )
+    if _is_empty_bool(clause):
+        clause = {"match_all": {}}
+    return {**query, "query": clause}
+
+
+def optimize_clause(clause: Any,
+                    scoring: bool = True,
+                    max_terms_count: Optional[int] = None) -> Any:
+    """
+    Optimize the query clause. Clauses of a non-scoring context
+    (`filter`, `must_not`) are also unwrapped from `filter`-only bools.
+    """
+    if not isinstance(clause, dict) or len(clause) != 1:
+        return clause
+
+    (query_type, body), = clause.items()
+    if query_type == "bool" and isinstance(body, dict):
+        return _optimize_bool(body, scoring, max_terms_count)
+    elif query_type == "nested" and isinstance(body, dict) and (
+        "query" in body
+    ):
+        return {
+            "nested": {
+                **body,
+                "query": optimize_clause(
+                    body["query"],
+                    scoring,
+                    max_terms_count
+                ),
+            }
+        }
+    elif query_type == "constant_score" and isinstance(body, dict) and (
+        "filter" in body
+    ):
+        return {
+            "constant_score": {
+                **body,
+                "filter": optimize_clause(
+                    body["filter"],
+                    scoring=False,
+                    max_terms_count=max_terms_count
+                ),
+            }
+        }
+    return clause
+
+
+def _as_list(clauses) -> list:
+    if clauses is None:
+        return []
+    if isinstance(clauses, list):
+        return clauses
+    return [clauses]
+
+
+def _is_empty_bool(clause) -> bool:
+    return clause == {"bool": {}}
+
+
+def _is_default_minimum_should_match(value) -> bool:
+    return value is None or str(value) == "1"
+
+
+def _get_plain_bool(clause) -> Optional[Dict[str, list]]:
+    """
+    Body of the `bool` clause without options, e.g. `boost`.
+    """
+    if not isinstance(clause, dict) or len(clause) != 1:
+        return None
+    body = clause.get("bool")
+    if not isinstance(body, dict) or set(body) - set(_occurrences):
+        return None
+    return {
+        occurrence: _as_list(body.get(occurrence))
+        for occurrence in _occurrences
+    }
+
+
+def _optimize_bool(body: dict,
+                   scoring: bool,
+                   max_terms_count: Optional[int]):
+    options = {}
+    clauses = {occurrence: [] for occurrence in _occurrences}
+    for key, value in body.items():
+        if key not in clauses:
+            options[key] = value
+            continue
+        clause_scoring = scoring and key in ("must", "should")
+        clauses[key] = [
+            optimize_clause(clause, clause_scoring, max_terms_count)
+            for clause in _as_list(value)
+        ]
+    default_should = _is_default_minimum_should_match(
+        options.get("minimum_should_match")
+    )
+
+    # Required clauses can't be moved or dropped while the bool
+    # has `should` clauses, it would make them optional or required.
+    if not clauses["should"]:
+        for occurrence in ("must", "filter"):
+            if clauses[occurrence]:
+                clauses[occurrence] = _flatten_required(clauses, occurrence)
+        clauses["must_not"] = _dedupe(clauses["must_not"])
+    elif default_should:
+        # Otherwise every matched clause counts.
+        clauses["should"] = _merge_terms(
+            _dedupe(_flatten_alternatives(clauses["should"])),
+            max_terms_count
+        )
+
+    clauses["must"] = _dedupe(clauses["must"])
+    clauses["filter"] = _dedupe(clauses["filter"])
+    if clauses["must_not"]:
+        clauses["must_not"] = _merge_terms(
+            _dedupe(_flatten_alternatives(clauses["must_not"])),
+            max_terms_count
+        )
+
+    if not options or (default_should and set(options) == {
+        "minimum_should_match"
+    }):
+        single = _get_single_clause(clauses, scoring)
+        if single is not None:
+            return single
+
+    optimized = {
+        occurrence: clauses[occurrence]
+        for occurrence in _occurrences
+        if clauses[occurrence]
+    }
+    if optimized:
+        optimized.update(options)
+    return {"bool": optimized}
+
+
+def _flatten_required(clauses: Dict[str, list], occurrence: str) -> list:
+    result = []
+    for clause in clauses[occurrence]:
+        if _is_empty_bool(clause):
+            continue
+
+        child = _get_plain_bool(clause)
+        if child is None or child["should"]:
+            result.append(clause)
+            continue
+
+        result.extend(child["must"])
+        if occurrence == "must":
+            clauses["filter"] = clauses["filter"] + child["filter"]
+        else:
+            # Scores are ignored in `filter`, so child `must` is a filter.
+            result.extend(child["filter"])
+        clauses["must_not"] = clauses["must_not"] + child["must_not"]
+    return result
+
+
+def _flatten_alternatives(clauses: list) -> list:
+    """
+    Lift the clauses of `should`-only bools.
+    """
+    result = []
+    for clause in clauses:
+        child = _get_plain_bool(clause)
+        if child is not None and child["should"] and not (
+            child["must"] or child["filter"] or child["must_not"]
+        ):
+            result.extend(child["should"])
+        else:
+            result.append(clause)
+    return result
+
+
+def _dedupe(clauses: list) -> list:
+    if len(clauses) < 2:
+        return clauses
+
+    # Clauses are compared only with the ones of the same type and field.
+    buckets = {}
+    result = []
+    for clause in clauses:
+        key = None
+        if isinstance(clause, dict) and len(clause) == 1:
+            (query_type, body), = clause.items()
+            key = query_type
+            if isinstance(body, dict) and body:
+                key = (query_type, next(iter(body)))
+
+        bucket = buckets.setdefault(key, [])
+        if clause not in bucket:
+            bucket.append(clause)
+            result.append(clause)
+    return result
+
+
+def _get_term_values(clause) -> Optional[Tuple[str, list]]:
+    if not isinstance(clause, dict) or len(clause) != 1:
+        return None
+
+    (query_type, body), = clause.items()
+    if not isinstance(body, dict) or len(body) != 1:
+        return None
+    (field_name, value), = body.items()
+
+    if query_type == "term":
+        if isinstance(value, dict):
+            if set(value) != {"value"}:
+                return None
+            value = value["value"]
+        if isinstance(value, (list, dict)):
+            return None
+        return field_name, [value]
+    elif query_type == "terms" and isinstance(value, list):
+        return field_name, value
+    return None
+
+
+def _merge_terms(clauses: list, max_terms_count: Optional[int]) -> list:
+    """
+    Merge the alternative `term` and `terms` clauses on the same field.
+    """
+    if len(clauses) < 2:
+        return clauses
+
+    by_field = {}
+    for clause in clauses:
+        term_values = _get_term_values(clause)
+        if term_values is not None:
+            by_field.setdefault(term_values[0], []).append(term_values[1])
+
+    merged = {}
+    for field_name, values_list in by_field.items():
+        if len(values_list) == 1:
+            continue
+
+        values = []
+        seen = set()
+        for field_values in values_list:
+            for value in field_values:
+                key = (type(value), value)
+                if key not in seen:
+                    seen.add(key)
+                    values.append(value)
+        if max_terms_count is None or len(values) <= max_terms_count:
+            merged[field_name] = values
+
+    result = []
+    for clause in clauses:
+        term_values = _get_term_values(clause)
+        if term_values is None or term_values[0] not in merged:
+            result.append(clause)
+            continue
+
+        values = merged[term_values[0]]
+        if values is not None:
+            result.append({"terms": {term_values[0]: values}})
+            # Other clauses on the field are merged into the first one.
+            merged[term_values[0]] = None
+    return result
+
+
+def _get_single_clause(clauses: Dict[str, List], scoring: bool):
+    count = sum(len(value) for value in clauses.values())
+    if count != 1:
+        return None
+    if clauses["must"] or clauses["should"]:
+        return (clauses["must"] or clauses["should"])[0]
+    if clauses["filter"] and not scoring:
+        return clauses["filter"][0]
+    return None
@@ -0,0 +1,274 @@
+"""
+Local reverse matching of stored queries against incoming documents.
+
+Every stored query is indexed by one of its required `term`, `terms`,
+`ids` or `exists` constraints, so a document is checked only against
+the queries whose constraint it satisfies. The candidates are verified
+by the in-memory engine, the queries without constraints are evaluated
+once per batch of documents.
+"""
+from collections import defaultdict
+from typing import (
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple
+)
+
+from .memory import MemoryIndex, analyze
+
+Key = Tuple
+
+
+def _key(value) -> Hashable:
+    """
+    Loose key of the value, matching the stored and the document values
+    of different types, the candidates are verified anyway.
+    """
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = str(value)
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+class Percolator:
+    """
+    Stored queries matched against the documents.
+
+    Queries without an extractable required constraint are checked
+    against every document.
+    """
+
+    def __init__(self, mappings: Optional[dict] = None):
+        self._mappings = mappings
+        self._queries = {}
+        self._keys = {}
+        self._by_key = defaultdict(set)
+        self._unindexed = set()
+
+    def __len__(self):
+        return len(self._queries)
+
+    def __contains__(self, query_id):
+        return query_id in self._queries
+
+    def add(self, query_id: Hashable, query: dict):
+        """
+        Store the query body, e.g. `query` of a builder,
+        replacing the one with the same id.
+        """
+        if query_id in self._queries:
+            self.remove(query_id)
+
+        clause = query.get("query") or {"match_all": {}}
+        self._queries[query_id] = clause
+
+        keys = self._select_keys(clause)
+        self._keys[query_id] = keys
+        if keys is None:
+            self._unindexed.add(query_id)
+        else:
+            for key in keys:
+                self._by_key[key].add(query_id)
+
+    def remove(self, query_id: Hashable):
+        del self._queries[query_id]
+        keys = self._keys.pop(query_id)
+        if keys is None:
+            self._unindexed.discard(query_id)
+            return
+        for key in keys:
+            query_ids = self._by_key[key]
+            query_ids.discard(query_id)
+            if not query_ids:
+                del self._by_key[key]
+
+    def percolate(self, document: dict, id_field: str = "_id") -> List:
+        """
+        Ids of the stored queries matching the document.
+        """
+        (_, query_ids), = self.percolate_many([document], id_field=id_field)
+        return query_ids
+
+    def percolate_many(self,
+                       documents: Iterable[dict],
+                       batch_size: int = 1000,
+                       id_field: str = "_id") -> Iterator[Tuple[dict, List]]:
+        """
+        Pairs of the document and ids of the stored queries matching it,
+        the documents are consumed lazily by batches.
+        """
+        if batch_size < 1:
+            raise ValueError("Invalid batch_size: %s" % batch_size)
+
+        batch = {}
+        for position, document in enumerate(documents):
+            doc_id = document.get(id_field)
+            doc_id = str(position) if doc_id is None else str(doc_id)
+            if doc_id in batch or len(batch) >= batch_size:
+                yield from self._percolate_batch(batch, id_field)
+                batch = {}
+            batch[doc_id] = document
+        if batch:
+            yield from self._percolate_batch(batch, id_field)
+
+    def _percolate_batch(self,
+                         batch: Dict[str, dict],
+                         id_field: str) -> Iterator[Tuple[dict, List]]:
+        matches = defaultdict(list)
+        sources = {}
+        for doc_id, document in batch.items():
+            source = sources[doc_id] = {
+                name: value
+                for name, value in document.items()
+                if name != id_field
+            }
+            candidates = set()
+            for key in self._document_keys(doc_id, source):
+                candidates.update(self._by_key.get(key, ()))
+            if not candidates:
+                continue
+
+            # A few candidates are verified against the document alone.
+            index = MemoryIndex(self._mappings)
+            index.add(doc_id, source)
+            matches[doc_id].extend(
+                query_id
+                for query_id in candidates
+                if index.evaluate(self._queries[query_id])
+            )
+
+        if self._unindexed:
+            # Queries without constraints are evaluated once per batch.
+            index = MemoryIndex(self._mappings)
+            for doc_id, source in sources.items():
+                index.add(doc_id, source)
+            for query_id in self._unindexed:
+                for doc_id in index.evaluate(self._queries[query_id]):
+                    matches[doc_id].append(query_id)
+
+        for doc_id, document in batch.items():
+            yield document, matches.get(doc_id, [])
+
+    # Extraction of the constraints.
+
+    def _select_keys(self, clause: dict) -> Optional[Set[Key]]:
+        """
+        The most selective required constraint, as the keys
+        of which at least one is in every matching document.
+        """
+        constraints = self._get_constraints(clause)
+        if not constraints:
+            return None
+        return min(
+            constraints,
+            key=lambda keys: (
+                any(key[0] == "exists" for key in keys),
+                len(keys)
+            )
+        )
+
+    def _get_constraints(self, clause: dict) -> List[Set[Key]]:
+        if len(clause) != 1:
+            return []
+
+        (query_type, body), = clause.items()
+        if query_type == "term":
+            (path, value), = body.items()
+            if isinstance(value, dict):
+                value = value.get("value")
+            return [{("term", path, _key(value))}]
+        elif query_type == "terms":
+            body = {
+                name: value
+                for name, value in body.items()
+                if name != "boost"
+            }
+            if len(body) != 1:
+                return []
+            (path, values), = body.items()
+            if not isinstance(values, list) or not values:
+                return []
+            return [{("term", path, _key(value)) for value in values}]
+        elif query_type == "ids":
+            values = body.get("values")
+            if not values:
+                return []
+            return [{("id", str(value)) for value in values}]
+        elif query_type == "exists":
+            return [{("exists", body["field"])}]
+        elif query_type == "nested":
+            return self._get_constraints(body["query"])
+        elif query_type == "constant_score":
+            return self._get_constraints(body["filter"])
+        elif query_type == "bool":
+            return self._get_bool_constraints(body)
+        return []
+
+    def _get_bool_constraints(self, body: dict) -> List[Set[Key]]:
+        constraints = []
+        required = []
+        for occurrence in ("must", "filter"):
+            clauses = body.get(occurrence) or []
+            if isinstance(clauses, dict):
+                clauses = [clauses]
+            required.extend(clauses)
+        for clause in required:
+            constraints.extend(self._get_constraints(clause))
+
+        should = body.get("should") or []
+        if isinstance(should, dict):
+            should = [should]
+        minimum_should_match = body.get("minimum_should_match")
+        if should and not required and minimum_should_match in (None, 1):
+            # One of the clauses must match, so one of their keys must too.
+            keys = set()
+            for clause in should:
+                clause_keys = self._select_keys(clause)
+                if clause_keys is None:
+                    return constraints
+                keys.update(clause_keys)
+            constraints.append(keys)
+        return constraints
+
+    @staticmethod
+    def _document_keys(doc_id: str, source: dict) -> Set[Key]:
+        keys = {("id", doc_id)}
+
+        def visit(value, path):
+            if isinstance(value, dict):
+                if path:
+                    keys.add(("exists", path))
+                for name, item in value.items():
+                    visit(item, path + "." + name if path else name)
+            elif isinstance(value, list):
+                for item in value:
+                    visit(item, path)
+            elif value is not None:
+                keys.add(("exists", path))
+                keys.add(("term", path, _key(value)))
+                if isinstance(value, str):
+                    keys.add(("exists", path + ".keyword"))
+                    keys.add(("term", path + ".keyword", _key(value)))
+                    for token in analyze(value):
+                        keys.add(("term", path, _key(token)))
+
+        visit(source, "")
+
+        # Exists of the objects matches their fields.
+        for key in list(keys):
+            if key[0] == "exists":
+                path = key[1]
+                while "." in path:
+                    path = path.rsplit(".", 1)[0]
+                    keys.add(("exists", path))
+        return keys
@@ -2,8 +2,8 @@ import os
 
 import dotenv
 import pytest
-from elasticsearch import Elasticsearch
 
+from elasticsearch_query_builder.memory import MemoryElasticsearch
 from .builder import ElasticSearchQueryTestBuilder
 
 dotenv.load_dotenv("./.env")
@@ -20,13 +20,19 @@ def pytest_configure(config):
 
 @pytest.fixture
 def elasticsearch_client(request):
-    client = Elasticsearch(
-        os.environ["ELASTICSEARCH_URL"],
-        http_auth=(
-            os.environ["ELASTICSEARCH_USERNAME"],
-            os.environ["ELASTICSEARCH_PASSWORD"]
+    if os.environ["ELASTICSEARCH_URL"].startswith("memory://"):
+        # Offline run against the in-memory engine.
+        client = MemoryElasticsearch()
+    else:
+        from elasticsearch import Elasticsearch
+
+        client = Elasticsearch(
+            os.environ["ELASTICSEARCH_URL"],
+            http_auth=(
+                os.environ["ELASTICSEARCH_USERNAME"],
+                os.environ["ELASTICSEARCH_PASSWORD"]
+            )
         )
-    )
 
     index_payload = request.node.get_closest_marker("index_payload")
     if index_payload:
@@ -0,0 +1,746 @@
+import abc
+import asyncio
+import io
+import json
+import time
+
+import pytest
+
+from elasticsearch_query_builder import fields as builder_fields
+from elasticsearch_query_builder.builders import ElasticsearchQueryBuilder
+from elasticsearch_query_builder.cache import QueryCache
+from elasticsearch_query_builder.fields.abstract import encode_value
+from elasticsearch_query_builder.memory import MemoryIndex
+from elasticsearch_query_builder.observers import AggregatingObserver
+
+
+class TestCaseDeclaredFields:
+
+    def test_registry(self):
+        class Builder(ElasticsearchQueryBuilder):
+            term_field = builder_fields.TermElasticField(
+                field_name="term_field_test",
+                input_type=int
+            )
+            not_a_field = "value"
+
+        assert dict(Builder._declared_fields) == {
+            "term_field": Builder.term_field
+        }
+
+        try:
+            Builder._declared_fields["other"] = Builder.term_field
+        except TypeError:
+            assert True
+        else:
+            assert False
+
+    def test_inheritance(self):
+        class ParentBuilder(ElasticsearchQueryBuilder):
+            term_field = builder_fields.TermElasticField(
+                field_name="term_field_test",
+                input_type=int
+            )
+            exists_field = builder_fields.ExistsElasticField(
+                field_name="exists_field_test"
+            )
+
+        class ChildBuilder(ParentBuilder):
+            term_field = builder_fields.TermElasticField(
+                field_name="child_term_field_test",
+                input_type=str
+            )
+            exists_field = None
+
+        assert set(ParentBuilder._declared_fields) == {
+            "term_field",
+            "exists_field"
+        }
+        assert dict(ChildBuilder._declared_fields) == {
+            "term_field": ChildBuilder.term_field
+        }
+
+    def test_assign_after_creation(self):
+        class ParentBuilder(ElasticsearchQueryBuilder):
+            pass
+
+        class ChildBuilder(ParentBuilder):
+            pass
+
+        ParentBuilder.term_field = builder_fields.TermElasticField(
+            field_name="term_field_test",
+            input_type=int
+        )
+        assert "term_field" in ChildBuilder._declared_fields
+
+        query = ChildBuilder({"term_field": "1"}).query
+        assert query["query"]["bool"]["must"] == [
+            {"term": {"term_field_test": 1}}
+        ]
+
+        del ParentBuilder.term_field
+        assert "term_field" not in ChildBuilder._declared_fields
+        assert ChildBuilder({"term_field": "1"}).query == {}
+
+    def test_abc(self):
+        class Builder(ElasticsearchQueryBuilder, abc.ABC):
+            term_field = builder_fields.TermElasticField(
+                field_name="term_field_test",
+                input_type=int
+            )
+
+        assert Builder({"term_field": "1"}).query == {
+            "query": {"bool": {"must": [{"term": {"term_field_test": 1}}]}}
+        }
+
+    def test_invalidation(self):
+        class Builder(ElasticsearchQueryBuilder):
+            compiled = True
+            query_cache = QueryCache(maxsize=8)
+            term_field = builder_fields.TermElasticField(
+                field_name="term_field_test",
+                input_type=int
+            )
+
+        Builder({"term_field": "1"}).query
+        compiled_query = Builder._compiled_query
+        declared_fields = Builder._declared_fields
+
+        # Unrelated attributes keep the registry, code and cache.
+        Builder.observer = None
+        Builder.other = "value"
+        assert Builder._compiled_query is compiled_query
+        assert Builder._declared_fields is declared_fields
+        assert Builder.query_cache.info().size == 1
+
+        Builder.filter_context = True
+        assert Builder._compiled_query is None
+        assert Builder.query_cache.info().size == 0
+
+        Builder({"term_field": "1"}).query
+        Builder.term_field = builder_fields.TermElasticField(
+            field_name="other_term_field_test",
+            input_type=int
+        )
+        assert Builder._compiled_query is None
+        assert Builder.query_cache.info().size == 0
+        assert Builder._declared_fields is not declared_fields
+        assert Builder({"term_field": "1"}).query == {
+            "query": {
+                "constant_score": {
+                    "filter": {
+                        "bool": {
+                            "filter": [
+                                {"term": {"other_term_field_test": 1}}
+                            ]
+                        }
+                    }
+                }
+            }
+        }
+
+    def test_assert_instance_field(self):
+        class Builder(ElasticsearchQueryBuilder):
+            term_field = builder_fields.TermElasticField(
+                field_name="term_field_test",
+                input_type=int
+            )
+            exists_field = builder_fields.ExistsElasticField(
+                field_name="exists_field_test"
+            )
+
+            def _assert_instance_field(self, field):
+                assert isinstance(field, builder_fields.ExistsElasticField)
+
+        assert Builder({"exists_field": True}).query
+        with pytest.raises(AssertionError):
+            Builder({"term_field": "1"})
+
+    def test_unknown_params(self):
+        class Builder(ElasticsearchQueryBuilder):
+            term_field = builder_fields.TermElasticField(
+                field_name="term_field_test",
+                input_type=int
+            )
+
+        query = Builder({
+            "query": "1",
+            "_possible_logic_operators": "1",
+            "unknown": "1",
+        }).query
+        assert query == {}
+
+
+class TestCaseBuildMany:
+
+    class Builder(ElasticsearchQueryBuilder):
+        term_field = builder_fields.TermElasticField(
+            field_name="term_field_test",
+            input_type=int
+        )
+        match_field = builder_fields.MatchElasticField(
+            field_name="match_field_test",
+            input_type=str
+        )
+
+        def get_additional_match_field_queries(self):
+            return [{"term": {"term_field_test": len(self._params)}}]
+
+    class CompiledBuilder(Builder):
+        compiled = True
+
+    params_list = [
+        {"term_field": "1", "match_field": "text"},
+        {"match_field": "text", "unknown": "1"},
+        None,
+        {"term_field": "test-text"},
+        {"term_field": 2},
+    ]
+
+    def test_raise(self):
+        for cls in (self.Builder, self.CompiledBuilder):
+            try:
+                cls.build_many(self.params_list)
+            except ValueError as e:
+                assert str(e) == (
+                    "Invalid input for `term_field`: expected int"
+                )
+            else:
+                assert False
+
+            queries = cls.build_many(
+                [self.params_list[0], self.params_list[1]],
+                chunk_size=1
+            )
+            assert queries == [
+                cls(dict(self.params_list[0])).query,
+                cls(dict(self.params_list[1])).query,
+            ]
+
+    def test_skip(self):
+        for cls in (self.Builder, self.CompiledBuilder):
+            queries = cls.build_many(self.params_list, errors="skip")
+            assert queries == [
+                cls(self.params_list[0]).query,
+                cls(self.params_list[1]).query,
+                {},
+                cls(self.params_list[4]).query,
+            ]
+
+    def test_collect(self):
+        queries = self.Builder.build_many(
+            self.params_list,
+            errors="collect",
+            lazy=True,
+            chunk_size=2
+        )
+        assert not isinstance(queries, list)
+
+        queries = list(queries)
+        assert len(queries) == 5
+        assert queries[3].index == 3
+        assert queries[3].params == {"term_field": "test-text"}
+        assert str(queries[3].error) == (
+            "Invalid input for `term_field`: expected int"
+        )
+        assert isinstance(queries[3].error.__cause__, ValueError)
+        assert queries[4] == {
+            "query": {
+                "bool": {
+                    "must": [
+                        {"term": {"term_field_test": 2}}
+                    ]
+                }
+            }
+        }
+
+    def test_query_cache(self):
+        for cls in (self.Builder, self.CompiledBuilder):
+            cls = type("CachedBuilder", (cls,), {"query_cache": QueryCache()})
+            queries = cls.build_many([{"term_field": "1"}, {"term_field": 1}])
+            assert queries[0] == queries[1]
+            info = cls.query_cache.info()
+            assert (info.hits, info.misses) == (1, 1)
+
+            cls.build_many([{"term_field": 1}])
+            assert cls.query_cache.info().hits == 2
+
+    def test_observer(self):
+        for cls in (self.Builder, self.CompiledBuilder):
+            observer = AggregatingObserver()
+            cls = type("ObservedBuilder", (cls,), {"observer": observer})
+            queries = cls.build_many(
+                [{"term_field": "1"}, {"term_field": "a"}],
+                errors="collect"
+            )
+            assert str(queries[1].error) == (
+                "Invalid input for `term_field`: expected int"
+            )
+
+            stats = observer.get_stats()["ObservedBuilder"]["term_field"]
+            assert stats["normalize"]["count"] == 2
+            assert stats["build"]["count"] == 1
+            assert queries[0] == self.Builder({"term_field": "1"}).query
+
+
+class WildcardElasticField(builder_fields.TermElasticField):
+    # Value is transformed by the query.
+    def _get_query(self, value, field_query_name: str, *args):
+        return {"wildcard": {self._field_name: "%s*" % value}}
+
+
+class ThresholdElasticField(builder_fields.TermElasticField):
+    # Query depends on the value.
+    def _get_query(self, value, field_query_name: str, *args):
+        if value > 10:
+            return {"range": {self._field_name: {"gt": 10}}}
+        return {"term": {self._field_name: value}}
+
+
+class TestCaseQueryBytes:
+
+    class Builder(ElasticsearchQueryBuilder):
+        term_field = builder_fields.TermElasticField(
+            field_name="term_field_test",
+            input_type=str
+        )
+        terms_field = builder_fields.TermsElasticField(
+            field_name="terms_field_test"
+        )
+        exists_field = builder_fields.ExistsElasticField(
+            field_name="exists_field_test"
+        )
+        match_field = builder_fields.MatchElasticField(
+            field_name="match_field_test",
+            input_type=str,
+            operator="and"
+        )
+        multi_match_field = builder_fields.MultiMatchElasticField(
+            query_type="best_fields",
+            fields=["field_1", "field_2"],
+            fuzziness="AUTO"
+        )
+        query_string_field = builder_fields.QueryStringElasticField(
+            default_field="query_string_field_test",
+            logic_operator="should"
+        )
+        range_field = builder_fields.RangeElasticField(
+            field_name="range_field_test",
+            input_type=float,
+            lookup_expr="lt",
+            logic_operator="filter"
+        )
+        nested_field = builder_fields.NestedElasticField(
+            path="rootpath",
+            child=builder_fields.ChoiceElasticField(
+                choices=["1", "2"],
+                child=builder_fields.MatchPhraseElasticField(
+                    field_name="nested_field_test"
+                )
+            )
+        )
+
+        def get_additional_terms_field_queries(self):
+            return [{"term": {"additional_test": "текст"}}]
+
+        def get_additional_nested_field_queries(self):
+            return {"rootpath": [{"term": {"rootpath.additional": 1}}]}
+
+    @pytest.mark.parametrize("params", [
+        {},
+        {"unknown": "1"},
+        {"term_field": "текст \"quoted\"", "exists_field": "false"},
+        {"terms_field": [], "match_field": ""},
+        {"terms_field": [1, "2"], "exists_field": True},
+        {"multi_match_field": "text", "query_string_field": "text"},
+        {"range_field": "0", "nested_field": "3"},
+        {"range_field": "1.5", "nested_field": "1", "term_field": 1},
+    ])
+    def test_query_bytes(self, params):
+        query_bytes = self.Builder(dict(params)).query_bytes()
+        assert isinstance(query_bytes, bytes)
+        assert query_bytes == json.dumps(
+            self.Builder(dict(params)).query
+        ).encode("utf-8")
+
+    def test_template_changed(self):
+        builder = self.Builder({"term_field": "1"})
+        assert builder.query_bytes() == json.dumps(
+            builder.query
+        ).encode("utf-8")
+
+        self.Builder.term_field.field_name = "changed_term_field_test"
+        try:
+            builder = self.Builder({"term_field": "1"})
+            assert b"changed_term_field_test" in builder.query_bytes()
+        finally:
+            self.Builder.term_field.field_name = "term_field_test"
+
+    @pytest.mark.parametrize("params", [
+        {"wildcard_field": "te"},
+        {"wildcard_field": "text", "threshold_field": "5"},
+        {"threshold_field": "50"},
+    ])
+    def test_custom_query(self, params):
+        class Builder(ElasticsearchQueryBuilder):
+            wildcard_field = WildcardElasticField(
+                field_name="wildcard_field_test",
+                input_type=str
+            )
+            threshold_field = ThresholdElasticField(
+                field_name="threshold_field_test",
+                input_type=int
+            )
+
+        assert not Builder.wildcard_field.templated
+        assert Builder(dict(params)).query_bytes() == json.dumps(
+            Builder(dict(params)).query
+        ).encode("utf-8")
+
+    def test_normalized_once(self):
+        builder = self.Builder({"range_field": "1.5"})
+        query_bytes = builder.query_bytes()
+        assert json.dumps(builder.query).encode("utf-8") == query_bytes
+
+    @pytest.mark.parametrize("value", [
+        "text", "текст", True, False, 1, -1.5, 1e100, float("nan"),
+        float("inf"), None, [1, "2"], {"a": 1},
+    ])
+    def test_encode_value(self, value):
+        assert encode_value(value) == json.dumps(value)
+
+
+class TestCaseMsearch:
+
+    class Builder(ElasticsearchQueryBuilder):
+        term_field = builder_fields.TermElasticField(
+            field_name="term_field_test",
+            input_type=int
+        )
+
+    def test_iter_msearch(self):
+        searches = [
+            ({"index": "test"}, {"term_field": "1"}),
+            ({"index": "test"}, {"term_field": "2"}),
+            (None, {}),
+            ('{"index": "other"}', None),
+            (b'{"index": "other"}', {"term_field": 3}),
+        ]
+        chunks = self.Builder.iter_msearch(iter(searches))
+        assert not isinstance(chunks, list)
+
+        lines = b"".join(chunks).split(b"\n")
+        assert lines[-1] == b""
+        assert [json.loads(line) for line in lines[:-1]] == [
+            {"index": "test"},
+            self.Builder({"term_field": "1"}).query,
+            {"index": "test"},
+            self.Builder({"term_field": "2"}).query,
+            {},
+            {},
+            {"index": "other"},
+            {},
+            {"index": "other"},
+            self.Builder({"term_field": "3"}).query,
+        ]
+
+    def test_custom_query(self):
+        class Builder(ElasticsearchQueryBuilder):
+            wildcard_field = WildcardElasticField(
+                field_name="wildcard_field_test",
+                input_type=str
+            )
+            threshold_field = ThresholdElasticField(
+                field_name="threshold_field_test",
+                input_type=int
+            )
+
+        params_list = [
+            {"wildcard_field": "te"},
+            {"wildcard_field": "text", "threshold_field": 5},
+            {"threshold_field": 50},
+        ]
+        buffer = io.BytesIO()
+        count = Builder.write_msearch(
+            ((None, dict(params)) for params in params_list),
+            buffer
+        )
+        assert count == 3
+        assert buffer.getvalue() == b"".join(Builder.iter_msearch(
+            (None, dict(params)) for params in params_list
+        ))
+
+        lines = buffer.getvalue().splitlines()
+        assert [json.loads(line) for line in lines[1::2]] == [
+            Builder(dict(params)).query for params in params_list
+        ]
+        assert b"\\u0000" not in buffer.getvalue()
+
+    def test_write_msearch(self):
+        buffer = io.BytesIO()
+        searches = (
+            ({"index": "test_%s" % (i % 3)}, {"term_field": i})
+            for i in range(100)
+        )
+        count = self.Builder.write_msearch(
+            searches,
+            buffer,
+            max_cached_headers=2
+        )
+        assert count == 100
+
+        lines = buffer.getvalue().splitlines()
+        assert len(lines) == 200
+        assert json.loads(lines[198]) == {"index": "test_0"}
+        assert json.loads(lines[199]) == self.Builder(
+            {"term_field": 99}
+        ).query
+
+
+class TestCaseAsyncQuery:
+
+    def make_builder(self, **attrs):
+        namespace = {
+            "field_%s" % i: builder_fields.TermElasticField(
+                field_name="field_%s_test" % i,
+                input_type=int
+            )
+            for i in range(5)
+        }
+
+        def make_hook(i):
+            async def hook(self):
+                await asyncio.sleep(0.05)
+                return [{"term": {"tenant_%s" % i: 1}}]
+            return hook
+
+        for i in range(4):
+            namespace["get_additional_field_%s_queries" % i] = make_hook(i)
+        namespace["get_additional_field_4_queries"] = (
+            lambda self: [{"term": {"tenant_4": 1}}]
+        )
+        namespace.update(attrs)
+        return type("Builder", (ElasticsearchQueryBuilder,), namespace)
+
+    def expected_query(self):
+        return {
+            "query": {
+                "bool": {
+                    "must": [
+                        {
+                            "bool": {
+                                "must": [
+                                    {"term": {"tenant_%s" % i: 1}},
+                                    {"term": {"field_%s_test" % i: i}},
+                                ]
+                            }
+                        }
+                        for i in range(5)
+                    ]
+                }
+            }
+        }
+
+    def test_aquery(self):
+        cls = self.make_builder()
+        params = {"field_%s" % i: str(i) for i in range(5)}
+
+        started_at = time.perf_counter()
+        query = asyncio.run(cls(params).aquery())
+        elapsed = time.perf_counter() - started_at
+
+        assert query == self.expected_query()
+        assert elapsed < 0.15
+
+    def test_aquery_compiled_cached(self):
+        cls = self.make_builder(
+            compiled=True,
+            query_cache=QueryCache(),
+            query_cache_excluded_hooks=("field_0",)
+        )
+        params = {"field_%s" % i: str(i) for i in range(5)}
+
+        for _ in range(2):
+            builder = cls(dict(params))
+            assert asyncio.run(builder.aquery()) == self.expected_query()
+            assert builder.query == self.expected_query()
+
+        assert cls.query_cache.info().hits == 1
+
+
+class TestCaseFilterContext:
+
+    def make_builder(self, **namespace):
+        class Builder(ElasticsearchQueryBuilder):
+            filter_context = True
+
+            search = builder_fields.MatchElasticField(
+                field_name="title",
+                input_type=str
+            )
+            category = builder_fields.TermElasticField(
+                field_name="category",
+                input_type=str
+            )
+            price_from = builder_fields.RangeElasticField(
+                field_name="price",
+                lookup_expr="gte",
+                input_type=int
+            )
+            discount = builder_fields.ExistsElasticField(
+                field_name="discount"
+            )
+            tag = builder_fields.TermElasticField(
+                field_name="tag",
+                input_type=str,
+                logic_operator="must"
+            )
+            author = builder_fields.NestedElasticField(
+                path="authors",
+                child=builder_fields.TermsElasticField(field_name="id")
+            )
+
+            def get_additional_price_from_queries(self):
+                return [{"term": {"tenant": "t1"}}]
+
+            def get_additional_category_queries(self):
+                return [{"match": {"description": "text"}}]
+
+        for name, value in namespace.items():
+            setattr(Builder, name, value)
+        return Builder
+
+    @pytest.mark.parametrize("namespace", [
+        {},
+        {"compiled": True},
+    ])
+    @pytest.mark.parametrize("params, expected", [
+        (
+            {"search": "text", "price_from": "10", "author": ["1"]},
+            {
+                "query": {
+                    "bool": {
+                        "must": [
+                            {"match": {"title": {"query": "text"}}},
+                        ],
+                        "filter": [
+                            {
+                                "bool": {
+                                    "must": [
+                                        {"term": {"tenant": "t1"}},
+                                        {"range": {"price": {"gte": 10}}},
+                                    ]
+                                }
+                            },
+                            {
+                                "nested": {
+                                    "path": "authors",
+                                    "query": {
+                                        "terms": {"authors.id": ["1"]}
+                                    },
+                                }
+                            },
+                        ],
+                    }
+                }
+            },
+        ),
+        (
+            {"discount": "false", "price_from": "10"},
+            {
+                "query": {
+                    "constant_score": {
+                        "filter": {
+                            "bool": {
+                                "must_not": [
+                                    {"exists": {"field": "discount"}},
+                                ],
+                                "filter": [
+                                    {
+                                        "bool": {
+                                            "must": [
+                                                {"term": {"tenant": "t1"}},
+                                                {
+                                                    "range": {
+                                                        "price": {"gte": 10}
+                                                    }
+                                                },
+                                            ]
+                                        }
+                                    },
+                                ],
+                            }
+                        }
+                    }
+                }
+            },
+        ),
+        # Explicit logic operator and scoring additional queries
+        # keep the clauses in `must`.
+        (
+            {"tag": "new", "category": "books"},
+            {
+                "query": {
+                    "bool": {
+                        "must": [
+                            {"term": {"tag": "new"}},
+                            {
+                                "bool": {
+                                    "must": [
+                                        {"match": {"description": "text"}},
+                                        {"term": {"category": "books"}},
+                                    ]
+                                }
+                            },
+                        ]
+                    }
+                }
+            },
+        ),
+    ])
+    def test_query(self, namespace, params, expected):
+        cls = self.make_builder(**namespace)
+        assert cls(dict(params)).query == expected
+        assert json.loads(cls(dict(params)).query_bytes()) == expected
+
+    def test_observer(self):
+        cls = self.make_builder(observer=AggregatingObserver())
+        assert cls({"discount": "true"}).query == {
+            "query": {
+                "constant_score": {
+                    "filter": {
+                        "bool": {
+                            "filter": [{"exists": {"field": "discount"}}],
+                        }
+                    }
+                }
+            }
+        }
+
+    def test_disabled(self):
+        cls = self.make_builder(filter_context=False)
+        assert cls({"discount": "true"}).query == {
+            "query": {
+                "bool": {
+                    "must": [{"exists": {"field": "discount"}}],
+                }
+            }
+        }
+
+    def test_same_documents(self):
+        index = MemoryIndex()
+        index.add_many(
+            {"title": title, "price": price, "tenant": "t1"}
+            for title in ("text", "other")
+            for price in range(0, 20, 5)
+        )
+        params = {"search": "text", "price_from": "10"}
+        assert [
+            doc_id for doc_id, _ in index.search(
+                self.make_builder()(dict(params)).query
+            )
+        ] == [
+            doc_id for doc_id, _ in index.search(
+                self.make_builder(filter_context=False)(dict(params)).query
+            )
+        ]
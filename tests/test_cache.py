@@ -0,0 +1,381 @@
+from elasticsearch_query_builder import fields as builder_fields
+from elasticsearch_query_builder.builders import ElasticsearchQueryBuilder
+import json
+
+import pytest
+
+from elasticsearch_query_builder.cache import (
+    FragmentCache,
+    QueryCache,
+    copy_query,
+    freeze,
+    freeze_query
+)
+
+
+class Timer:
+
+    def __init__(self):
+        self.value = 0.0
+
+    def __call__(self):
+        return self.value
+
+
+class TestCaseQueryCache:
+
+    def test_lru(self):
+        cache = QueryCache(maxsize=2)
+        cache.set("a", {"query": 1})
+        cache.set("b", {"query": 2})
+
+        assert cache.get("a") == {"query": 1}
+        cache.set("c", {"query": 3})
+
+        assert cache.get("b") is None
+        assert cache.get("a") == {"query": 1}
+        assert cache.get("c") == {"query": 3}
+
+        info = cache.info()
+        assert info.hits == 3
+        assert info.misses == 1
+        assert info.evictions == 1
+        assert info.size == 2
+        assert info.maxsize == 2
+
+    def test_ttl(self):
+        timer = Timer()
+        cache = QueryCache(maxsize=2, ttl=10, timer=timer)
+        cache.set("a", {"query": 1})
+
+        timer.value = 9.5
+        assert cache.get("a") == {"query": 1}
+
+        timer.value = 10
+        assert cache.get("a") is None
+        assert cache.info().evictions == 1
+        assert cache.info().size == 0
+
+    def test_copy(self):
+        cache = QueryCache()
+        query = {"query": {"bool": {"must": [{"term": {"field": 1}}]}}}
+        cache.set("a", query)
+        query["query"]["bool"]["must"].clear()
+
+        cached_query = cache.get("a")
+        assert cached_query == {
+            "query": {"bool": {"must": [{"term": {"field": 1}}]}}
+        }
+        cached_query["query"]["bool"]["must"].clear()
+
+        assert cache.get("a") == {
+            "query": {"bool": {"must": [{"term": {"field": 1}}]}}
+        }
+
+    def test_freeze(self):
+        assert freeze(1) != freeze(True)
+        assert freeze(1) != freeze(1.0)
+        assert freeze([1, 2]) != freeze([2, 1])
+        assert freeze({"a": [1]}) == freeze({"a": [1]})
+
+    def test_freeze_query(self):
+        query = {"bool": {"must": [{"term": {"field": 1}}]}}
+        frozen = freeze_query(query)
+        assert frozen == query
+        assert json.dumps(frozen) == json.dumps(query)
+
+        with pytest.raises(TypeError):
+            frozen["bool"]["must"].append({"term": {"field": 2}})
+        with pytest.raises(TypeError):
+            frozen["bool"]["filter"] = []
+        with pytest.raises(TypeError):
+            del frozen["bool"]
+
+        copied = copy_query(frozen)
+        copied["bool"]["must"].clear()
+        assert frozen == query
+
+
+class TestCaseFragmentCache:
+
+    @pytest.fixture
+    def cls(self):
+        class Builder(ElasticsearchQueryBuilder):
+            status = builder_fields.TermElasticField(
+                field_name="status",
+                input_type=str,
+                fragment_cache=FragmentCache(maxsize=2)
+            )
+            search = builder_fields.MatchElasticField(
+                field_name="title",
+                input_type=str
+            )
+
+        return Builder
+
+    @pytest.mark.parametrize("compiled", [False, True])
+    def test_query(self, cls, compiled):
+        cls.compiled = compiled
+
+        first = cls({"status": "active", "search": "a"}).query
+        second = cls({"status": "active", "search": "b"}).query
+        assert second == {
+            "query": {
+                "bool": {
+                    "must": [
+                        {"term": {"status": "active"}},
+                        {"match": {"title": {"query": "b"}}},
+                    ]
+                }
+            }
+        }
+        assert (
+            first["query"]["bool"]["must"][0]
+            is second["query"]["bool"]["must"][0]
+        )
+        with pytest.raises(TypeError):
+            second["query"]["bool"]["must"][0]["term"]["status"] = "other"
+
+        assert cls.fragment_cache_info() == {
+            "status": cls.status.fragment_cache_info(),
+        }
+        info = cls.status.fragment_cache_info()
+        assert info.hits == 1
+        assert info.misses == 1
+        assert cls.search.fragment_cache_info() is None
+
+    @pytest.mark.parametrize("compiled", [False, True])
+    def test_shared(self, compiled):
+        fragment_cache = FragmentCache()
+
+        class TermBuilder(ElasticsearchQueryBuilder):
+            status = builder_fields.TermElasticField(
+                field_name="status",
+                input_type=bool,
+                fragment_cache=fragment_cache
+            )
+
+        class ExistsBuilder(ElasticsearchQueryBuilder):
+            status = builder_fields.ExistsElasticField(
+                field_name="status",
+                fragment_cache=fragment_cache
+            )
+
+        TermBuilder.compiled = ExistsBuilder.compiled = compiled
+        query = TermBuilder({"status": True}).query
+        assert query["query"]["bool"]["must"] == [
+            {"term": {"status": True}}
+        ]
+        # Same param, field name and value, but the other field.
+        query = ExistsBuilder({"status": True}).query
+        assert query["query"]["bool"]["must"] == [
+            {"exists": {"field": "status"}}
+        ]
+        assert fragment_cache.info().misses == 2
+
+    @pytest.mark.parametrize("compiled", [False, True])
+    def test_wrapped_child(self, compiled):
+        class Builder(ElasticsearchQueryBuilder):
+            category = builder_fields.NestedElasticField(
+                path="categories",
+                child=builder_fields.TermElasticField(
+                    field_name="name",
+                    input_type=str,
+                    fragment_cache=FragmentCache()
+                )
+            )
+            status = builder_fields.ChoiceElasticField(
+                choices=["active", "archived"],
+                child=builder_fields.TermElasticField(
+                    field_name="status",
+                    input_type=str,
+                    fragment_cache=FragmentCache()
+                )
+            )
+
+        Builder.compiled = compiled
+        params = {"category": "books", "status": "active"}
+        first = Builder(dict(params)).query
+        second = Builder(dict(params)).query
+        assert second == {
+            "query": {
+                "bool": {
+                    "must": [
+                        {
+                            "nested": {
+                                "path": "categories",
+                                "query": {
+                                    "term": {"categories.name": "books"}
+                                },
+                            }
+                        },
+                        {"term": {"status": "active"}},
+                    ]
+                }
+            }
+        }
+        first_clauses = first["query"]["bool"]["must"]
+        second_clauses = second["query"]["bool"]["must"]
+        assert (
+            first_clauses[0]["nested"]["query"]
+            is second_clauses[0]["nested"]["query"]
+        )
+        assert first_clauses[1] is second_clauses[1]
+
+        for field in (Builder.category._child, Builder.status._child):
+            info = field.fragment_cache_info()
+            assert (info.hits, info.misses) == (1, 1)
+
+    def test_lru(self, cls):
+        for value in ("a", "b", "c", "a"):
+            cls({"status": value}).query
+        info = cls.status.fragment_cache_info()
+        assert info.misses == 4
+        assert info.evictions == 2
+        assert info.size == 2
+
+    def test_additional_queries(self, cls):
+        cls.get_additional_status_queries = (
+            lambda self: [{"term": {"tenant": self.tenant}}]
+        )
+        for tenant in ("t1", "t2", "t1"):
+            builder = cls({"status": "active"})
+            builder.tenant = tenant
+            assert builder.query["query"]["bool"]["must"] == [
+                {
+                    "bool": {
+                        "must": [
+                            {"term": {"tenant": tenant}},
+                            {"term": {"status": "active"}},
+                        ]
+                    }
+                }
+            ]
+        assert cls.status.fragment_cache_info().hits == 1
+
+    def test_field_name_changed(self, cls):
+        cls({"status": "active"}).query
+        cls.status.field_name = "state"
+        assert cls({"status": "active"}).query["query"]["bool"]["must"] == [
+            {"term": {"state": "active"}}
+        ]
+
+    def test_query_bytes(self, cls):
+        builder = cls({"status": "active", "search": "a"})
+        assert builder.query_bytes() == json.dumps(
+            cls({"status": "active", "search": "a"}).query
+        ).encode("utf-8")
+
+    def test_query_cache(self, cls):
+        cls.query_cache = QueryCache()
+        cls({"status": "active"}).query
+        query = cls({"status": "active"}).query
+        query["query"]["bool"]["must"][0]["term"]["status"] = "other"
+        assert cls.status.fragment_cache_info().size == 1
+
+
+class TestCaseBuilderQueryCache:
+
+    def make_builder(self, **attrs):
+        namespace = {
+            "query_cache": QueryCache(maxsize=16),
+            "term_field": builder_fields.TermElasticField(
+                field_name="term_field_test",
+                input_type=int
+            ),
+            "terms_field": builder_fields.TermsElasticField(
+                field_name="terms_field_test"
+            ),
+        }
+        namespace.update(attrs)
+        return type("Builder", (ElasticsearchQueryBuilder,), namespace)
+
+    def test_query(self):
+        cls = self.make_builder()
+
+        query = cls({"term_field": "1"}).query
+        assert query == cls({"term_field": 1}).query
+        assert cls.query_cache.info().hits == 1
+        assert cls.query_cache.info().misses == 1
+
+        query["query"]["bool"]["must"].clear()
+        assert cls({"term_field": "1"}).query == {
+            "query": {
+                "bool": {
+                    "must": [
+                        {"term": {"term_field_test": 1}}
+                    ]
+                }
+            }
+        }
+
+        cls({"term_field": "2"}).query
+        assert cls.query_cache.info().misses == 2
+
+        # Unhashable values are not cached.
+        cls({"terms_field": [{"1"}]}).query
+        assert cls.query_cache.info().size == 2
+
+    def test_compiled(self):
+        cls = self.make_builder(compiled=True)
+
+        query = cls({"term_field": "1"}).query
+        assert query == cls({"term_field": "1"}).query
+        assert cls.query_cache.info().hits == 1
+
+    def test_hooks(self):
+        calls = []
+
+        def get_additional_term_field_queries(self):
+            calls.append(self)
+            return [{"term": {"tenant": self.tenant}}]
+
+        cls = self.make_builder(
+            get_additional_term_field_queries=(
+                get_additional_term_field_queries
+            )
+        )
+
+        builder = cls({"term_field": "1"})
+        builder.tenant = 1
+        query = builder.query
+        assert len(calls) == 1
+        assert query["query"]["bool"]["must"][0]["bool"]["must"][0] == {
+            "term": {"tenant": 1}
+        }
+
+        builder = cls({"term_field": "1"})
+        builder.tenant = 2
+        query = builder.query
+        assert len(calls) == 2
+        assert cls.query_cache.info().misses == 2
+        assert query["query"]["bool"]["must"][0]["bool"]["must"][0] == {
+            "term": {"tenant": 2}
+        }
+
+        cls.query_cache_excluded_hooks = ("term_field",)
+        builder = cls({"term_field": "1"})
+        builder.tenant = 3
+        builder.query
+
+        builder = cls({"term_field": "1"})
+        builder.tenant = 4
+        query = builder.query
+        assert len(calls) == 3
+        assert query["query"]["bool"]["must"][0]["bool"]["must"][0] == {
+            "term": {"tenant": 3}
+        }
+
+    def test_fields_changed(self):
+        cls = self.make_builder()
+        cls({"term_field": "1"}).query
+        assert cls.query_cache.info().size == 1
+
+        cls.term_field = builder_fields.TermElasticField(
+            field_name="changed_term_field_test",
+            input_type=int
+        )
+        assert cls.query_cache.info().size == 0
+        assert cls({"term_field": "1"}).query["query"]["bool"]["must"] == [
+            {"term": {"changed_term_field_test": 1}}
+        ]
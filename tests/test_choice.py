@@ -1,5 +1,8 @@
+import json
+
 import pytest
 
+from elasticsearch_query_builder import ElasticsearchQueryBuilder
 from elasticsearch_query_builder import fields as builder_fields
 from .builder import ElasticSearchQueryTestBuilder
 
@@ -181,6 +184,342 @@ class TestCaseChoiceElasticFieldStringType:
         assert query == {}
 
 
+class TestCaseChoiceElasticFieldChoiceSet:
+
+    @pytest.fixture
+    def cls(self):
+        cls = ElasticSearchQueryTestBuilder
+        cls.choice = builder_fields.ChoiceElasticField(
+            choices=["category_%s" % i for i in range(100)],
+            child=builder_fields.TermElasticField(
+                field_name="category",
+                input_type=str
+            )
+        )
+        return cls
+
+    def test_choices(self, cls):
+        assert cls({"choice": "category_99"}).query == {
+            "query": {
+                "bool": {
+                    "must": [{"term": {"category": "category_99"}}]
+                }
+            }
+        }
+        assert cls({"choice": "category_100"}).query == {}
+
+    def test_changed_choices(self, cls):
+        choices = ["category_1", "category_2"]
+        cls.choice._choices = choices
+        assert cls({"choice": "category_2"}).query
+        assert cls({"choice": "category_99"}).query == {}
+
+        # Choices are frozen, so they can't be changed in place.
+        with pytest.raises(AttributeError):
+            cls.choice._choices.append("category_100")
+        choices[1] = "other"
+        assert cls({"choice": "category_2"}).query
+        assert cls({"choice": "other"}).query == {}
+
+        cls.choice._choices = ["other"]
+        assert cls({"choice": "category_1"}).query == {}
+        assert cls({"choice": "other"}).query
+
+    def test_unhashable_choices(self, cls):
+        cls.choice = builder_fields.ChoiceElasticField(
+            choices=[["a", "b"]],
+            child=builder_fields.TermsElasticField(field_name="tags")
+        )
+        assert cls({"choice": ["a", "b"]}).query == {
+            "query": {
+                "bool": {
+                    "must": [{"terms": {"tags": ["a", "b"]}}]
+                }
+            }
+        }
+        assert cls({"choice": ["a"]}).query == {}
+
+
+class TestCaseChoiceElasticFieldCachedFragments:
+
+    @pytest.fixture
+    def cls(self):
+        class Builder(ElasticsearchQueryBuilder):
+            choice = builder_fields.ChoiceElasticField(
+                choices=["1", "2", "3"],
+                child=builder_fields.NestedElasticField(
+                    path="variants",
+                    child=builder_fields.MatchElasticField(
+                        field_name="choice_test",
+                        input_type=str,
+                        operator="and"
+                    )
+                ),
+                cache_fragments=True
+            )
+
+        return Builder
+
+    @staticmethod
+    def _nested(field_name: str, value: str) -> dict:
+        return {
+            "nested": {
+                "path": "variants",
+                "query": {
+                    "match": {
+                        field_name: {"query": value, "operator": "and"}
+                    }
+                }
+            }
+        }
+
+    def test_query(self, cls):
+        first = cls({"choice": "1"}).query
+        second = cls({"choice": 1}).query
+        assert first == second == {
+            "query": {
+                "bool": {
+                    "must": [self._nested("variants.choice_test", "1")]
+                }
+            }
+        }
+        assert (
+            first["query"]["bool"]["must"][0]
+            is second["query"]["bool"]["must"][0]
+        )
+        assert cls({"choice": "4"}).query == {}
+
+    def test_cheap_child(self, cls):
+        # Simple queries are built as fast as they're looked up.
+        cls.choice._child = builder_fields.MatchElasticField(
+            field_name="choice_test",
+            input_type=str
+        )
+        first = cls({"choice": "1"}).query["query"]["bool"]["must"][0]
+        second = cls({"choice": "1"}).query["query"]["bool"]["must"][0]
+        assert first == second == {"match": {"choice_test": {"query": "1"}}}
+        assert first is not second
+        first["match"]["choice_test"]["query"] = "2"
+        assert cls.choice._fragments == {}
+
+    def test_read_only(self, cls):
+        fragment = cls({"choice": "1"}).query["query"]["bool"]["must"][0]
+        with pytest.raises(TypeError):
+            fragment["nested"]["query"]["match"] = {}
+        with pytest.raises(TypeError):
+            fragment.pop("nested")
+        assert cls({"choice": "1"}).query["query"]["bool"]["must"][0] \
+            == self._nested("variants.choice_test", "1")
+
+    def test_changed_child(self, cls):
+        cls({"choice": "1"}).query
+        cls.choice._child._child.field_name = "changed_choice_test"
+        query = cls({"choice": "1"}).query
+        assert query["query"]["bool"]["must"][0] \
+            == self._nested("variants.changed_choice_test", "1")
+
+    def test_additional_queries(self, cls):
+        cls.get_additional_choice_queries = (
+            lambda self: [{"term": {"tenant": "t1"}}]
+        )
+        query = cls({"choice": "1"}).query
+        assert query["query"]["bool"]["must"][0] == {
+            "nested": {
+                "path": "variants",
+                "query": {
+                    "bool": {
+                        "must": [
+                            {"term": {"tenant": "t1"}},
+                            {
+                                "match": {
+                                    "variants.choice_test": {
+                                        "query": "1",
+                                        "operator": "and",
+                                    }
+                                }
+                            },
+                        ]
+                    }
+                }
+            }
+        }
+
+    @pytest.mark.parametrize("compiled", [False, True])
+    def test_query_bytes(self, cls, compiled):
+        cls.compiled = compiled
+        for value in ("1", "4"):
+            builder = cls({"choice": value})
+            assert builder.query_bytes() == json.dumps(
+                cls({"choice": value}).query
+            ).encode("utf-8")
+            assert builder.query == cls({"choice": value}).query
+
+
+class TestCaseChoiceElasticFieldDispatch:
+
+    @pytest.fixture
+    def cls(self):
+        class Builder(ElasticsearchQueryBuilder):
+            preset = builder_fields.ChoiceElasticField(
+                choices={
+                    "new": builder_fields.TermElasticField(
+                        field_name="status",
+                        input_type=str
+                    ),
+                    "popular": builder_fields.MatchElasticField(
+                        field_name="tags",
+                        input_type=str
+                    ),
+                }
+            )
+
+        return Builder
+
+    @pytest.mark.parametrize("compiled", [False, True])
+    @pytest.mark.parametrize("cache_fragments", [False, True])
+    def test_query(self, cls, compiled, cache_fragments):
+        cls.compiled = compiled
+        cls.preset._cache_fragments = cache_fragments
+
+        assert cls({"preset": "new"}).query == {
+            "query": {
+                "bool": {
+                    "must": [{"term": {"status": "new"}}]
+                }
+            }
+        }
+        assert cls({"preset": "popular"}).query == {
+            "query": {
+                "bool": {
+                    "must": [{"match": {"tags": {"query": "popular"}}}]
+                }
+            }
+        }
+        assert cls({"preset": "other"}).query == {}
+
+        for value in ("new", "popular", "other"):
+            assert cls({"preset": value}).query_bytes() == json.dumps(
+                cls({"preset": value}).query
+            ).encode("utf-8")
+
+    @pytest.mark.parametrize("compiled", [False, True])
+    def test_fixed(self, cls, compiled):
+        cls.compiled = compiled
+        cls.preset = builder_fields.ChoiceElasticField(
+            choices={
+                "in_stock": (
+                    builder_fields.TermElasticField(
+                        field_name="status",
+                        input_type=str
+                    ),
+                    "available"
+                ),
+                "no_cover": (
+                    builder_fields.ExistsElasticField(field_name="cover"),
+                    False
+                ),
+                "discounted": {"range": {"discount": {"gt": 0}}},
+            }
+        )
+        expected = {
+            "in_stock": {"must": [{"term": {"status": "available"}}]},
+            "no_cover": {"must": [{"exists": {"field": "cover"}}]},
+            "discounted": {"must": [{"range": {"discount": {"gt": 0}}}]},
+        }
+        for value, clauses in expected.items():
+            query = cls({"preset": value}).query
+            assert query == {"query": {"bool": clauses}}
+            assert cls({"preset": value}).query_bytes() \
+                == json.dumps(query).encode("utf-8")
+
+        # Fixed queries are copied.
+        query = cls({"preset": "discounted"}).query
+        query["query"]["bool"]["must"][0]["range"]["discount"]["gt"] = 1
+        assert cls.preset._choices["discounted"] == {
+            "range": {"discount": {"gt": 0}}
+        }
+
+    def test_fixed_invalid(self):
+        with pytest.raises(AssertionError):
+            builder_fields.ChoiceElasticField(
+                choices={"new": (builder_fields.ExistsElasticField(),)}
+            )
+        with pytest.raises(AssertionError):
+            builder_fields.ChoiceElasticField(choices={"new": "status"})
+
+    @pytest.mark.parametrize("compiled", [False, True])
+    def test_logic_operator(self, cls, compiled):
+        cls.compiled = compiled
+        cls.preset._choices["no_cover"] = (
+            builder_fields.ExistsElasticField(field_name="cover"),
+            False
+        )
+        cls.preset._choices["featured"] = builder_fields.TermElasticField(
+            field_name="status",
+            input_type=str,
+            logic_operator="should"
+        )
+        exists = {"exists": {"field": "cover"}}
+        term = {"term": {"status": "featured"}}
+
+        # Logic operator of the choice field by default.
+        assert cls({"preset": "no_cover"}).query == {
+            "query": {"bool": {"must": [exists]}}
+        }
+        assert cls({"preset": "featured"}).query == {
+            "query": {"bool": {"must": [term]}}
+        }
+
+        cls.preset._delegate_logic_operator = True
+        assert cls({"preset": "no_cover"}).query == {
+            "query": {"bool": {"must_not": [exists]}}
+        }
+        assert cls({"preset": "featured"}).query == {
+            "query": {"bool": {"should": [term]}}
+        }
+
+        cls.preset._logic_operator = "filter"
+        cls.preset._explicit_logic_operator = True
+        assert cls({"preset": "no_cover"}).query == {
+            "query": {"bool": {"filter": [exists]}}
+        }
+
+    def test_child_is_not_allowed(self):
+        with pytest.raises(AssertionError):
+            builder_fields.ChoiceElasticField(
+                choices={"new": builder_fields.ExistsElasticField()},
+                child=builder_fields.ExistsElasticField()
+            )
+
+    def test_scoring(self, cls):
+        assert cls.preset.scoring is True
+
+        cls.preset._choices.pop("popular")
+        assert cls.preset.scoring is False
+
+    def test_nested(self, cls):
+        cls.preset = builder_fields.NestedElasticField(
+            path="variants",
+            child=cls.preset
+        )
+        assert cls({"preset": "new"}).query == {
+            "query": {
+                "bool": {
+                    "must": [
+                        {
+                            "nested": {
+                                "path": "variants",
+                                "query": {
+                                    "term": {"variants.status": "new"}
+                                }
+                            }
+                        }
+                    ]
+                }
+            }
+        }
+
+
 class TestCaseChoiceElasticFieldIntegration:
     index_name = "test_choice"
     mappings = {
@@ -0,0 +1,204 @@
+import json
+
+import pytest
+
+from elasticsearch_query_builder import fields as builder_fields
+from elasticsearch_query_builder.builders import ElasticsearchQueryBuilder
+
+
+class SampleBuilder(ElasticsearchQueryBuilder):
+    term_int = builder_fields.TermElasticField(
+        field_name="term_int_test",
+        input_type=int
+    )
+    term_bool = builder_fields.TermElasticField(
+        field_name="term_bool_test",
+        input_type=bool,
+        logic_operator="filter"
+    )
+    terms = builder_fields.TermsElasticField(
+        field_name="terms_test"
+    )
+    ids = builder_fields.IdsElasticField()
+    exists = builder_fields.ExistsElasticField(
+        field_name="exists_test"
+    )
+    match = builder_fields.MatchElasticField(
+        field_name="match_test",
+        input_type=str,
+        operator="and",
+        fuzziness="AUTO"
+    )
+    match_bool_prefix = builder_fields.MatchBoolPrefixElasticField(
+        field_name="match_bool_prefix_test",
+        minimum_should_match="2"
+    )
+    match_phrase = builder_fields.MatchPhraseElasticField(
+        field_name="match_phrase_test"
+    )
+    match_phrase_prefix = builder_fields.MatchPhrasePrefixElasticField(
+        field_name="match_phrase_prefix_test",
+        logic_operator="should"
+    )
+    multi_match = builder_fields.MultiMatchElasticField(
+        query_type="best_fields",
+        fields=["field_1", "field_2"],
+        tie_breaker=0.3
+    )
+    query_string = builder_fields.QueryStringElasticField(
+        fields=["field_1", "field_2"],
+        default_operator="AND"
+    )
+    range = builder_fields.RangeElasticField(
+        field_name="range_test",
+        input_type=float,
+        lookup_expr="gte"
+    )
+    nested = builder_fields.NestedElasticField(
+        path="rootpath",
+        child=builder_fields.MatchElasticField(
+            field_name="nested_test",
+            input_type=str
+        )
+    )
+    choice = builder_fields.ChoiceElasticField(
+        choices=["1", "2"],
+        child=builder_fields.TermElasticField(
+            field_name="choice_test",
+            input_type=str
+        )
+    )
+
+    def get_additional_term_int_queries(self):
+        return [{"term": {"additional_test": 1}}]
+
+
+class CompiledSampleBuilder(SampleBuilder):
+    compiled = True
+
+
+class TestCaseCompiledQuery:
+
+    @pytest.mark.parametrize("params", [
+        {},
+        {"unknown": "1"},
+        {"term_int": "1", "term_bool": "true", "terms": ["1", "2"]},
+        {"terms": [], "ids": ["1"], "exists": "false", "match": "text"},
+        {"exists": True, "match": "", "match_bool_prefix": "text"},
+        {"match_phrase": 1, "match_phrase_prefix": "text"},
+        {"multi_match": "text", "query_string": "text", "range": "1.5"},
+        {"range": "0", "nested": "text", "choice": "1"},
+        {"choice": "3", "term_bool": False, "ids": []},
+    ])
+    def test_query(self, params):
+        expected = SampleBuilder(dict(params)).query
+        query = CompiledSampleBuilder(dict(params)).query
+
+        assert json.dumps(query) == json.dumps(expected)
+
+    def test_validation(self):
+        try:
+            CompiledSampleBuilder({"term_int": "test-text"}).query
+        except ValueError as e:
+            assert str(e) == (
+                "Invalid input for `term_int`: expected int"
+            )
+        else:
+            assert False
+
+    def test_cache(self):
+        class Builder(ElasticsearchQueryBuilder):
+            compiled = True
+
+            term_field = builder_fields.TermElasticField(
+                field_name="term_field_test",
+                input_type=int
+            )
+
+        assert Builder._compiled_query is None
+        Builder({"term_field": "1"}).query
+        compiled_query = Builder._compiled_query
+        assert compiled_query is not None
+
+        Builder({"term_field": "2"}).query
+        assert Builder._compiled_query is compiled_query
+
+        Builder.other_field = builder_fields.TermElasticField(
+            field_name="other_field_test",
+            input_type=int
+        )
+        assert Builder._compiled_query is None
+        query = Builder({"other_field": "2"}).query
+        assert query["query"]["bool"]["must"] == [
+            {"term": {"other_field_test": 2}}
+        ]
+
+    def test_changed_field(self):
+        class Builder(ElasticsearchQueryBuilder):
+            compiled = True
+
+            match_field = builder_fields.MatchElasticField(
+                field_name="match_field_test",
+                input_type=str
+            )
+
+        Builder({"match_field": "text"}).query
+        # Fields build their own fragments in the compiled query.
+        Builder.match_field.field_name = "changed_match_field_test"
+        assert Builder({"match_field": "text"}).query == {
+            "query": {
+                "bool": {
+                    "must": [
+                        {
+                            "match": {
+                                "changed_match_field_test": {"query": "text"}
+                            }
+                        }
+                    ]
+                }
+            }
+        }
+
+    def test_add_field_query(self):
+        class Builder(ElasticsearchQueryBuilder):
+            compiled = True
+
+            term_field = builder_fields.TermElasticField(
+                field_name="term_field_test",
+                input_type=int
+            )
+
+            def _add_field_query(self, query, logic_operator, field_query):
+                super()._add_field_query(query, "filter", field_query)
+
+        assert Builder({"term_field": "1"}).query == {
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"term": {"term_field_test": 1}}
+                    ]
+                }
+            }
+        }
+
+    def test_create_common_query(self):
+        class Builder(ElasticsearchQueryBuilder):
+            compiled = True
+
+            term_field = builder_fields.TermElasticField(
+                field_name="term_field_test",
+                input_type=int
+            )
+
+            def _create_common_query(self, query):
+                return {"query": {"bool": {"filter": query["must"]}}}
+
+        assert Builder({"term_field": "1"}).query == {
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"term": {"term_field_test": 1}}
+                    ]
+                }
+            }
+        }
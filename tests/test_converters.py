@@ -0,0 +1,264 @@
+import datetime
+import decimal
+import enum
+import json
+import uuid
+
+import pytest
+
+from elasticsearch_query_builder import ElasticsearchQueryBuilder
+from elasticsearch_query_builder import fields as builder_fields
+from elasticsearch_query_builder.converters import (
+    get_converter,
+    register_converter
+)
+
+
+class Color(enum.Enum):
+    RED = "red"
+    GREEN = "green"
+
+
+class Size(enum.IntEnum):
+    SMALL = 1
+    LARGE = 2
+
+
+UUID = "12345678-1234-5678-1234-567812345678"
+
+
+class TestCaseConverters:
+
+    @pytest.mark.parametrize("input_type, value, expected", [
+        (str, 1, "1"),
+        (int, "12", 12),
+        (int, 1.53, 1),
+        (float, "1.5", 1.5),
+        (bool, "true", True),
+        (bool, "any", False),
+        (bool, False, False),
+        (decimal.Decimal, "10.50", "10.50"),
+        (decimal.Decimal, " 10.50 ", "10.50"),
+        (decimal.Decimal, 0.1, "0.1"),
+        (decimal.Decimal, decimal.Decimal("1.5"), "1.5"),
+        (datetime.date, "2024-01-31", "2024-01-31"),
+        (datetime.date, "2024-01-31T10:00:00", "2024-01-31"),
+        (datetime.date, datetime.datetime(2024, 1, 31, 10), "2024-01-31"),
+        (datetime.date, datetime.date(2024, 1, 31), "2024-01-31"),
+        (
+            datetime.datetime,
+            "2024-01-31T10:00:00Z",
+            "2024-01-31T10:00:00+00:00",
+        ),
+        (datetime.datetime, "2024-01-31", "2024-01-31T00:00:00"),
+        (datetime.datetime, 0, "1970-01-01T00:00:00+00:00"),
+        (
+            datetime.datetime,
+            datetime.date(2024, 1, 31),
+            "2024-01-31T00:00:00",
+        ),
+        (uuid.UUID, UUID.upper(), UUID),
+        (uuid.UUID, "{%s}" % UUID, UUID),
+        (uuid.UUID, uuid.UUID(UUID), UUID),
+        (Color, "red", "red"),
+        (Color, Color.GREEN, "green"),
+        (Color, "GREEN", "green"),
+        (Size, "2", 2),
+        (Size, "SMALL", 1),
+        (Size, Size.LARGE, 2),
+    ])
+    def test_lenient(self, input_type, value, expected):
+        converted = get_converter(input_type)(value)
+        assert converted == expected
+        assert type(converted) is type(expected)
+
+    @pytest.mark.parametrize("input_type, value", [
+        (int, "text"),
+        (float, "text"),
+        (bool, 1),
+        (decimal.Decimal, "text"),
+        (decimal.Decimal, "NaN"),
+        (decimal.Decimal, True),
+        (datetime.date, "31.01.2024"),
+        (datetime.datetime, "text"),
+        (datetime.datetime, True),
+        (uuid.UUID, "text"),
+        (uuid.UUID, 1),
+        (Color, "blue"),
+        (Size, "3"),
+        (complex, "1"),
+    ])
+    def test_lenient_invalid(self, input_type, value):
+        with pytest.raises(ValueError):
+            get_converter(input_type)(value)
+
+    @pytest.mark.parametrize("input_type, value, expected", [
+        (str, "1", "1"),
+        (int, "-12", -12),
+        (int, 12, 12),
+        (float, "1.5", 1.5),
+        (float, 2, 2.0),
+        (bool, "false", False),
+        (bool, True, True),
+        (decimal.Decimal, "10.50", "10.50"),
+        (decimal.Decimal, 10, "10"),
+        (datetime.date, "2024-01-31", "2024-01-31"),
+        (
+            datetime.datetime,
+            "2024-01-31T10:00:00Z",
+            "2024-01-31T10:00:00+00:00",
+        ),
+        (uuid.UUID, UUID.upper(), UUID),
+        (Color, "red", "red"),
+        (Size, 2, 2),
+    ])
+    def test_strict(self, input_type, value, expected):
+        converted = get_converter(input_type, strict=True)(value)
+        assert converted == expected
+        assert type(converted) is type(expected)
+
+    @pytest.mark.parametrize("input_type, value", [
+        (str, 1),
+        (int, 1.53),
+        (int, " 12"),
+        (int, True),
+        (float, "nan"),
+        (float, True),
+        (bool, "any"),
+        (decimal.Decimal, 0.1),
+        (decimal.Decimal, "1e3"),
+        (datetime.date, "2024-01-31T10:00:00"),
+        (datetime.date, datetime.datetime(2024, 1, 31)),
+        (datetime.datetime, "2024-01-31"),
+        (datetime.datetime, 0),
+        (uuid.UUID, UUID.replace("-", "")),
+        (Color, "RED"),
+        (Size, "2"),
+    ])
+    def test_strict_invalid(self, input_type, value):
+        with pytest.raises(ValueError):
+            get_converter(input_type, strict=True)(value)
+
+    def test_register(self):
+        class Point:
+            pass
+
+        def convert_point(value):
+            x, y = value.split(",")
+            return [float(x), float(y)]
+
+        def strict_convert_point(value):
+            raise ValueError
+
+        register_converter(Point, convert_point, strict_convert_point)
+
+        class SubPoint(Point):
+            pass
+
+        assert get_converter(SubPoint)("1,2") == [1.0, 2.0]
+        with pytest.raises(ValueError):
+            get_converter(Point, strict=True)("1,2")
+
+
+class TestCaseFieldConverters:
+
+    @pytest.fixture
+    def cls(self):
+        class Builder(ElasticsearchQueryBuilder):
+            color = builder_fields.TermElasticField(
+                field_name="color",
+                input_type=Color
+            )
+            price = builder_fields.RangeElasticField(
+                field_name="price",
+                input_type=decimal.Decimal,
+                lookup_expr="gte",
+                strict=True
+            )
+            created = builder_fields.TwoSidedRangeElasticField(
+                field_name="created",
+                input_type=datetime.date
+            )
+            author = builder_fields.MatchElasticField(
+                field_name="author",
+                input_type=uuid.UUID
+            )
+
+        return Builder
+
+    @pytest.mark.parametrize("compiled", [False, True])
+    def test_query(self, cls, compiled):
+        cls.compiled = compiled
+        builder = cls({
+            "color": "RED",
+            "price": "10.50",
+            "created": ["2024-01-01", datetime.date(2024, 2, 1)],
+            "author": UUID.upper(),
+        })
+        assert builder.query == {
+            "query": {
+                "bool": {
+                    "must": [
+                        {"term": {"color": "red"}},
+                        {"range": {"price": {"gte": "10.50"}}},
+                        {
+                            "range": {
+                                "created": {
+                                    "gte": "2024-01-01",
+                                    "lte": "2024-02-01",
+                                }
+                            }
+                        },
+                        {"match": {"author": {"query": UUID}}},
+                    ]
+                }
+            }
+        }
+        assert builder.query_bytes() == json.dumps(
+            builder.query
+        ).encode("utf-8")
+
+    @pytest.mark.parametrize("compiled", [False, True])
+    def test_strict(self, cls, compiled):
+        cls.compiled = compiled
+        with pytest.raises(ValueError) as error:
+            cls({"price": 10.5}).query
+        assert str(error.value) == (
+            "Invalid input for `price`: expected Decimal"
+        )
+        assert isinstance(error.value.__cause__, ValueError)
+
+    @pytest.mark.parametrize("params, message", [
+        (
+            {"created": ["01/02/2024", None]},
+            "Invalid input for `created`: expected pair of date or date math "
+            "bounds or mapping of gte and lte"
+        ),
+        (
+            {"color": "PINK"},
+            "Invalid input for `color`: expected Color"
+        ),
+        (
+            {"author": "author"},
+            "Invalid input for `author`: expected UUID"
+        ),
+    ])
+    def test_invalid_input(self, cls, params, message):
+        with pytest.raises(ValueError) as error:
+            cls(params).query
+        assert str(error.value) == message
+        assert isinstance(error.value.__cause__, ValueError)
+
+    def test_invalid_input_cause(self, cls):
+        with pytest.raises(ValueError) as error:
+            cls({"created": ["01/02/2024", None]}).query
+        assert "isoformat" not in str(error.value)
+        assert str(error.value.__cause__) == (
+            "Invalid isoformat string: '01/02/2024'"
+        )
+
+    def test_input_type_changed(self, cls):
+        cls.color._input_type = str
+        assert cls({"color": "RED"}).query["query"]["bool"]["must"] == [
+            {"term": {"color": "RED"}}
+        ]
@@ -1,3 +1,6 @@
+import sys
+import threading
+
 import pytest
 
 from elasticsearch_query_builder import fields as builder_fields
@@ -80,6 +83,64 @@ class TestCaseExistElasticField:
                    'exists'
                ]['field'] == "exists_test"
 
+    @pytest.mark.parametrize("compiled", [False, True])
+    @pytest.mark.parametrize("filter_context", [False, True])
+    @pytest.mark.parametrize("logic_operator", ["filter", "should"])
+    def test_explicit_logic_operator(self,
+                                     logic_operator,
+                                     filter_context,
+                                     compiled):
+        class Builder(ElasticSearchQueryTestBuilder):
+            exists = builder_fields.ExistsElasticField(
+                field_name="exists_test",
+                logic_operator=logic_operator
+            )
+
+        Builder.filter_context = filter_context
+        Builder.compiled = compiled
+
+        def get_bool_query(query):
+            query = query["query"]
+            if "constant_score" in query:
+                query = query["constant_score"]["filter"]
+            return query["bool"]
+
+        query = Builder({"exists": "true"}).query
+        assert list(get_bool_query(query)) == [logic_operator]
+
+        query = Builder({"exists": "false"}).query
+        assert list(get_bool_query(query)) == ["must_not"]
+
+    def test_logic_operator_threads(self, cls):
+        expected = {
+            "true": "must",
+            "false": "must_not",
+        }
+        errors = []
+
+        def build(value):
+            for _ in range(2000):
+                query = cls({"exists": value}).query
+                if list(query["query"]["bool"]) != [expected[value]]:
+                    errors.append(query)
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [
+                threading.Thread(target=build, args=(value,))
+                for value in list(expected) * 4
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        assert errors == []
+        assert cls.exists.logic_operator == "must"
+
 
 class TestCaseExistElasticFieldIntegration:
     index_name = "test_exists"
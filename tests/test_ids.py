@@ -1,5 +1,8 @@
+import json
+
 import pytest
 
+from elasticsearch_query_builder import ElasticsearchQueryBuilder
 from elasticsearch_query_builder import fields as builder_fields
 from .builder import ElasticSearchQueryTestBuilder
 
@@ -93,6 +96,76 @@ class TestCaseIdsElasticField:
                ]["values"] == [1, 2, 3]
 
 
+class TestCaseIdsElasticFieldInputType:
+
+    @pytest.fixture(params=[False, True], ids=["interpreted", "compiled"])
+    def cls(self, request):
+        class Builder(ElasticsearchQueryBuilder):
+            compiled = request.param
+
+            ids = builder_fields.IdsElasticField(input_type=int)
+            str_ids = builder_fields.IdsElasticField(input_type=str)
+
+        return Builder
+
+    def test_query(self, cls):
+        query = cls({"ids": ["1", 2], "str_ids": [3]}).query
+        assert query == {
+            "query": {
+                "bool": {
+                    "must": [
+                        {"ids": {"values": [1, 2]}},
+                        {"ids": {"values": ["3"]}},
+                    ]
+                }
+            }
+        }
+        assert cls({"ids": ["1", 2], "str_ids": [3]}).query_bytes() == (
+            json.dumps(query).encode("utf-8")
+        )
+
+    def test_validation(self, cls):
+        with pytest.raises(ValueError):
+            cls({"ids": ["a"]}).query
+
+
+class TestCaseIdsElasticFieldLimits:
+
+    @pytest.fixture(params=[False, True], ids=["interpreted", "compiled"])
+    def cls(self, request):
+        class Builder(ElasticsearchQueryBuilder):
+            compiled = request.param
+
+            ids = builder_fields.IdsElasticField(
+                unique=True,
+                sort=True,
+                max_terms_count=2
+            )
+
+        return Builder
+
+    def test_query(self, cls):
+        builder = cls({"ids": ["c", "a", "b", "a"]})
+        query = builder.query
+        assert query == {
+            "query": {
+                "bool": {
+                    "must": [
+                        {
+                            "bool": {
+                                "should": [
+                                    {"ids": {"values": ["a", "b"]}},
+                                    {"ids": {"values": ["c"]}},
+                                ]
+                            }
+                        },
+                    ]
+                }
+            }
+        }
+        assert builder.query_bytes() == json.dumps(query).encode("utf-8")
+
+
 class TestCaseIdsElasticFieldIntegration:
     index_name = "test_ids"
     mappings = {
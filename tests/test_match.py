@@ -164,11 +164,7 @@ class TestCaseMatchElasticFieldStringType:
                ]["query"] == "test_text"
 
     def test_default_attrs(self, cls):
-        assert cls.match_str._attrs == [
-            ("operator", None),
-            ("fuzziness", None),
-            ("minimum_should_match", None),
-        ]
+        assert cls.match_str._attrs == ()
 
     def test_attr_operator(self, cls):
         cls.match_str._attrs = [
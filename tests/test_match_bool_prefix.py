@@ -83,10 +83,7 @@ class TestCaseMatchBoolPrefixElasticField:
                ]['test_field']["query"] == "test_text"
 
     def test_default_attrs(self, cls):
-        assert cls.match_bool_prefix._attrs == [
-            ("operator", None),
-            ("minimum_should_match", None),
-        ]
+        assert cls.match_bool_prefix._attrs == ()
 
     def test_attr_operator(self, cls):
         cls.match_bool_prefix._attrs = [
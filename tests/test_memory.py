@@ -0,0 +1,463 @@
+import datetime
+import json
+
+import pytest
+
+from elasticsearch_query_builder import ElasticsearchQueryBuilder
+from elasticsearch_query_builder import fields as builder_fields
+from elasticsearch_query_builder.memory import (
+    MemoryElasticsearch,
+    MemoryIndex,
+    analyze
+)
+
+
+DOCUMENTS = [
+    {
+        "_id": "1",
+        "title": "The quick brown fox",
+        "category": "animals",
+        "price": 10,
+        "available": True,
+        "authors": [
+            {"name": "John Smith", "role": "writer"},
+            {"name": "Jane Doe", "role": "editor"},
+        ],
+    },
+    {
+        "_id": "2",
+        "title": "Quick recipes for lazy dogs",
+        "category": "cooking",
+        "price": 25.5,
+        "available": False,
+        "authors": [
+            {"name": "Jane Smith", "role": "writer"},
+        ],
+    },
+    {
+        "_id": "3",
+        "title": "Brown bread",
+        "category": "cooking",
+        "price": 5,
+        "discount": None,
+    },
+]
+
+
+class TestCaseMemoryIndex:
+
+    @pytest.fixture
+    def index(self):
+        index = MemoryIndex()
+        index.add_many(DOCUMENTS)
+        return index
+
+    def ids(self, index, query):
+        return [doc_id for doc_id, _ in index.search({"query": query})]
+
+    def test_analyze(self):
+        assert analyze("The Quick-Brown fox!") == [
+            "the", "quick", "brown", "fox"
+        ]
+        assert analyze(True) == ["true"]
+
+    def test_load_ndjson(self):
+        index = MemoryIndex()
+        index.load_ndjson([
+            json.dumps(document) + "\n"
+            for document in DOCUMENTS
+        ] + ["\n"])
+        assert len(index) == 3
+        assert index.get("3")["title"] == "Brown bread"
+
+    def test_sequential_ids(self):
+        index = MemoryIndex()
+        index.add_many([{"title": "a"}, {"title": "b"}])
+        assert "0" in index and "1" in index
+
+    def test_match_all(self, index):
+        assert self.ids(index, {"match_all": {}}) == ["1", "2", "3"]
+        assert [doc_id for doc_id, _ in index.search()] == ["1", "2", "3"]
+        assert self.ids(index, {"match_none": {}}) == []
+
+    def test_term(self, index):
+        assert self.ids(index, {"term": {"category.keyword": "cooking"}}) \
+            == ["2", "3"]
+        assert self.ids(index, {"term": {"title": "brown"}}) == ["3", "1"]
+        # Term queries are not analyzed.
+        assert self.ids(index, {"term": {"title": "Brown"}}) == []
+        assert self.ids(index, {"term": {"price": "10"}}) == ["1"]
+        assert self.ids(index, {"term": {"available": "false"}}) == ["2"]
+        assert self.ids(index, {"term": {"price": {"value": 5}}}) == ["3"]
+
+    def test_terms(self, index):
+        assert self.ids(index, {"terms": {"price": [5, 10, 100]}}) \
+            == ["1", "3"]
+        assert self.ids(index, {"terms": {"missing": [1]}}) == []
+
+    def test_ids(self, index):
+        assert self.ids(index, {"ids": {"values": [3, "1", "4"]}}) \
+            == ["1", "3"]
+
+    def test_exists(self, index):
+        assert self.ids(index, {"exists": {"field": "discount"}}) == []
+        assert self.ids(index, {"exists": {"field": "available"}}) \
+            == ["1", "2"]
+        assert self.ids(index, {"exists": {"field": "authors"}}) \
+            == ["1", "2"]
+        assert self.ids(index, {"exists": {"field": "authors.role"}}) \
+            == ["1", "2"]
+
+    def test_range(self, index):
+        assert self.ids(index, {"range": {"price": {"gte": 10}}}) \
+            == ["1", "2"]
+        assert self.ids(index, {"range": {"price": {"gt": 5, "lt": 25}}}) \
+            == ["1"]
+        assert self.ids(index, {"range": {"price": {"lte": "5"}}}) == ["3"]
+        assert self.ids(index, {"range": {"missing": {"lte": 5}}}) == []
+
+    def test_match(self, index):
+        assert self.ids(index, {"match": {"title": "quick brown"}}) \
+            == ["1", "3", "2"]
+        assert self.ids(index, {
+            "match": {"title": {"query": "quick brown", "operator": "and"}}
+        }) == ["1"]
+        assert self.ids(index, {
+            "match": {
+                "title": {
+                    "query": "quick brown bread",
+                    "minimum_should_match": "2",
+                }
+            }
+        }) == ["3", "1"]
+
+    def test_match_phrase(self, index):
+        assert self.ids(index, {"match_phrase": {"title": "quick brown"}}) \
+            == ["1"]
+        assert self.ids(index, {"match_phrase": {"title": "brown quick"}}) \
+            == []
+        assert self.ids(index, {
+            "match_phrase_prefix": {"title": {"query": "lazy d"}}
+        }) == ["2"]
+        assert self.ids(index, {"match_bool_prefix": {"title": "fox br"}}) \
+            == ["3", "1"]
+
+    def test_multi_match(self, index):
+        assert self.ids(index, {
+            "multi_match": {
+                "query": "smith",
+                "fields": ["title", "authors.name^2"],
+            }
+        }) == ["2", "1"]
+        assert self.ids(index, {
+            "multi_match": {
+                "query": "quick brown",
+                "type": "phrase",
+                "fields": ["*"],
+            }
+        }) == ["1"]
+
+    def test_query_string(self, index):
+        assert self.ids(index, {
+            "query_string": {
+                "query": "quick AND fox",
+                "default_field": "title",
+                "default_operator": "and",
+            }
+        }) == ["1"]
+
+    def test_nested(self, index):
+        query = {
+            "nested": {
+                "path": "authors",
+                "query": {
+                    "bool": {
+                        "must": [
+                            {"match": {"authors.name": "jane"}},
+                            {"term": {"authors.role.keyword": "writer"}},
+                        ]
+                    }
+                }
+            }
+        }
+        # Both conditions must match the same nested document.
+        assert self.ids(index, query) == ["2"]
+
+    def test_bool(self, index):
+        assert self.ids(index, {
+            "bool": {
+                "filter": [{"term": {"category.keyword": "cooking"}}],
+                "must_not": [{"term": {"price": 5}}],
+            }
+        }) == ["2"]
+        assert self.ids(index, {
+            "bool": {
+                "should": [
+                    {"term": {"price": 5}},
+                    {"term": {"price": 10}},
+                ],
+            }
+        }) == ["1", "3"]
+        assert self.ids(index, {
+            "bool": {
+                "should": [
+                    {"match": {"title": "quick"}},
+                    {"match": {"title": "brown"}},
+                ],
+                "minimum_should_match": 2,
+            }
+        }) == ["1"]
+        assert self.ids(index, {
+            "bool": {"must_not": {"exists": {"field": "authors"}}}
+        }) == ["3"]
+
+    def test_constant_score(self, index):
+        assert index.search({
+            "query": {
+                "constant_score": {
+                    "filter": {"match": {"title": "brown"}},
+                    "boost": 2,
+                }
+            }
+        }) == [("1", 2.0), ("3", 2.0)]
+
+    def test_scores(self, index):
+        hits = index.search({"query": {"match": {"title": "brown"}}})
+        # Shorter documents are scored higher.
+        assert hits[0][0] == "3"
+        assert hits[0][1] > hits[1][1] > 0
+
+    def test_replace(self, index):
+        index.add("1", {"title": "Slow green turtle"})
+        assert self.ids(index, {"match": {"title": "brown"}}) == ["3"]
+        assert self.ids(index, {"match": {"title": "turtle"}}) == ["1"]
+        assert self.ids(index, {
+            "nested": {
+                "path": "authors",
+                "query": {"match": {"authors.name": "john"}},
+            }
+        }) == []
+
+    def test_mappings(self):
+        index = MemoryIndex({
+            "properties": {
+                "category": {"type": "keyword"},
+                "price": {"type": "integer"},
+                "authors": {
+                    "type": "nested",
+                    "properties": {"name": {"type": "text"}},
+                },
+            }
+        })
+        index.add_many(DOCUMENTS)
+        assert self.ids(index, {"term": {"category": "cooking"}}) \
+            == ["2", "3"]
+        assert self.ids(index, {"term": {"price": "10"}}) == ["1"]
+        # Nested objects are not flattened into the parent document.
+        assert self.ids(index, {"match": {"authors.name": "jane"}}) == []
+
+    @pytest.fixture
+    def date_index(self):
+        index = MemoryIndex({"properties": {"created": {"type": "date"}}})
+        index.add_many([
+            {"_id": "1", "created": "2024-01-31T10:15:30Z"},
+            {"_id": "2", "created": "2024-01-31T23:30:00+01:00"},
+            {"_id": "3", "created": "2024-02-01"},
+            {"_id": "4", "created": 1704067200000},
+        ])
+        return index
+
+    @pytest.mark.parametrize("bounds, expected", [
+        ({"gte": "2024-01-31T10:15:30Z"}, ["1", "2", "3"]),
+        ({"gt": "2024-01-31T10:15:30Z"}, ["2", "3"]),
+        ({"lt": "2024-01-01T00:00:00.001Z"}, ["4"]),
+        # Rounded bounds are rounded down for `gte` and `lt`,
+        # up to the last millisecond of the unit for `gt` and `lte`.
+        ({"gte": "2024-01-31T10:15:59Z||/m"}, ["1", "2", "3"]),
+        ({"gt": "2024-01-31T10:15:00Z||/m"}, ["2", "3"]),
+        ({"lte": "2024-01-31T10:15:00Z||/m"}, ["1", "4"]),
+        ({"lt": "2024-01-31T10:15:59Z||/m"}, ["4"]),
+        (
+            {"gte": "2024-01-31||/M", "lt": "2024-01-31||+1M/M"},
+            ["1", "2", "4"],
+        ),
+        ({"gte": "2024-01-15||/M", "lte": "2024-01-15||/M"}, ["1", "2", "4"]),
+        # Dates without the offset and the rounding are in the time zone.
+        (
+            {"gte": "2024-02-01", "time_zone": "+02:00"},
+            ["2", "3"],
+        ),
+        (
+            {"lt": "2024-02-01||/d", "time_zone": "+02:00"},
+            ["1", "4"],
+        ),
+        ({"gte": 1706659200000, "format": "epoch_millis"}, ["1", "2", "3"]),
+    ])
+    def test_date_range(self, date_index, bounds, expected):
+        assert sorted(self.ids(
+            date_index,
+            {"range": {"created": bounds}}
+        )) == expected
+
+    def test_date_math_relative(self):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        index = MemoryIndex({"properties": {"created": {"type": "date"}}})
+        index.add_many([
+            {"_id": "1", "created": (now - datetime.timedelta(hours=2))
+                .isoformat()},
+            {"_id": "2", "created": (now - datetime.timedelta(days=3))
+                .isoformat()},
+            {"_id": "3", "created": (now + datetime.timedelta(days=2))
+                .isoformat()},
+        ])
+
+        def ids(bounds):
+            return sorted(self.ids(index, {"range": {"created": bounds}}))
+
+        assert ids({"gte": "now-1d/h"}) == ["1", "3"]
+        assert ids({"gte": "now-1d/h", "lte": "now/d"}) == ["1"]
+        assert ids({"lt": "now-2d/d"}) == ["2"]
+        assert ids({"gt": "now/d"}) == ["3"]
+        assert ids({"gte": "now-2d", "time_zone": "+05:30"}) == ["1", "3"]
+
+    def test_date_math_unsupported(self, index, date_index):
+        # Date math is not compared as strings.
+        with pytest.raises(NotImplementedError):
+            index.search({
+                "query": {"range": {"category": {"gte": "now-1d/d"}}}
+            })
+        with pytest.raises(NotImplementedError):
+            date_index.search({
+                "query": {
+                    "range": {
+                        "created": {
+                            "gte": "31/01/2024",
+                            "format": "dd/MM/yyyy",
+                        }
+                    }
+                }
+            })
+        with pytest.raises(ValueError):
+            date_index.search({
+                "query": {"range": {"created": {"gte": "now-1x"}}}
+            })
+
+    def test_unsupported(self, index):
+        with pytest.raises(NotImplementedError):
+            index.search({"query": {"fuzzy": {"title": "quik"}}})
+        with pytest.raises(ValueError):
+            index.search({"query": {"term": {}, "match": {}}})
+
+
+class TestCaseMemoryElasticsearch:
+
+    def test_client(self):
+        client = MemoryElasticsearch()
+        client.indices.create(index="test", mappings={
+            "properties": {"category": {"type": "keyword"}}
+        })
+        client.indices.create(index="test", ignore=400)
+        for document in DOCUMENTS:
+            document = dict(document)
+            client.index(index="test", id=document.pop("_id"),
+                         document=document)
+
+        data = client.search(
+            index="test",
+            query={"term": {"category": "cooking"}},
+            size=1
+        )
+        assert data["hits"]["total"]["value"] == 2
+        assert [hit["_id"] for hit in data["hits"]["hits"]] == ["2"]
+        assert data["hits"]["hits"][0]["_source"]["price"] == 25.5
+
+        data = client.search(index="test", body={"from": 2})
+        assert [hit["_id"] for hit in data["hits"]["hits"]] == ["3"]
+
+        client.indices.delete(index="test")
+        client.indices.delete(index="test", ignore=[404])
+        with pytest.raises(KeyError):
+            client.indices.delete(index="test")
+
+    def test_terms_lookup(self):
+        client = MemoryElasticsearch()
+        for document in DOCUMENTS:
+            document = dict(document)
+            client.index(index="test", id=document.pop("_id"),
+                         document=document)
+        client.index(index="groups", id="1", document={
+            "access": {"categories": ["animals", "other"]},
+        })
+
+        data = client.search(index="test", query={"terms": {
+            "category": {
+                "index": "groups",
+                "id": "1",
+                "path": "access.categories",
+            },
+        }})
+        assert [hit["_id"] for hit in data["hits"]["hits"]] == ["1"]
+
+        data = client.search(index="test", query={"terms": {
+            "category": {"index": "groups", "id": "2", "path": "access"},
+        }})
+        assert data["hits"]["hits"] == []
+
+        with pytest.raises(NotImplementedError):
+            MemoryIndex().search({"query": {"terms": {
+                "category": {"index": "groups", "id": "1", "path": "a"},
+            }}})
+
+
+class TestCaseMemoryBuilderQueries:
+
+    @pytest.fixture
+    def cls(self):
+        return type("Builder", (ElasticsearchQueryBuilder,), {
+            "search": builder_fields.MultiMatchElasticField(
+                query_type="best_fields",
+                fields=["title", "authors.name"],
+            ),
+            "category": builder_fields.TermElasticField(
+                field_name="category.keyword",
+                input_type=str
+            ),
+            "categories": builder_fields.TermsElasticField(
+                field_name="category.keyword"
+            ),
+            "price_from": builder_fields.RangeElasticField(
+                field_name="price",
+                lookup_expr="gte",
+                input_type=float
+            ),
+            "available": builder_fields.ExistsElasticField(
+                field_name="available"
+            ),
+            "ids": builder_fields.IdsElasticField(),
+            "author": builder_fields.NestedElasticField(
+                path="authors",
+                child=builder_fields.MatchElasticField(
+                    field_name="name",
+                    input_type=str
+                )
+            ),
+        })
+
+    @pytest.fixture
+    def index(self):
+        index = MemoryIndex()
+        index.add_many(DOCUMENTS)
+        return index
+
+    @pytest.mark.parametrize("params, expected", [
+        ({}, ["1", "2", "3"]),
+        ({"search": "brown"}, ["3", "1"]),
+        ({"category": "cooking", "price_from": "10"}, ["2"]),
+        ({"categories": ["animals", "cooking"], "ids": ["1", "3"]},
+         ["1", "3"]),
+        ({"available": "false"}, ["3"]),
+        ({"author": "john", "search": "quick"}, ["1"]),
+    ])
+    def test_search(self, cls, index, params, expected):
+        hits = index.search(cls(params).query)
+        assert [doc_id for doc_id, _ in hits] == expected
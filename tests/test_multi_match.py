@@ -98,12 +98,7 @@ class TestCaseMultiMatchBestFieldsElasticField:
                ]["query"] == "test-text"
 
     def test_default_attrs(self, cls):
-        assert cls.multi_match_field._attrs == [
-            ("operator", None),
-            ("minimum_should_match", None),
-            ("fuzziness", None),
-            ("tie_breaker", None),
-        ]
+        assert cls.multi_match_field._attrs == ()
 
     def test_attr_operator(self, cls):
         cls.multi_match_field._attrs = [
@@ -303,11 +298,7 @@ class TestCaseMultiMatchMostFieldsElasticField:
                ]["query"] == "test-text"
 
     def test_default_attrs(self, cls):
-        assert cls.multi_match_field._attrs == [
-            ("operator", None),
-            ("minimum_should_match", None),
-            ("fuzziness", None),
-        ]
+        assert cls.multi_match_field._attrs == ()
 
     def test_attr_operator(self, cls):
         cls.multi_match_field._attrs = [
@@ -482,7 +473,7 @@ class TestCaseMultiMatchPhraseElasticField:
                ]["query"] == "test-text"
 
     def test_default_attrs(self, cls):
-        assert cls.multi_match_field._attrs == []
+        assert cls.multi_match_field._attrs == ()
 
 
 class TestCaseMultiMatchPhrasePrefixElasticField:
@@ -577,7 +568,7 @@ class TestCaseMultiMatchPhrasePrefixElasticField:
                ]["query"] == "test-text"
 
     def test_default_attrs(self, cls):
-        assert cls.multi_match_field._attrs == []
+        assert cls.multi_match_field._attrs == ()
 
 
 class TestCaseMultiMatchCrossFieldsElasticField:
@@ -674,10 +665,7 @@ class TestCaseMultiMatchCrossFieldsElasticField:
                ]["query"] == "test-text"
 
     def test_default_attrs(self, cls):
-        assert cls.multi_match_field._attrs == [
-            ("operator", None),
-            ("minimum_should_match", None),
-        ]
+        assert cls.multi_match_field._attrs == ()
 
     def test_attr_operator(self, cls):
         cls.multi_match_field._attrs = [
@@ -829,10 +817,7 @@ class TestCaseMultiMatchBoolPrefixElasticField:
                ]["query"] == "test-text"
 
     def test_default_attrs(self, cls):
-        assert cls.multi_match_field._attrs == [
-            ("operator", None),
-            ("minimum_should_match", None),
-        ]
+        assert cls.multi_match_field._attrs == ()
 
     def test_attr_operator(self, cls):
         cls.multi_match_field._attrs = [
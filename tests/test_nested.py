@@ -1,3 +1,6 @@
+import sys
+import threading
+
 import pytest
 
 from elasticsearch_query_builder import fields as builder_fields
@@ -91,3 +94,138 @@ class TestCaseNestedElasticField:
         assert query['query']['bool']['must'][0]["nested"]["query"]['match'][
                    "rootpath.changed_child_field_name"
                ]["query"] == "test-text"
+
+    def test_additional_queries(self, cls):
+        additional_queries = {
+            "rootpath": [{"term": {"rootpath.test": 1}}],
+        }
+        query = cls.nested_field.get_query(
+            "test-text",
+            "nested_field",
+            additional_queries=additional_queries
+        )
+        assert additional_queries == {
+            "rootpath": [{"term": {"rootpath.test": 1}}],
+        }
+        assert query == {
+            "nested": {
+                "path": "rootpath",
+                "query": {
+                    "bool": {
+                        "must": [
+                            {"term": {"rootpath.test": 1}},
+                            {
+                                "match": {
+                                    "rootpath.match_test_field": {
+                                        "query": "test-text"
+                                    }
+                                }
+                            }
+                        ]
+                    }
+                }
+            }
+        }
+
+    def test_choice_child(self, cls):
+        cls.nested_field = builder_fields.NestedElasticField(
+            path="rootpath",
+            child=builder_fields.ChoiceElasticField(
+                choices=["1", "2"],
+                child=builder_fields.TermElasticField(
+                    field_name="term_test_field",
+                    input_type=str
+                )
+            )
+        )
+
+        query = cls({"nested_field": "1"}).query
+        assert query['query']['bool']['must'][0]["nested"]["query"] == {
+            "term": {
+                "rootpath.term_test_field": "1"
+            }
+        }
+
+    def test_logic_operator(self, cls):
+        cls.nested_field = builder_fields.NestedElasticField(
+            path="rootpath",
+            child=builder_fields.ExistsElasticField(field_name="cover")
+        )
+        nested = {
+            "nested": {
+                "path": "rootpath",
+                "query": {"exists": {"field": "rootpath.cover"}},
+            }
+        }
+        # Logic operator of the nested field by default.
+        assert cls({"nested_field": False}).query == {
+            "query": {"bool": {"must": [nested]}}
+        }
+
+        cls.nested_field = builder_fields.NestedElasticField(
+            path="rootpath",
+            child=builder_fields.TermElasticField(
+                field_name="status",
+                input_type=str,
+                logic_operator="should"
+            )
+        )
+        assert list(cls({"nested_field": "new"}).query["query"]["bool"]) \
+            == ["must"]
+
+        cls.nested_field = builder_fields.NestedElasticField(
+            path="rootpath",
+            child=builder_fields.ExistsElasticField(field_name="cover"),
+            delegate_logic_operator=True
+        )
+        assert cls({"nested_field": False}).query == {
+            "query": {"bool": {"must_not": [nested]}}
+        }
+        assert cls({"nested_field": True}).query == {
+            "query": {"bool": {"must": [nested]}}
+        }
+
+        cls.nested_field = builder_fields.NestedElasticField(
+            path="rootpath",
+            child=builder_fields.ExistsElasticField(field_name="cover"),
+            logic_operator="should",
+            delegate_logic_operator=True
+        )
+        assert cls({"nested_field": False}).query == {
+            "query": {"bool": {"should": [nested]}}
+        }
+
+    def test_threads(self, cls):
+        other_field = builder_fields.NestedElasticField(
+            path="otherpath",
+            child=cls.nested_field._child
+        )
+        expected = {
+            cls.nested_field: "rootpath.match_test_field",
+            other_field: "otherpath.match_test_field",
+        }
+        errors = []
+
+        def build(field):
+            for _ in range(2000):
+                query = field.get_query("test-text", "nested_field")
+                field_names = list(query["nested"]["query"]["match"])
+                if field_names != [expected[field]]:
+                    errors.append(field_names)
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [
+                threading.Thread(target=build, args=(field,))
+                for field in list(expected) * 4
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        assert errors == []
+        assert cls.nested_field._child.field_name == "match_test_field"
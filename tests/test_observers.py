@@ -0,0 +1,113 @@
+import json
+
+from elasticsearch_query_builder import fields as builder_fields
+from elasticsearch_query_builder.builders import ElasticsearchQueryBuilder
+from elasticsearch_query_builder.observers import (
+    AggregatingObserver,
+    QueryBuilderObserver
+)
+
+
+class RecordingObserver(QueryBuilderObserver):
+
+    def __init__(self):
+        self.events = []
+
+    def on_start(self, builder, stage, field_query_name):
+        self.events.append(("start", stage, field_query_name))
+
+    def on_end(self, builder, stage, field_query_name, elapsed, size=None):
+        assert elapsed >= 0
+        self.events.append(("end", stage, field_query_name, size))
+
+
+class Builder(ElasticsearchQueryBuilder):
+    term_field = builder_fields.TermElasticField(
+        field_name="term_field_test",
+        input_type=int
+    )
+    terms_field = builder_fields.TermsElasticField(
+        field_name="terms_field_test"
+    )
+
+    def get_additional_term_field_queries(self):
+        return [{"term": {"additional_test": 1}}]
+
+
+class TestCaseObservers:
+
+    def test_events(self):
+        observer = RecordingObserver()
+        cls = type("ObservedBuilder", (Builder,), {"observer": observer})
+
+        query = cls({"term_field": "1", "terms_field": []}).query
+        assert query == Builder({"term_field": "1", "terms_field": []}).query
+
+        term_size = len(json.dumps(query["query"]["bool"]["must"][0]))
+        assert observer.events == [
+            ("start", "normalize", "term_field"),
+            ("end", "normalize", "term_field", None),
+            ("start", "normalize", "terms_field"),
+            ("end", "normalize", "terms_field", None),
+            ("start", "hook", "term_field"),
+            ("end", "hook", "term_field", None),
+            ("start", "hook", "terms_field"),
+            ("end", "hook", "terms_field", None),
+            ("start", "build", "term_field"),
+            ("end", "build", "term_field", term_size),
+            ("start", "build", "terms_field"),
+            ("end", "build", "terms_field", 0),
+            ("start", "common", None),
+            ("end", "common", None, None),
+        ]
+
+    def test_query_bytes(self):
+        observer = RecordingObserver()
+        cls = type("ObservedBuilder", (Builder,), {"observer": observer})
+
+        query_bytes = cls({"term_field": "1", "terms_field": []}).query_bytes()
+        query_events = observer.events
+        observer.events = []
+        query = cls({"term_field": "1", "terms_field": []}).query
+
+        assert query_bytes == json.dumps(query).encode("utf-8")
+        assert observer.events == query_events
+
+    def test_invalid_input(self):
+        observer = RecordingObserver()
+        cls = type("ObservedBuilder", (Builder,), {"observer": observer})
+
+        try:
+            cls({"term_field": "test-text"}).query
+        except ValueError:
+            assert True
+        else:
+            assert False
+
+        assert observer.events == [
+            ("start", "normalize", "term_field"),
+            ("end", "normalize", "term_field", None),
+        ]
+
+    def test_aggregating_observer(self):
+        observer = AggregatingObserver()
+        cls = type("ObservedBuilder", (Builder,), {
+            "observer": observer,
+            "compiled": True,
+        })
+
+        for i in range(3):
+            cls({"term_field": str(i)}).query
+
+        stats = observer.get_stats()
+        assert list(stats) == ["ObservedBuilder"]
+        assert set(stats["ObservedBuilder"]) == {"term_field", None}
+        field_stats = stats["ObservedBuilder"]["term_field"]
+        assert set(field_stats) == {"normalize", "hook", "build"}
+        assert field_stats["build"]["count"] == 3
+        assert field_stats["build"]["total_size"] > 0
+        assert field_stats["hook"]["total_time"] >= 0
+        assert stats["ObservedBuilder"][None]["common"]["count"] == 3
+
+        observer.reset()
+        assert observer.get_stats() == {}
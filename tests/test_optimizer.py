@@ -0,0 +1,302 @@
+import json
+
+import pytest
+
+from elasticsearch_query_builder import ElasticsearchQueryBuilder
+from elasticsearch_query_builder import fields as builder_fields
+from elasticsearch_query_builder.memory import MemoryIndex
+from elasticsearch_query_builder.observers import AggregatingObserver
+from elasticsearch_query_builder.optimizer import optimize_query
+
+
+TERM_A = {"term": {"a": 1}}
+TERM_B = {"term": {"b": 2}}
+TERM_C = {"term": {"c": 3}}
+
+
+class TestCaseOptimizeQuery:
+
+    @pytest.mark.parametrize("query, expected", [
+        ({}, {}),
+        ({"query": {"bool": {}}}, {"query": {"match_all": {}}}),
+        (
+            {"query": {"bool": {"must": [TERM_A]}}},
+            {"query": TERM_A},
+        ),
+        (
+            {"query": {"bool": {"should": [TERM_A]}}},
+            {"query": TERM_A},
+        ),
+        # Filter scores are not the same as must scores at the top level.
+        (
+            {"query": {"bool": {"filter": [TERM_A]}}},
+            {"query": {"bool": {"filter": [TERM_A]}}},
+        ),
+        (
+            {"query": {"bool": {"must": [
+                {"bool": {"must": [TERM_A, TERM_B]}},
+                {"bool": {"must": [TERM_C], "must_not": [TERM_A]}},
+            ]}}},
+            {"query": {"bool": {
+                "must": [TERM_A, TERM_B, TERM_C],
+                "must_not": [TERM_A],
+            }}},
+        ),
+        (
+            {"query": {"bool": {
+                "must": [TERM_A],
+                "filter": [
+                    {"bool": {"must": [TERM_B], "filter": [TERM_C]}},
+                    {"bool": {}},
+                ],
+            }}},
+            {"query": {"bool": {
+                "must": [TERM_A],
+                "filter": [TERM_B, TERM_C],
+            }}},
+        ),
+        (
+            {"query": {"bool": {"must": [TERM_A, TERM_A, TERM_B]}}},
+            {"query": {"bool": {"must": [TERM_A, TERM_B]}}},
+        ),
+        (
+            {"query": {"bool": {"should": [
+                {"term": {"a": 1}},
+                {"bool": {"should": [
+                    {"term": {"a": {"value": 2}}},
+                    {"terms": {"a": [1, 3]}},
+                ]}},
+                TERM_B,
+            ]}}},
+            {"query": {"bool": {"should": [
+                {"terms": {"a": [1, 2, 3]}},
+                TERM_B,
+            ]}}},
+        ),
+        (
+            {"query": {"bool": {"must_not": [
+                {"term": {"a": 1}},
+                {"bool": {"should": [{"term": {"a": 2}}, TERM_B]}},
+            ]}}},
+            {"query": {"bool": {"must_not": [
+                {"terms": {"a": [1, 2]}},
+                TERM_B,
+            ]}}},
+        ),
+        # Same field terms are not alternatives in must.
+        (
+            {"query": {"bool": {"must": [
+                {"term": {"a": 1}},
+                {"term": {"a": 2}},
+            ]}}},
+            {"query": {"bool": {"must": [
+                {"term": {"a": 1}},
+                {"term": {"a": 2}},
+            ]}}},
+        ),
+        (
+            {"query": {"bool": {
+                "must": [{"bool": {"must": [TERM_A]}}],
+                "should": [TERM_B, TERM_C],
+            }}},
+            {"query": {"bool": {
+                "must": [TERM_A],
+                "should": [TERM_B, TERM_C],
+            }}},
+        ),
+        (
+            {"query": {"bool": {
+                "should": [TERM_A, TERM_A, TERM_B],
+                "minimum_should_match": 2,
+            }}},
+            {"query": {"bool": {
+                "should": [TERM_A, TERM_A, TERM_B],
+                "minimum_should_match": 2,
+            }}},
+        ),
+        (
+            {"query": {"bool": {"must": [TERM_A], "boost": 2}}},
+            {"query": {"bool": {"must": [TERM_A], "boost": 2}}},
+        ),
+        (
+            {"query": {"nested": {
+                "path": "p",
+                "query": {"bool": {"must": [
+                    {"bool": {"must": [{"term": {"p.a": 1}}]}},
+                ]}},
+            }}},
+            {"query": {"nested": {
+                "path": "p",
+                "query": {"term": {"p.a": 1}},
+            }}},
+        ),
+        (
+            {"query": {"constant_score": {
+                "filter": {"bool": {"filter": [TERM_A]}},
+            }}},
+            {"query": {"constant_score": {"filter": TERM_A}}},
+        ),
+    ])
+    def test_optimize(self, query, expected):
+        assert optimize_query(query) == expected
+
+    def test_max_terms_count(self):
+        query = {"query": {"bool": {"should": [
+            {"terms": {"a": [1, 2]}},
+            {"terms": {"a": [3]}},
+            {"term": {"b": 1}},
+            {"term": {"b": 2}},
+        ]}}}
+        assert optimize_query(query, max_terms_count=2) == {
+            "query": {"bool": {"should": [
+                {"terms": {"a": [1, 2]}},
+                {"terms": {"a": [3]}},
+                {"terms": {"b": [1, 2]}},
+            ]}}
+        }
+
+    def test_not_mutated(self):
+        query = {"query": {"bool": {"must": [
+            {"bool": {"must": [TERM_A, TERM_B]}},
+        ]}}}
+        optimize_query(query)
+        assert query == {"query": {"bool": {"must": [
+            {"bool": {"must": [TERM_A, TERM_B]}},
+        ]}}}
+
+
+class TestCaseOptimizedBuilder:
+
+    @pytest.fixture
+    def cls(self):
+        class Builder(ElasticsearchQueryBuilder):
+            optimized = True
+
+            category = builder_fields.TermElasticField(
+                field_name="category",
+                input_type=str
+            )
+            other_category = builder_fields.TermElasticField(
+                field_name="category",
+                input_type=str,
+                logic_operator="should"
+            )
+            excluded_category = builder_fields.TermElasticField(
+                field_name="category",
+                input_type=str,
+                logic_operator="must_not"
+            )
+            excluded_price = builder_fields.RangeElasticField(
+                field_name="price",
+                lookup_expr="lt",
+                input_type=int,
+                logic_operator="must_not"
+            )
+            price_from = builder_fields.RangeElasticField(
+                field_name="price",
+                lookup_expr="gte",
+                input_type=int
+            )
+
+            def get_additional_category_queries(self):
+                return [{"term": {"tenant": "t1"}}]
+
+            def get_additional_price_from_queries(self):
+                return [{"term": {"tenant": "t1"}}]
+
+        return Builder
+
+    def test_query(self, cls):
+        query = cls({
+            "category": "books",
+            "price_from": "10",
+            "excluded_category": "music",
+        }).query
+        assert query == {
+            "query": {
+                "bool": {
+                    "must": [
+                        {"term": {"tenant": "t1"}},
+                        {"term": {"category": "books"}},
+                        {"range": {"price": {"gte": 10}}},
+                    ],
+                    "must_not": [{"term": {"category": "music"}}],
+                }
+            }
+        }
+        assert cls({"category": "books"}).query_bytes() == json.dumps(
+            {
+                "query": {
+                    "bool": {
+                        "must": [
+                            {"term": {"tenant": "t1"}},
+                            {"term": {"category": "books"}},
+                        ]
+                    }
+                }
+            }
+        ).encode("utf-8")
+
+    def test_not_optimized(self, cls):
+        cls.optimized = False
+        query = cls({"category": "books"}).query
+        assert query["query"]["bool"]["must"][0]["bool"]["must"] == [
+            {"term": {"tenant": "t1"}},
+            {"term": {"category": "books"}},
+        ]
+
+    def test_build_many(self, cls):
+        assert cls.build_many([{"category": "books"}]) == [
+            {
+                "query": {
+                    "bool": {
+                        "must": [
+                            {"term": {"tenant": "t1"}},
+                            {"term": {"category": "books"}},
+                        ]
+                    }
+                }
+            }
+        ]
+
+    def test_observer(self, cls):
+        cls.observer = AggregatingObserver()
+        cls({"category": "books"}).query
+        stats = cls.observer.get_stats()["TestCaseOptimizedBuilder."
+                                         "cls.<locals>.Builder"]
+        assert stats[None]["optimize"]["count"] == 1
+
+    @pytest.mark.parametrize("params", [
+        {"category": "books"},
+        {"category": "books", "price_from": "5"},
+        {"excluded_category": "music", "excluded_price": "7"},
+        {"other_category": "books", "price_from": "5"},
+        {"category": "music", "excluded_category": "music"},
+    ])
+    def test_same_documents(self, cls, params):
+        index = MemoryIndex({
+            "properties": {
+                "category": {"type": "keyword"},
+                "tenant": {"type": "keyword"},
+                "price": {"type": "integer"},
+            }
+        })
+        index.add_many(
+            {
+                "category": category,
+                "tenant": tenant,
+                "price": price,
+            }
+            for category in ("books", "music")
+            for tenant in ("t1", "t2")
+            for price in range(0, 12, 3)
+        )
+
+        optimized = cls(params).query
+        cls.optimized = False
+        query = cls(params).query
+        assert sorted(
+            doc_id for doc_id, _ in index.search(optimized)
+        ) == sorted(
+            doc_id for doc_id, _ in index.search(query)
+        )
@@ -0,0 +1,162 @@
+import pytest
+
+from elasticsearch_query_builder import ElasticsearchQueryBuilder
+from elasticsearch_query_builder import fields as builder_fields
+from elasticsearch_query_builder.percolator import Percolator
+
+
+class TestCasePercolator:
+
+    @pytest.fixture
+    def cls(self):
+        return type("Builder", (ElasticsearchQueryBuilder,), {
+            "search": builder_fields.MatchElasticField(
+                field_name="title",
+                input_type=str
+            ),
+            "category": builder_fields.TermElasticField(
+                field_name="category.keyword",
+                input_type=str
+            ),
+            "years": builder_fields.TermsElasticField(field_name="year"),
+            "price_to": builder_fields.RangeElasticField(
+                field_name="price",
+                lookup_expr="lte",
+                input_type=int
+            ),
+            "ids": builder_fields.IdsElasticField(),
+            "discount": builder_fields.ExistsElasticField(
+                field_name="discount"
+            ),
+            "author": builder_fields.NestedElasticField(
+                path="authors",
+                child=builder_fields.TermElasticField(
+                    field_name="role",
+                    input_type=str
+                )
+            ),
+        })
+
+    @pytest.fixture
+    def percolator(self, cls):
+        percolator = Percolator()
+        percolator.add("books", cls({"category": "books"}).query)
+        percolator.add("cheap_books", cls({
+            "category": "books",
+            "price_to": "10",
+        }).query)
+        percolator.add("fox", cls({"search": "fox"}).query)
+        percolator.add("old", cls({"years": [1990, 1991]}).query)
+        percolator.add("first", cls({"ids": ["1"]}).query)
+        percolator.add("discount", cls({"discount": "true"}).query)
+        percolator.add("editor", cls({"author": "editor"}).query)
+        percolator.add("all", cls({}).query)
+        return percolator
+
+    def test_keys(self, percolator):
+        assert percolator._keys["books"] == {
+            ("term", "category.keyword", "books")
+        }
+        # Term is more selective than exists.
+        assert percolator._keys["cheap_books"] == {
+            ("term", "category.keyword", "books")
+        }
+        assert percolator._keys["old"] == {
+            ("term", "year", 1990.0),
+            ("term", "year", 1991.0),
+        }
+        assert percolator._keys["first"] == {("id", "1")}
+        assert percolator._keys["discount"] == {("exists", "discount")}
+        assert percolator._keys["editor"] == {
+            ("term", "authors.role", "editor")
+        }
+        assert percolator._keys["fox"] is None
+        assert percolator._unindexed == {"fox", "all"}
+
+    def test_should_keys(self):
+        percolator = Percolator()
+        percolator.add("should", {
+            "query": {
+                "bool": {
+                    "should": [
+                        {"term": {"a": 1}},
+                        {"ids": {"values": ["2"]}},
+                    ]
+                }
+            }
+        })
+        percolator.add("should_match", {
+            "query": {
+                "bool": {
+                    "should": [
+                        {"term": {"a": 1}},
+                        {"match": {"b": "text"}},
+                    ]
+                }
+            }
+        })
+        assert percolator._keys["should"] == {("term", "a", 1.0), ("id", "2")}
+        assert percolator._keys["should_match"] is None
+
+    def test_percolate(self, percolator):
+        assert sorted(percolator.percolate({
+            "_id": "1",
+            "title": "The quick brown fox",
+            "category": "books",
+            "price": 5,
+            "year": 1990,
+        })) == ["all", "books", "cheap_books", "first", "fox", "old"]
+
+        assert sorted(percolator.percolate({
+            "_id": "2",
+            "title": "Lazy dogs",
+            "category": "books",
+            "price": 50,
+            "discount": 10,
+            "authors": [{"role": "editor"}],
+        })) == ["all", "books", "discount", "editor"]
+
+        assert percolator.percolate({"category": "music"}) == ["all"]
+
+    def test_percolate_many(self, percolator):
+        documents = (
+            {"_id": str(i), "category": "books", "price": i}
+            for i in range(20)
+        )
+        results = list(percolator.percolate_many(documents, batch_size=3))
+        assert len(results) == 20
+        for document, query_ids in results:
+            expected = ["all", "books"]
+            if document["price"] <= 10:
+                expected.append("cheap_books")
+            if document["_id"] == "1":
+                expected.append("first")
+            assert sorted(query_ids) == expected
+
+    def test_percolate_many_duplicate_ids(self, percolator):
+        results = list(percolator.percolate_many([
+            {"_id": "1", "category": "books"},
+            {"_id": "1", "category": "music"},
+        ]))
+        assert [
+            sorted(query_ids) for _, query_ids in results
+        ] == [
+            ["all", "books", "first"],
+            ["all", "first"],
+        ]
+
+    def test_remove(self, percolator):
+        percolator.remove("books")
+        percolator.remove("fox")
+        assert "books" not in percolator and len(percolator) == 6
+        assert sorted(percolator.percolate({
+            "category": "books",
+            "title": "fox",
+        })) == ["all"]
+
+        percolator.add("all", {"query": {"term": {"category": "music"}}})
+        assert percolator.percolate({"category": "books"}) == []
+
+    def test_invalid_batch_size(self, percolator):
+        with pytest.raises(ValueError):
+            list(percolator.percolate_many([{}], batch_size=0))
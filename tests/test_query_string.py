@@ -85,23 +85,17 @@ class TestCaseMatchElasticField:
                ]["query"] == "test-text"
 
     def test_default_attrs(self, cls):
-        assert cls.query_string_field._attrs == [
-            ("fuzziness", None),
-            ("default_operator", None),
-            ("minimum_should_match", None),
+        assert cls.query_string_field._attrs == (
             ("default_field", "query_string_field_test"),
-        ]
+        )
 
     def test_default_attrs_with_fields(self, cls):
         cls.query_string_field_2 = builder_fields.QueryStringElasticField(
             fields=["sample_1", "sample_2"]
         )
-        assert cls.query_string_field_2._attrs == [
-            ("fuzziness", None),
-            ("default_operator", None),
-            ("minimum_should_match", None),
+        assert cls.query_string_field_2._attrs == (
             ("fields", ["sample_1", "sample_2"]),
-        ]
+        )
 
     def test_attr_fuzziness(self, cls):
         cls.query_string_field._attrs = [
@@ -1,6 +1,13 @@
+import datetime
+import json
+
 import pytest
 
+from elasticsearch_query_builder import builders
 from elasticsearch_query_builder import fields as builder_fields
+from elasticsearch_query_builder.builders import ElasticsearchQueryBuilder
+from elasticsearch_query_builder.cache import QueryCache
+from elasticsearch_query_builder.memory import MemoryIndex
 from .builder import ElasticSearchQueryTestBuilder
 
 
@@ -211,6 +218,520 @@ class TestCaseRangeElasticField:
             assert False
 
 
+class TestCaseTwoSidedRangeElasticField:
+
+    @pytest.fixture
+    def cls(self):
+        cls = ElasticSearchQueryTestBuilder
+        cls.two_sided_range_field = builder_fields.TwoSidedRangeElasticField(
+            field_name="range_field_test",
+            input_type=int
+        )
+        return cls
+
+    @pytest.mark.parametrize("value, expected", [
+        (["1", "10"], {"gte": 1, "lte": 10}),
+        ((0, None), {"gte": 0}),
+        ([None, 10.5], {"lte": 10}),
+        (["", "10"], {"lte": 10}),
+        ({"gte": "1"}, {"gte": 1}),
+        ({"gte": 1, "lte": 10}, {"gte": 1, "lte": 10}),
+    ])
+    def test_query(self, cls, value, expected):
+        query = cls({"two_sided_range_field": value}).query
+        assert query == {
+            "query": {
+                "bool": {
+                    "must": [
+                        {
+                            "range": {
+                                "range_field_test": expected
+                            }
+                        }
+                    ]
+                }
+            }
+        }
+        assert cls({"two_sided_range_field": value}).query_bytes() \
+            == json.dumps(query).encode("utf-8")
+
+    def test_empty(self, cls):
+        assert cls({"two_sided_range_field": [None, None]}).query == {}
+        assert cls({"two_sided_range_field": {}}).query == {}
+
+    @pytest.mark.parametrize("value", [
+        "1",
+        [1],
+        [1, 2, 3],
+        ["a", 1],
+        {"gt": 1},
+        {"gte": 1, "lt": 10},
+    ])
+    def test_validation(self, cls, value):
+        with pytest.raises(ValueError):
+            cls({"two_sided_range_field": value}).query
+
+    def test_lookup_expr(self):
+        field = builder_fields.TwoSidedRangeElasticField(
+            field_name="range_field_test",
+            input_type=float,
+            lower_lookup_expr="gt",
+            upper_lookup_expr="lt"
+        )
+        assert field.get_query((1.5, 2.5), "range") == {
+            "range": {"range_field_test": {"gt": 1.5, "lt": 2.5}}
+        }
+        with pytest.raises(AssertionError):
+            builder_fields.TwoSidedRangeElasticField(
+                input_type=int,
+                lower_lookup_expr="lt"
+            )
+
+
+class TestCaseRangeMerge:
+
+    @pytest.fixture(params=[False, True], ids=["interpreted", "compiled"])
+    def cls(self, request):
+        return type("Builder", (ElasticsearchQueryBuilder,), {
+            "compiled": request.param,
+            "merge_ranges": True,
+            "price_min": builder_fields.RangeElasticField(
+                field_name="price",
+                lookup_expr="gte",
+                input_type=int
+            ),
+            "price_max": builder_fields.RangeElasticField(
+                field_name="price",
+                lookup_expr="lt",
+                input_type=int
+            ),
+            "price_below": builder_fields.RangeElasticField(
+                field_name="price",
+                lookup_expr="lte",
+                input_type=int
+            ),
+            "price": builder_fields.TwoSidedRangeElasticField(
+                field_name="price",
+                input_type=int
+            ),
+            "year_min": builder_fields.RangeElasticField(
+                field_name="year",
+                lookup_expr="gte",
+                input_type=int
+            ),
+            "excluded_price_min": builder_fields.RangeElasticField(
+                field_name="price",
+                lookup_expr="gte",
+                input_type=int,
+                logic_operator="must_not"
+            ),
+            "excluded_price_max": builder_fields.RangeElasticField(
+                field_name="price",
+                lookup_expr="lte",
+                input_type=int,
+                logic_operator="must_not"
+            ),
+        })
+
+    @pytest.mark.parametrize("params, expected", [
+        (
+            {"price_min": "1", "year_min": "2000", "price_max": "10"},
+            {
+                "must": [
+                    {"range": {"price": {"gte": 1, "lt": 10}}},
+                    {"range": {"year": {"gte": 2000}}},
+                ]
+            },
+        ),
+        (
+            {"price_max": "10", "price": [1, None]},
+            {"must": [{"range": {"price": {"lt": 10, "gte": 1}}}]},
+        ),
+        # Upper bounds are not merged together.
+        (
+            {"price_max": "10", "price_below": "5", "price_min": "1"},
+            {
+                "must": [
+                    {"range": {"price": {"lt": 10, "gte": 1}}},
+                    {"range": {"price": {"lte": 5}}},
+                ]
+            },
+        ),
+        # Either of must_not clauses excludes a document.
+        (
+            {"excluded_price_min": "10", "excluded_price_max": "1"},
+            {
+                "must_not": [
+                    {"range": {"price": {"gte": 10}}},
+                    {"range": {"price": {"lte": 1}}},
+                ]
+            },
+        ),
+    ])
+    def test_query(self, cls, params, expected):
+        expected = {"query": {"bool": expected}}
+        assert cls(dict(params)).query == expected
+        assert cls(dict(params)).query_bytes() \
+            == json.dumps(expected).encode("utf-8")
+
+    def test_not_merged(self, cls):
+        cls.merge_ranges = False
+        params = {"price_min": "50", "price_below": "10"}
+        expected = {
+            "query": {
+                "bool": {
+                    "must": [
+                        {"range": {"price": {"gte": 50}}},
+                        {"range": {"price": {"lte": 10}}},
+                    ]
+                }
+            }
+        }
+        assert cls(dict(params)).query == expected
+        assert cls(dict(params)).query_bytes() \
+            == json.dumps(expected).encode("utf-8")
+
+        # Separate clauses match the different values of the document.
+        index = MemoryIndex()
+        index.add("1", {"price": [1, 100]})
+        assert [doc_id for doc_id, _ in index.search(expected)] == ["1"]
+
+    @pytest.mark.parametrize("params, expected", [
+        ({"price": [0, None]}, {"gte": 0}),
+        ({"price": ["0", ""], "price_max": 10}, {"gte": 0, "lt": 10}),
+        ({"price_min": 0, "price": [None, 0]}, {"lte": 0}),
+        ({"price_min": "0", "price_max": 10}, {"lt": 10}),
+    ])
+    def test_zero(self, cls, params, expected):
+        # Zero is a bound of the two-sided range only, range fields
+        # give no query for it.
+        query = {"query": {"bool": {"must": [{"range": {"price": expected}}]}}}
+        assert cls(dict(params)).query == query
+        assert cls(dict(params)).query_bytes() \
+            == json.dumps(query).encode("utf-8")
+
+    def test_empty(self, cls):
+        assert cls({"price_min": 0}).query == {}
+        assert cls({"price_min": 0}).query_bytes() == b"{}"
+        assert cls({"price": ["", None]}).query == {}
+        with pytest.raises(ValueError):
+            cls({"price_min": ""}).query
+
+    def test_additional_queries(self, cls):
+        calls = []
+
+        def get_additional_price_min_queries(self):
+            calls.append(1)
+            return [{"term": {"tenant": "t1"}}]
+
+        cls.get_additional_price_min_queries = get_additional_price_min_queries
+        params = {"price_min": "1", "price_max": "10", "price": ["2", None]}
+        assert cls(dict(params)).query_bytes() == json.dumps({
+            "query": {
+                "bool": {
+                    "must": [
+                        {
+                            "bool": {
+                                "must": [
+                                    {"term": {"tenant": "t1"}},
+                                    {"range": {"price": {"gte": 1}}},
+                                ]
+                            }
+                        },
+                        {"range": {"price": {"lt": 10, "gte": 2}}},
+                    ]
+                }
+            }
+        }).encode("utf-8")
+        assert calls == [1]
+
+    def test_options(self):
+        clauses = [{"range": {"date": {"gte": "now-1d", "format": "x"}}}]
+        merged = builders._merge_range_query(
+            clauses,
+            {"range": {"date": {"lte": "now"}}}
+        )
+        assert not merged
+        assert builders._merge_range_query(
+            clauses,
+            {"range": {"date": {"lte": "now", "format": "x"}}}
+        )
+        assert clauses == [
+            {"range": {"date": {"gte": "now-1d", "format": "x", "lte": "now"}}}
+        ]
+
+
+class TestCaseDateRangeElasticField:
+
+    @pytest.fixture(params=[False, True], ids=["interpreted", "compiled"])
+    def cls(self, request):
+        return type("Builder", (ElasticsearchQueryBuilder,), {
+            "compiled": request.param,
+            "merge_ranges": True,
+            "created_from": builder_fields.RangeElasticField(
+                field_name="created",
+                lookup_expr="gte",
+                input_type=datetime.datetime,
+                time_zone="+01:00",
+                rounding="m"
+            ),
+            "created_to": builder_fields.RangeElasticField(
+                field_name="created",
+                lookup_expr="lt",
+                input_type=datetime.datetime,
+                time_zone="+01:00",
+                rounding="m"
+            ),
+            "published": builder_fields.TwoSidedRangeElasticField(
+                field_name="published",
+                input_type=datetime.date,
+                format="yyyy-MM-dd",
+                rounding="M"
+            ),
+            "updated": builder_fields.RangeElasticField(
+                field_name="updated",
+                lookup_expr="gte",
+                input_type=datetime.datetime
+            ),
+        })
+
+    def _get_clauses(self, builder):
+        query = builder.query
+        assert builder.query_bytes() == json.dumps(query).encode("utf-8")
+        return query["query"]["bool"]["must"]
+
+    @pytest.mark.parametrize("params, expected", [
+        (
+            {"created_from": "now-1d", "created_to": "now/h"},
+            [
+                {
+                    "range": {
+                        "created": {
+                            "gte": "now-1d/m",
+                            "time_zone": "+01:00",
+                            "lt": "now/h",
+                        }
+                    }
+                },
+            ],
+        ),
+        (
+            {"created_from": "2024-01-31T10:15:42.500Z"},
+            [
+                {
+                    "range": {
+                        "created": {
+                            "gte": "2024-01-31T10:15:00+00:00||/m",
+                            "time_zone": "+01:00",
+                        }
+                    }
+                },
+            ],
+        ),
+        (
+            {"published": [datetime.date(2024, 1, 31), "last 1y"]},
+            [
+                {
+                    "range": {
+                        "published": {
+                            "gte": "2024-01-01||/M",
+                            "lte": "now-1y/M",
+                            "format": "yyyy-MM-dd",
+                        }
+                    }
+                },
+            ],
+        ),
+        (
+            {"updated": " last 24h "},
+            [{"range": {"updated": {"gte": "now-24h"}}}],
+        ),
+        (
+            {"updated": "2024-01-31T10:15:42"},
+            [{"range": {"updated": {"gte": "2024-01-31T10:15:42"}}}],
+        ),
+    ])
+    def test_query(self, cls, params, expected):
+        assert self._get_clauses(cls(params)) == expected
+
+    def test_query_cache(self, cls):
+        cls.query_cache = QueryCache()
+        cls({"created_from": "2024-01-31T10:15:01"}).query
+        cls({"created_from": "2024-01-31T10:15:59"}).query
+        cls({"created_from": datetime.datetime(2024, 1, 31, 10, 15)}).query
+        assert cls.query_cache.info().hits == 2
+
+    @pytest.mark.parametrize("field_query_name, value", [
+        ("created_from", "now-1x"),
+        ("created_from", "yesterday"),
+        ("created_from", "last h"),
+        ("published", ["now+", None]),
+    ])
+    def test_validation(self, cls, field_query_name, value):
+        with pytest.raises(ValueError):
+            cls({field_query_name: value}).query
+
+    @pytest.mark.parametrize("rounding, expected", [
+        ("s", "2024-05-15T10:15:42"),
+        ("m", "2024-05-15T10:15:00"),
+        ("H", "2024-05-15T10:00:00"),
+        ("d", "2024-05-15T00:00:00"),
+        ("w", "2024-05-13T00:00:00"),
+        ("M", "2024-05-01T00:00:00"),
+        ("y", "2024-01-01T00:00:00"),
+    ])
+    def test_rounding(self, cls, rounding, expected):
+        cls.updated = builder_fields.RangeElasticField(
+            field_name="updated",
+            lookup_expr="gte",
+            input_type=datetime.datetime,
+            rounding=rounding
+        )
+        assert self._get_clauses(cls({
+            "updated": "2024-05-15T10:15:42.123",
+        })) == [
+            {"range": {"updated": {"gte": expected + "||/" + rounding}}}
+        ]
+
+    def test_memory(self, cls):
+        index = MemoryIndex({
+            "properties": {
+                "created": {"type": "date"},
+                "published": {"type": "date"},
+            }
+        })
+        index.add_many([
+            {
+                "_id": "1",
+                "created": "2024-01-31T10:15:30Z",
+                "published": "2024-01-05",
+            },
+            {
+                "_id": "2",
+                "created": "2024-01-31T11:16:00+01:00",
+                "published": "2023-12-31",
+            },
+        ])
+
+        def search(params):
+            return sorted(
+                doc_id for doc_id, _ in index.search(cls(params).query)
+            )
+
+        assert search({"published": ["2024-01-31", None]}) == ["1"]
+        assert search({"published": [None, "2023-12-01"]}) == ["2"]
+        # Bounds are rounded to the minute in the `+01:00` time zone.
+        assert search({"created_from": "2024-01-31T11:15:59+01:00"}) \
+            == ["1", "2"]
+        assert search({"created_to": "2024-01-31T11:16:30+01:00"}) == ["1"]
+
+    @pytest.mark.parametrize("compiled", [False, True])
+    @pytest.mark.parametrize("field, value, expected", [
+        (
+            {"format": "epoch_millis"},
+            1700000000000,
+            {"gte": 1700000000000, "format": "epoch_millis"},
+        ),
+        (
+            {"format": "epoch_millis"},
+            datetime.datetime(2023, 11, 14, 22, 13, 20),
+            {"gte": 1700000000000, "format": "epoch_millis"},
+        ),
+        (
+            {"format": "epoch_millis", "rounding": "d"},
+            datetime.datetime(2023, 11, 14, 22, 13, 20),
+            {"gte": "1699920000000||/d", "format": "epoch_millis"},
+        ),
+        (
+            {"format": "epoch_second||strict_date_optional_time"},
+            "2023-11-14T22:13:20Z",
+            {
+                "gte": "2023-11-14T22:13:20+00:00",
+                "format": "epoch_second||strict_date_optional_time",
+            },
+        ),
+        (
+            {"format": "dd/MM/yyyy"},
+            " 31/01/2024 ",
+            {"gte": "31/01/2024", "format": "dd/MM/yyyy"},
+        ),
+        (
+            {"format": "dd/MM/yyyy", "rounding": "M"},
+            "31/01/2024",
+            {"gte": "31/01/2024||/M", "format": "dd/MM/yyyy"},
+        ),
+        (
+            {"format": "dd/MM/yyyy"},
+            "now-1d",
+            {"gte": "now-1d", "format": "dd/MM/yyyy"},
+        ),
+        (
+            {"format": "yyyy-MM-dd", "input_type": datetime.date},
+            datetime.datetime(2024, 1, 31, 10, 15),
+            {"gte": "2024-01-31", "format": "yyyy-MM-dd"},
+        ),
+    ])
+    def test_format(self, compiled, field, value, expected):
+        cls = type("Builder", (ElasticsearchQueryBuilder,), {
+            "compiled": compiled,
+            "updated": builder_fields.RangeElasticField(**{
+                "field_name": "updated",
+                "lookup_expr": "gte",
+                "input_type": datetime.datetime,
+                **field,
+            }),
+        })
+        assert self._get_clauses(cls({"updated": value})) == [
+            {"range": {"updated": expected}}
+        ]
+
+    @pytest.mark.parametrize("value, message", [
+        (
+            datetime.date(2024, 1, 31),
+            "Dates can't be formatted as `dd/MM/yyyy`"
+        ),
+        (True, "Bound must be a string, a number or a date in `dd/MM/yyyy`"),
+        (1.5, "Bound must be a string, a number or a date in `dd/MM/yyyy`"),
+    ])
+    def test_format_invalid(self, value, message):
+        class Builder(ElasticsearchQueryBuilder):
+            updated = builder_fields.TwoSidedRangeElasticField(
+                field_name="updated",
+                input_type=datetime.date,
+                format="dd/MM/yyyy"
+            )
+
+        with pytest.raises(ValueError) as error:
+            Builder({"updated": [value, None]}).query
+        assert str(error.value) == "Invalid input for `updated`: " + message
+
+    def test_format_memory(self):
+        class Builder(ElasticsearchQueryBuilder):
+            updated = builder_fields.RangeElasticField(
+                field_name="updated",
+                lookup_expr="gte",
+                input_type=datetime.datetime,
+                format="epoch_millis"
+            )
+
+        index = MemoryIndex({"properties": {"updated": {"type": "date"}}})
+        index.add_many([
+            {"_id": "1", "updated": "2023-11-14T22:13:20Z"},
+            {"_id": "2", "updated": "2023-11-14T22:13:19Z"},
+        ])
+        query = Builder({"updated": 1700000000000}).query
+        assert [doc_id for doc_id, _ in index.search(query)] == ["1"]
+
+    def test_rounding_invalid(self):
+        with pytest.raises(AssertionError):
+            builder_fields.RangeElasticField(
+                field_name="updated",
+                lookup_expr="gte",
+                input_type=datetime.datetime,
+                rounding="q"
+            )
+
+
 class TestCaseRangeElasticFieldIntegration:
     index_name = "test_range"
     mappings = {
@@ -316,6 +837,14 @@ class TestCaseRangeElasticFieldIntegration:
             ),
             value=123.123,
         ),
+        dict(
+            parameter_name="range_two_sided_param",
+            field=builder_fields.TwoSidedRangeElasticField(
+                field_name="range_int",
+                input_type=int
+            ),
+            value=[1, 123],
+        ),
     ])
     def test_request(self,
                      elasticsearch_client,
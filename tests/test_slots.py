@@ -0,0 +1,141 @@
+import tracemalloc
+
+import pytest
+
+from elasticsearch_query_builder import fields as builder_fields
+from elasticsearch_query_builder.builders import ElasticsearchQueryBuilder
+
+
+class Builder(ElasticsearchQueryBuilder):
+    __slots__ = ()
+
+    term_field = builder_fields.TermElasticField(
+        field_name="term_field_test",
+        input_type=int
+    )
+
+
+def get_classes_without_slots(cls: type) -> list:
+    return [
+        klass
+        for klass in cls.__mro__
+        if klass is not object and "__slots__" not in vars(klass)
+    ]
+
+
+def get_slots(cls: type) -> list:
+    return [
+        name
+        for klass in cls.__mro__
+        for name in vars(klass).get("__slots__", ())
+    ]
+
+
+class DictBuilder(Builder):
+    # Layout before slots, the attributes are kept in `__dict__`.
+    def __init__(self, params=None):
+        super().__init__(params)
+        self.__dict__.update(
+            (name, getattr(self, name))
+            for name in get_slots(Builder)
+        )
+
+
+def get_bytes_per_instance(factory, count: int = 1000) -> float:
+    tracemalloc.start()
+    try:
+        snapshot = tracemalloc.take_snapshot()
+        instances = [factory() for _ in range(count)]
+        allocated = sum(
+            stat.size_diff
+            for stat in tracemalloc.take_snapshot().compare_to(
+                snapshot,
+                "filename"
+            )
+        )
+    finally:
+        tracemalloc.stop()
+    assert len(instances) == count
+    return allocated / count
+
+
+class TestCaseSlots:
+
+    def test_builder(self):
+        assert get_classes_without_slots(Builder) == []
+        assert not hasattr(Builder(), "__dict__")
+        assert not hasattr(Builder({"term_field": "1"}), "__dict__")
+
+    @pytest.mark.parametrize("params", [None, {"term_field": "1"}])
+    def test_memory(self, params, record_property):
+        before = get_bytes_per_instance(lambda: DictBuilder(params))
+        after = get_bytes_per_instance(lambda: Builder(params))
+        record_property("bytes_per_builder_before", before)
+        record_property("bytes_per_builder_after", after)
+        assert hasattr(DictBuilder(params), "__dict__")
+        assert after < before
+
+    @pytest.mark.parametrize("field_class_name", [
+        name
+        for name in builder_fields.__all__
+        if name != "ElasticField"
+    ])
+    def test_field_classes(self, field_class_name):
+        field_class = getattr(builder_fields, field_class_name)
+        assert get_classes_without_slots(field_class) == []
+
+    @pytest.mark.parametrize("field", [
+        builder_fields.TermElasticField(
+            field_name="term_test",
+            input_type=int
+        ),
+        builder_fields.TermsElasticField(field_name="terms_test"),
+        builder_fields.MatchElasticField(
+            field_name="match_test",
+            input_type=str
+        ),
+        builder_fields.RangeElasticField(
+            field_name="range_test",
+            input_type=int,
+            lookup_expr="gte"
+        ),
+        builder_fields.NestedElasticField(
+            path="rootpath",
+            child=builder_fields.ExistsElasticField(field_name="exists_test")
+        ),
+    ], ids=lambda field: type(field).__name__)
+    def test_fields(self, field):
+        assert not hasattr(field, "__dict__")
+
+    def test_subclass(self):
+        class CustomTermElasticField(builder_fields.TermElasticField):
+            _logic_operator = "filter"
+
+            def __init__(self, boost: float, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.boost = boost
+
+            def _get_query(self, value, field_query_name: str):
+                query = super()._get_query(value, field_query_name)
+                query["term"]["boost"] = self.boost
+                return query
+
+        class CustomBuilder(Builder):
+            custom_field = CustomTermElasticField(
+                boost=2.0,
+                field_name="custom_test",
+                input_type=str
+            )
+
+        builder = CustomBuilder({"custom_field": "1"})
+        builder.extra = 1
+        assert CustomBuilder.custom_field.logic_operator == "filter"
+        assert builder.query["query"]["bool"]["filter"] == [
+            {"term": {"custom_test": "1", "boost": 2.0}}
+        ]
+
+        CustomBuilder.custom_field._logic_operator = "should"
+        assert CustomBuilder({"custom_field": "1"}).query_bytes() == (
+            b'{"query": {"bool": {"should": '
+            b'[{"term": {"custom_test": "1", "boost": 2.0}}]}}}'
+        )
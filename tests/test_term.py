@@ -1,6 +1,10 @@
+import json
+
 import pytest
 
+from elasticsearch_query_builder import ElasticsearchQueryBuilder
 from elasticsearch_query_builder import fields as builder_fields
+from elasticsearch_query_builder.cache import QueryCache
 from .builder import ElasticSearchQueryTestBuilder
 
 
@@ -142,6 +146,69 @@ class TestCaseTermElasticField:
                ]['sample'] == "test-text"
 
 
+class TestCaseTermElasticFieldMultiple:
+
+    @pytest.fixture(params=[False, True], ids=["interpreted", "compiled"])
+    def cls(self, request):
+        class Builder(ElasticsearchQueryBuilder):
+            compiled = request.param
+
+            color = builder_fields.TermElasticField(
+                field_name="color",
+                input_type=str,
+                multiple=True
+            )
+            size = builder_fields.TermElasticField(
+                field_name="size",
+                input_type=int,
+                multiple=True
+            )
+
+        return Builder
+
+    def _get_clauses(self, builder):
+        query = builder.query
+        assert builder.query_bytes() == json.dumps(query).encode("utf-8")
+        return query["query"]["bool"]["must"] if query else []
+
+    @pytest.mark.parametrize("params, expected", [
+        (
+            {"color": ["red", "blue"], "size": ("1", 2)},
+            [
+                {"terms": {"color": ["red", "blue"]}},
+                {"terms": {"size": [1, 2]}},
+            ],
+        ),
+        (
+            {"color": ["red"], "size": "3"},
+            [
+                {"term": {"color": "red"}},
+                {"term": {"size": 3}},
+            ],
+        ),
+        (
+            {"color": [], "size": [4]},
+            [
+                {"term": {"size": 4}},
+            ],
+        ),
+        ({"color": (), "size": []}, []),
+    ])
+    def test_query(self, cls, params, expected):
+        assert self._get_clauses(cls(params)) == expected
+
+    def test_query_cache(self, cls):
+        cls.query_cache = QueryCache()
+        cls({"size": 1}).query
+        cls({"size": ["1"]}).query
+        assert cls.query_cache.info().hits == 1
+
+    @pytest.mark.parametrize("value", [["a"], [None], {"a": 1}])
+    def test_validation(self, cls, value):
+        with pytest.raises(ValueError):
+            cls({"size": value}).query
+
+
 class TestCaseTermElasticFieldIntegration:
     index_name = "test_term"
     mappings = {
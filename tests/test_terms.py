@@ -1,6 +1,13 @@
+import json
+import uuid
+from array import array
+
 import pytest
 
+from elasticsearch_query_builder import ElasticsearchQueryBuilder
 from elasticsearch_query_builder import fields as builder_fields
+from elasticsearch_query_builder.cache import QueryCache
+from elasticsearch_query_builder.observers import AggregatingObserver
 from .builder import ElasticSearchQueryTestBuilder
 
 
@@ -97,6 +104,373 @@ class TestCaseTermsElasticField:
                ]["terms_field_tests"] == [1, 2, 3]
 
 
+class TestCaseTermsElasticFieldInputType:
+
+    @pytest.fixture(params=[False, True], ids=["interpreted", "compiled"])
+    def cls(self, request):
+        class Builder(ElasticsearchQueryBuilder):
+            compiled = request.param
+
+            int_terms = builder_fields.TermsElasticField(
+                field_name="int_terms",
+                input_type=int
+            )
+            float_terms = builder_fields.TermsElasticField(
+                field_name="float_terms",
+                input_type=float
+            )
+            uuid_terms = builder_fields.TermsElasticField(
+                field_name="uuid_terms",
+                input_type=uuid.UUID
+            )
+            strict_terms = builder_fields.TermsElasticField(
+                field_name="strict_terms",
+                input_type=int,
+                strict=True
+            )
+
+        return Builder
+
+    def test_query(self, cls):
+        params = {
+            "int_terms": ["1", 2, 3.5],
+            "float_terms": ("1.5", 2),
+            "uuid_terms": [uuid.UUID(int=1)],
+        }
+        builder = cls(dict(params))
+        query = builder.query
+        assert query == {
+            "query": {
+                "bool": {
+                    "must": [
+                        {"terms": {"int_terms": [1, 2, 3]}},
+                        {"terms": {"float_terms": [1.5, 2.0]}},
+                        {"terms": {"uuid_terms": [str(uuid.UUID(int=1))]}},
+                    ]
+                }
+            }
+        }
+        assert cls(dict(params)).query_bytes() == json.dumps(
+            query
+        ).encode("utf-8")
+
+    def test_compact(self, cls):
+        builder = cls({"int_terms": range(1000)})
+        builder.query
+        value = builder._params["int_terms"]
+        assert not isinstance(value, list)
+        assert value.tolist() == list(range(1000))
+
+        # Arrays of the same type are not copied.
+        values = array("q", [1, 2])
+        builder = cls({"int_terms": values})
+        builder.query
+        if isinstance(builder._params["int_terms"], array):
+            assert builder._params["int_terms"] is values
+
+    def test_empty(self, cls):
+        assert cls({"int_terms": []}).query == {}
+        assert cls({"int_terms": []}).query_bytes() == b"{}"
+
+    @pytest.mark.parametrize("field_query_name, value", [
+        ("int_terms", "123"),
+        ("int_terms", ["a"]),
+        ("int_terms", [None]),
+        ("int_terms", [2 ** 64]),
+        ("uuid_terms", ["a"]),
+        ("strict_terms", [1.5]),
+        ("strict_terms", 1),
+    ])
+    def test_validation(self, cls, field_query_name, value):
+        with pytest.raises(ValueError):
+            cls({field_query_name: value}).query
+
+    def test_query_cache(self, cls):
+        cls.query_cache = QueryCache()
+        cls({"int_terms": [1, 2]}).query
+        query = cls({"int_terms": ["1", "2"]}).query
+        assert cls.query_cache.info().hits == 1
+        assert query["query"]["bool"]["must"] == [
+            {"terms": {"int_terms": [1, 2]}}
+        ]
+
+    def test_numpy(self, cls):
+        numpy = pytest.importorskip("numpy")
+        builder = cls({"int_terms": numpy.arange(3)})
+        builder.query
+        assert isinstance(builder._params["int_terms"], numpy.ndarray)
+        assert builder.query["query"]["bool"]["must"] == [
+            {"terms": {"int_terms": [0, 1, 2]}}
+        ]
+
+
+class TestCaseTermsElasticFieldLimits:
+
+    @pytest.fixture(params=[False, True], ids=["interpreted", "compiled"])
+    def cls(self, request):
+        class Builder(ElasticsearchQueryBuilder):
+            compiled = request.param
+
+            tags = builder_fields.TermsElasticField(
+                field_name="tags",
+                unique=True,
+                sort=True
+            )
+            ordered = builder_fields.TermsElasticField(
+                field_name="ordered",
+                input_type=int,
+                unique=True
+            )
+            chunked = builder_fields.TermsElasticField(
+                field_name="chunked",
+                input_type=int,
+                sort=True,
+                max_terms_count=2
+            )
+            limited = builder_fields.TermsElasticField(
+                field_name="limited",
+                max_terms_count=2,
+                overflow="raise"
+            )
+
+        return Builder
+
+    def _get_clauses(self, builder):
+        query = builder.query
+        assert builder.query_bytes() == json.dumps(query).encode("utf-8")
+        return query["query"]["bool"]["must"]
+
+    def test_canonical(self, cls):
+        assert self._get_clauses(cls({
+            "tags": ["b", "a", "b", 1, True, 1],
+            "ordered": ["3", 1, 3, 2, 1],
+        })) == [
+            {"terms": {"tags": [True, 1, "a", "b"]}},
+            {"terms": {"ordered": [3, 1, 2]}},
+        ]
+
+    def test_query_cache(self, cls):
+        cls.query_cache = QueryCache()
+        cls({"tags": ["a", "b"]}).query
+        cls({"tags": ["b", "a", "a"]}).query
+        assert cls.query_cache.info().hits == 1
+
+    def test_split(self, cls):
+        assert self._get_clauses(cls({"chunked": [5, 4, 3, 2, 1]})) == [
+            {
+                "bool": {
+                    "should": [
+                        {"terms": {"chunked": [1, 2]}},
+                        {"terms": {"chunked": [3, 4]}},
+                        {"terms": {"chunked": [5]}},
+                    ]
+                }
+            }
+        ]
+        assert self._get_clauses(cls({"chunked": [2, 1]})) == [
+            {"terms": {"chunked": [1, 2]}}
+        ]
+
+    def test_split_optimized(self, cls):
+        cls.optimized = True
+        query = cls({"chunked": [3, 2, 1]}).query
+        assert query["query"] == {
+            "bool": {
+                "should": [
+                    {"terms": {"chunked": [1, 2]}},
+                    {"terms": {"chunked": [3]}},
+                ]
+            }
+        }
+
+    def test_raise(self, cls):
+        assert self._get_clauses(cls({"limited": ["a", "b"]})) == [
+            {"terms": {"limited": ["a", "b"]}}
+        ]
+        with pytest.raises(ValueError) as error:
+            cls({"limited": ["a", "b", "c"]}).query
+        assert str(error.value) == (
+            "Invalid input for `limited`: "
+            "3 values exceed the max terms count 2"
+        )
+        assert str(error.value.__cause__) == (
+            "3 values exceed the max terms count 2"
+        )
+
+        batch_error, = cls.build_many(
+            [{"limited": ["a", "b", "c"]}],
+            errors="collect"
+        )
+        assert str(batch_error.error) == (
+            "Invalid input for `limited`: "
+            "3 values exceed the max terms count 2"
+        )
+
+        cls.observer = AggregatingObserver()
+        with pytest.raises(ValueError) as error:
+            cls({"limited": ["a", "b", "c"]}).query
+        assert str(error.value) == (
+            "Invalid input for `limited`: "
+            "3 values exceed the max terms count 2"
+        )
+
+    @pytest.mark.parametrize("value", [[{"a": 1}, {"b": 2}], [[1]]])
+    def test_validation(self, cls, value):
+        with pytest.raises(ValueError):
+            cls({"tags": value}).query
+
+    def test_numpy(self, cls):
+        numpy = pytest.importorskip("numpy")
+        assert self._get_clauses(cls({
+            "ordered": numpy.array([3, 1, 3, 2]),
+        })) == [
+            {"terms": {"ordered": [3, 1, 2]}}
+        ]
+
+
+class TestCaseTermsElasticFieldLookup:
+
+    @pytest.fixture(params=[False, True], ids=["interpreted", "compiled"])
+    def cls(self, request):
+        class GroupTermsElasticField(builder_fields.TermsElasticField):
+            __slots__ = ()
+
+            def get_lookup(self, value):
+                return super().get_lookup({"id": "group-%s" % value})
+
+        class Builder(ElasticsearchQueryBuilder):
+            compiled = request.param
+
+            visible = builder_fields.TermsElasticField(
+                field_name="id",
+                lookup={"index": "groups", "path": "members"}
+            )
+            lookup = builder_fields.TermsElasticField(
+                field_name="tags",
+                lookup={}
+            )
+            group = GroupTermsElasticField(
+                field_name="id",
+                lookup={"index": "groups", "path": "members"}
+            )
+
+        return Builder
+
+    def test_query(self, cls):
+        builder = cls({
+            "visible": 10,
+            "lookup": {
+                "routing": "user-1",
+                "path": "tags",
+                "id": "1",
+                "index": "users",
+            },
+        })
+        query = builder.query
+        assert query == {
+            "query": {
+                "bool": {
+                    "must": [
+                        {
+                            "terms": {
+                                "id": {
+                                    "index": "groups",
+                                    "id": "10",
+                                    "path": "members",
+                                }
+                            }
+                        },
+                        {
+                            "terms": {
+                                "tags": {
+                                    "index": "users",
+                                    "id": "1",
+                                    "path": "tags",
+                                    "routing": "user-1",
+                                }
+                            }
+                        },
+                    ]
+                }
+            }
+        }
+        assert builder.query_bytes() == json.dumps(query).encode("utf-8")
+
+    def test_hook(self, cls):
+        assert cls({"group": 1}).query["query"]["bool"]["must"] == [
+            {
+                "terms": {
+                    "id": {
+                        "index": "groups",
+                        "id": "group-1",
+                        "path": "members",
+                    }
+                }
+            }
+        ]
+
+    def test_builder_hook(self, cls):
+        class Builder(cls):
+            user = "user-1"
+
+            def get_visible_lookup(self, value):
+                return {"id": value, "routing": self.user}
+
+        expected = {
+            "terms": {
+                "id": {
+                    "index": "groups",
+                    "id": "10",
+                    "path": "members",
+                    "routing": "user-1",
+                }
+            }
+        }
+        builder = Builder({"visible": 10, "group": 1})
+        assert builder.query["query"]["bool"]["must"][0] == expected
+        assert builder.query_bytes() == json.dumps(
+            builder.query
+        ).encode("utf-8")
+
+        queries = Builder.build_many([{"visible": 10}, {"visible": None}],
+                                     errors="collect")
+        assert queries[0]["query"]["bool"]["must"] == [expected]
+        assert isinstance(queries[1].error, ValueError)
+
+        # Resolved lookups are in the key of the query cache.
+        Builder.query_cache = QueryCache()
+        Builder({"visible": 10}).query
+        builder = Builder({"visible": 10})
+        builder.user = "user-2"
+        assert builder.query["query"]["bool"]["must"][0]["terms"]["id"][
+            "routing"
+        ] == "user-2"
+
+    def test_query_cache(self, cls):
+        cls.query_cache = QueryCache()
+        cls({"visible": 10}).query
+        cls({"visible": "10"}).query
+        cls({"visible": {"id": 10}}).query
+        assert cls.query_cache.info().hits == 2
+
+    @pytest.mark.parametrize("field_query_name, value", [
+        ("visible", [1, 2]),
+        ("visible", True),
+        ("visible", {"id": 1, "size": 10}),
+        ("lookup", "1"),
+        ("lookup", {"index": "users", "id": "1"}),
+    ])
+    def test_validation(self, cls, field_query_name, value):
+        with pytest.raises(ValueError):
+            cls({field_query_name: value}).query
+
+    def test_options(self):
+        with pytest.raises(AssertionError):
+            builder_fields.TermsElasticField(lookup={"size": 1})
+        with pytest.raises(AssertionError):
+            builder_fields.TermsElasticField(lookup={}, input_type=int)
+
+
 class TestCaseTermsElasticFieldIntegration:
     index_name = "test_terms"
     mappings = {